@@ -1,7 +1,10 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from flask_migrate import Migrate
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -19,7 +22,9 @@ def create_app():
     
     # Database Configuration
     # Check if SQLALCHEMY_DATABASE_URI is set directly (supports SQLite or PostgreSQL)
-    database_url = os.environ.get('SQLALCHEMY_DATABASE_URI')
+    database_url = os.environ.get('SQLALCHEMY_DATABASE_URI') or os.environ.get('DATABASE_URL')
+    if database_url and database_url.startswith('postgres://'):
+        database_url = database_url.replace('postgres://', 'postgresql://', 1)
     
     if database_url:
         # Use the direct connection string (works for SQLite or PostgreSQL)
@@ -42,30 +47,258 @@ def create_app():
         app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_size': 10,
-        'pool_recycle': 3600,
-        'pool_pre_ping': True
-    }
+    
+    # Connection pool sized from the deployment profile and worker/thread counts
+    from app.pool import engine_options, detect_profile
+    app.config['DB_POOL_PROFILE'] = detect_profile(database_url)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url, app.config['DB_POOL_PROFILE'])
+    
+    # JSON provider (orjson when installed, stdlib otherwise)
+    app.config['JSON_PROVIDER'] = os.environ.get('JSON_PROVIDER', 'auto')
+    from app.json_provider import init_json
+    init_json(app)
+    
+    # Change notifications (Redis pub/sub when REDIS_URL is set, in-process otherwise)
+    app.config['EVENT_BUS'] = os.environ.get('EVENT_BUS', 'auto')
+    app.config['REDIS_URL'] = os.environ.get('REDIS_URL')
+    app.config['SSE_HEARTBEAT_SECONDS'] = int(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    app.config['SSE_MAX_SECONDS'] = int(os.environ.get('SSE_MAX_SECONDS', 300))
+    # Streams held by gthread worker threads per process (0: unlimited; gevent and the ASGI app don't use threads)
+    threaded = os.environ.get('GUNICORN_WORKER_CLASS') == 'gthread'
+    app.config['SSE_MAX_STREAMS'] = int(os.environ.get(
+        'SSE_MAX_STREAMS', max(1, int(os.environ.get('GUNICORN_THREADS', 4)) // 2) if threaded else 0))
+    app.config['SSE_BUSY_RETRY_MS'] = int(os.environ.get('SSE_BUSY_RETRY_MS', 30000))
+    from app.events import init_events
+    init_events(app)
+    
+    # Row counters for /api/stats, updated right after each writing transaction commits
+    app.config['STATS_CACHE_SECONDS'] = float(os.environ.get('STATS_CACHE_SECONDS', 5))
+    from app.counters import init_counters
+    init_counters(app)
+    
+    # Background jobs for import/restore/merge/export (Redis queue when REDIS_URL is set)
+    app.config['JOB_BACKEND'] = os.environ.get('JOB_BACKEND', 'auto')
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+    app.config['JOB_RETENTION_HOURS'] = float(os.environ.get('JOB_RETENTION_HOURS', 24))
+    # Running jobs stamp a heartbeat; jobs without one for JOB_STALE_SECONDS were lost with their worker
+    app.config['JOB_HEARTBEAT_SECONDS'] = float(os.environ.get('JOB_HEARTBEAT_SECONDS', 30))
+    app.config['JOB_STALE_SECONDS'] = float(os.environ.get('JOB_STALE_SECONDS', 300))
+    app.config['JOB_TIMEOUT_HOURS'] = float(os.environ.get('JOB_TIMEOUT_HOURS', 6))  # SQLite: no heartbeats
+    from app.jobs import init_jobs
+    init_jobs(app)
+    
+    # Server-rendered dashboard reports, cached per data version
+    app.config['REPORT_CACHE_SIZE'] = int(os.environ.get('REPORT_CACHE_SIZE', 32))
+    from app.reports import init_reports
+    init_reports(app)
+    
+    # Channel/application dimension rows, created as projects reference them
+    from app.dimensions import init_dimensions
+    init_dimensions(app)
+    
+    # Member id <-> name map behind the integer member references
+    from app.members import init_members
+    init_members(app)
+    
+    # Manual ordering keys of tasks, subtasks and images (lists renumbered in the background,
+    # or by the move itself past RANK_MAX_LENGTH)
+    app.config['RANK_REBALANCE_LENGTH'] = int(os.environ.get('RANK_REBALANCE_LENGTH', 16))
+    app.config['RANK_MAX_LENGTH'] = int(os.environ.get('RANK_MAX_LENGTH', 48))
+    from app.ordering import init_ordering
+    init_ordering(app)
+    
+    # Meeting minutes history (previous versions kept per project, compressed)
+    app.config['MINUTES_HISTORY'] = int(os.environ.get('MINUTES_HISTORY', 10))
+    app.config['MINUTES_COMPRESSION'] = os.environ.get('MINUTES_COMPRESSION', '1').lower() not in ('0', 'false', 'no', 'off')
+    app.config['MINUTES_COMPRESS_MIN_BYTES'] = int(os.environ.get('MINUTES_COMPRESS_MIN_BYTES', 512))
+    from app.minutes import init_minutes
+    init_minutes(app)
+    
+    # Streaming uploads: files kept on disk (shared storage when several instances serve uploads)
+    app.config['UPLOAD_DIR'] = os.environ.get('UPLOAD_DIR')
+    app.config['UPLOAD_MAX_BYTES'] = int(os.environ.get('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+    app.config['UPLOAD_EXPIRY_HOURS'] = float(os.environ.get('UPLOAD_EXPIRY_HOURS', 24))
+    from app.uploads import init_uploads
+    init_uploads(app)
+    
+    # Backup chains: a full snapshot, then differential backups of what changed since the previous one
+    app.config['BACKUP_DIR'] = os.environ.get('BACKUP_DIR')
+    app.config['BACKUP_CHAIN_LENGTH'] = int(os.environ.get('BACKUP_CHAIN_LENGTH', 30))
+    app.config['BACKUP_KEEP_CHAINS'] = int(os.environ.get('BACKUP_KEEP_CHAINS', 2))
+    from app.backups import init_backups
+    init_backups(app)
+    
+    # Archive tier: finished projects unchanged for ARCHIVE_AFTER_DAYS move out of the hot tables
+    app.config['ARCHIVE_AFTER_DAYS'] = float(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+    app.config['ARCHIVE_STATUSES'] = [
+        status.strip() for status in os.environ.get('ARCHIVE_STATUSES', 'completed,cancelled').split(',') if status.strip()
+    ]
+    from app.archive import init_archive
+    init_archive(app)
     
     # Initialize extensions
     db.init_app(app)
+    from app.pool import enforce_sqlite_foreign_keys
+    with app.app_context():
+        enforce_sqlite_foreign_keys(db.engine)  # deletes cascade in the database (passive_deletes)
     CORS(app)  # Enable CORS for all routes
     
     # Register blueprints
     from app.routes import bp
     app.register_blueprint(bp)
     
-    # Create tables if they don't exist
-    with app.app_context():
-        try:
-            db.create_all()
-            print(f"✓ Database initialized: {database_url.split('@')[0]}@...")
-        except Exception as e:
-            print(f"⚠ Warning: Could not create tables - {e}")
-            print("Please run: python setup_database.py")
+    # Opt-in request profiling (Server-Timing headers, SQL counts, sampled profiles)
+    app.config['PROFILE_REQUESTS'] = os.environ.get('PROFILE_REQUESTS', '').lower() in ('1', 'true', 'yes')
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    app.config['PROFILE_SLOW_MS'] = float(os.environ.get('PROFILE_SLOW_MS', 500))
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', '/tmp/it-resource-profiles')
+    app.config['PROFILER'] = os.environ.get('PROFILER', 'auto')
+    from app.profiling import init_profiling
+    init_profiling(app)
+    
+    # Prometheus metrics at /metrics (multi-worker via PROMETHEUS_MULTIPROC_DIR)
+    from app.metrics import init_metrics
+    init_metrics(app)
+    
+    # Schema management lives in explicit commands (`flask init-db`,
+    # `flask db upgrade main@head`) so that creating the app never touches the database
+    Migrate(app, db)
+    register_commands(app)
     
     return app
 
-# Create app instance (for backwards compatibility)
-app = create_app()
\ No newline at end of file
+def register_commands(app):
+    """Register CLI commands on the app"""
+    
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create the schema of an empty database, or migrate an existing one along the main line.
+
+        Contract steps (the ``contract`` branch: dropping what a previous
+        release still reads) are left to an explicit `flask db upgrade contract@head`.
+        """
+        from flask_migrate import stamp, upgrade
+        from sqlalchemy import inspect
+        from app import models  # noqa: F401 - register models on the metadata
+        tables = inspect(db.engine).get_table_names()
+        if 'alembic_version' in tables:
+            upgrade(revision='main@head')
+        elif not tables:
+            # The models are both heads (nothing older can be running); record them so upgrades continue from there
+            db.create_all()
+            stamp(revision='heads')
+        else:
+            # Creating the missing tables here would make the migrations that add them fail
+            print("⚠ Warning: existing tables are not under Alembic: run `flask db stamp <revision matching them>` "
+                  "and `flask init-db` again")
+            sys.exit(1)
+        from app.counters import reconcile_counters
+        reconcile_counters(db.session)
+        print(f"✓ Database initialized: {db.engine.url.render_as_string(hide_password=True)}")
+    
+    @app.cli.command('reconcile-counters')
+    def reconcile_counters_command():
+        """Recount /api/stats counters with COUNT(*) and correct any drift."""
+        from app.counters import reconcile_counters
+        drift = reconcile_counters(db.session)
+        if drift:
+            print("✓ Corrected: " + ', '.join(f'{name} {delta:+d}' for name, delta in drift.items()))
+        else:
+            print("✓ Counters are exact")
+    
+    @app.cli.command('rebalance-ranks')
+    @click.option('--min-length', type=int, help='Only lists holding a longer key (default: RANK_REBALANCE_LENGTH)')
+    @click.option('--all', 'all_lists', is_flag=True, help='Renumber every list')
+    def rebalance_ranks_command(min_length, all_lists):
+        """Renumber task/subtask/image ordering keys that have grown long."""
+        from app.ordering import rebalance_ranks
+        if min_length is None and not all_lists:
+            min_length = app.config['RANK_REBALANCE_LENGTH']
+        renumbered = rebalance_ranks(db.session, min_length=None if all_lists else min_length)
+        print("✓ Renumbered: " + ', '.join(f'{rows} {table}' for table, rows in renumbered.items()))
+    
+    @app.cli.command('prune-uploads')
+    def prune_uploads_command():
+        """Delete uploads left incomplete, or no longer used by any image, for longer than UPLOAD_EXPIRY_HOURS."""
+        from app.uploads import prune_uploads
+        removed = prune_uploads(db.session, app.config['UPLOAD_EXPIRY_HOURS'])
+        print(f"✓ Removed {removed['pending']} incomplete and {removed['unreferenced']} unused upload(s)")
+    
+    @app.cli.command('backup')
+    @click.option('--full', is_flag=True, help='Start a new chain with a full backup')
+    def backup_command(full):
+        """Write the next backup of the chain (a diff of the changes since the last one)."""
+        from app.backups import take_backup
+        backup = take_backup(db.session, full=full)
+        print(f"✓ Backup {backup.id} ({backup.kind}): {backup.team_members} team members, "
+              f"{backup.projects} projects, {backup.deleted} deletions, {backup.size} bytes ({backup.encoding})")
+    
+    @app.cli.command('prune-backups')
+    @click.option('--keep-chains', type=int, help='Chains to keep (default: BACKUP_KEEP_CHAINS)')
+    def prune_backups_command(keep_chains):
+        """Delete backup chains older than the newest BACKUP_KEEP_CHAINS."""
+        from app.backups import prune_backups
+        removed = prune_backups(db.session, keep_chains or app.config['BACKUP_KEEP_CHAINS'])
+        print(f"✓ Removed {removed} backup(s)")
+    
+    @app.cli.command('archive-projects')
+    @click.option('--days', type=float, help='Archive projects unchanged for this many days (default: ARCHIVE_AFTER_DAYS)')
+    @click.option('--dry-run', is_flag=True, help='Only count the projects due')
+    def archive_projects_command(days, dry_run):
+        """Move finished projects (ARCHIVE_STATUSES) unchanged for ARCHIVE_AFTER_DAYS to the archive."""
+        from datetime import timedelta
+        from sqlalchemy import func, select
+        from app.archive import archive_projects, due_for_archive
+        from app.models import Project
+        after = timedelta(days=days) if days is not None else None
+        if dry_run:
+            due = db.session.scalar(select(func.count()).select_from(Project).where(due_for_archive(after)))
+            print(f"{due} project(s) due for the archive")
+            return
+        archived = archive_projects(db.session, after=after)
+        print(f"✓ Archived {len(archived)} project(s)")
+    
+    @app.cli.command('jobs-worker')
+    @click.option('--burst', is_flag=True, help='Exit once the queue is empty')
+    def jobs_worker_command(burst):
+        """Run queued background jobs (JOB_BACKEND=redis)."""
+        from app.jobs import get_runner
+        runner = get_runner()
+        if not hasattr(runner, 'work'):
+            print(f"⚠ JOB_BACKEND is '{runner.name}': jobs run inside the web workers, nothing to do")
+            return
+        print("✓ Waiting for jobs...")
+        runner.work(app, burst=burst)
+    
+    @app.cli.command('seed-data')
+    @click.option('--preset', type=click.Choice(['tiny', 'small', 'medium', 'large']), default='small')
+    @click.option('--members', type=int, help='Override the preset member count')
+    @click.option('--projects', type=int, help='Override the preset project count')
+    @click.option('--tasks', type=int, help='Tasks per project')
+    @click.option('--subtasks', type=int, help='Subtasks per task')
+    @click.option('--images', type=int, help='Images per project')
+    @click.option('--image-bytes', type=int, help='Decoded size of each image')
+    @click.option('--seed', type=int, default=42)
+    def seed_data_command(preset, members, projects, tasks, subtasks, images, image_bytes, seed):
+        """Insert a synthetic dataset (for benchmarks and local testing)."""
+        import dataclasses
+        from app.datagen import Scale, generate_dataset
+        
+        overrides = {
+            'members': members, 'projects': projects, 'tasks_per_project': tasks,
+            'subtasks_per_task': subtasks, 'images_per_project': images, 'image_bytes': image_bytes
+        }
+        scale = dataclasses.replace(Scale.preset(preset), **{k: v for k, v in overrides.items() if v is not None})
+        counts = generate_dataset(db.session, scale, seed=seed)
+        print("✓ Generated: " + ', '.join(f'{v} {k}' for k, v in counts.items()))
+
+_app = None
+
+def __getattr__(name):
+    """Lazily build the module-level ``app`` on first access (backwards compatibility)"""
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,188 @@
+"""
+Archive tier for finished projects.
+
+Completed and cancelled projects would otherwise stay in the hot tables
+forever, and every ``GET /api/data``, ``GET /api/projects`` and
+``GET /api/backup`` would keep loading their trees. Projects whose status
+is in ``ARCHIVE_STATUSES`` and that haven't changed for
+``ARCHIVE_AFTER_DAYS`` (``projects.updated_at``, which any change to the
+tree bumps) are moved to ``archived_projects``: one row per project
+holding its whole tree (tasks, subtasks, images, links, team, channels,
+applications, meeting minutes and their history) as a single document,
+encoded and compressed like backups (app/backups.py). The default reads
+never see the archive, so their cost follows active work, not history::
+
+    flask archive-projects                 archive everything due (or POST /api/archive/run)
+    POST /api/projects/<id>/archive        archive one project now, whatever its status
+    GET  /api/archive                      archived projects, newest first (?status=, ?q=, keyset pages)
+    GET  /api/archive/<id>                 one archived project with its tree
+    POST /api/archive/<id>/restore         move it back into the hot tables
+
+Archiving deletes the live rows the way ``DELETE /api/projects/<id>`` does:
+children go with ON DELETE CASCADE, counters and change events follow, and
+backup chains record a tombstone. The archive is not part of snapshots or
+backup chains, and restoring one leaves it untouched. A restored project
+gets a new id; team members that no longer exist are dropped from its team
+and assignments.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, select
+from sqlalchemy.orm import selectinload, undefer
+
+from app import minutes
+from app.backups import decode, encode
+from app.events import record_change
+from app.members import member_map
+from app.models import ArchivedProject, MeetingMinutesRevision, Project
+from app.pagination import Keyset
+from app.queries import page_payload, projects_query
+from app.snapshots import image_uploads, project_from_payload
+
+# Projects moved per transaction
+ARCHIVE_BATCH_SIZE = 100
+
+# Listing order: most recently archived first
+ARCHIVE_KEYS = Keyset(ArchivedProject, [('archived_at', True), ('id', True)])
+
+_archive_after = timedelta(days=90)
+_statuses = ('completed', 'cancelled')
+
+
+class ArchiveConflict(Exception):
+    """A live project already has the archived project's name"""
+
+    def __init__(self, message, existing_id):
+        super().__init__(message)
+        self.existing_id = existing_id
+
+
+def init_archive(app):
+    global _archive_after, _statuses
+    _archive_after = timedelta(days=float(app.config.get('ARCHIVE_AFTER_DAYS', 90)))
+    _statuses = tuple(app.config.get('ARCHIVE_STATUSES') or _statuses)
+
+
+def due_for_archive(after=None):
+    """WHERE clause of live projects due for the archive (finished and unchanged for ``after``)"""
+    cutoff = datetime.utcnow() - (after if after is not None else _archive_after)
+    return and_(Project.status.in_(_statuses), Project.updated_at < cutoff)
+
+
+# ============= Archiving =============
+
+def _tree(project):
+    tree = project.to_dict(include_tasks=True)
+    tree['updated_at'] = project.updated_at
+    tree['minutesHistory'] = [
+        {'meetingMinutes': minutes.decode(rev.content, rev.encoding), 'created_at': rev.created_at}
+        for rev in sorted(project.minutes_revisions, key=lambda rev: rev.id)
+    ]
+    return tree
+
+
+def archive_projects(session, project_ids=None, progress=None, after=None):
+    """Move projects (by default every one due) into the archive; returns their archive entries.
+
+    Commits once per batch of ``ARCHIVE_BATCH_SIZE`` projects. Ids that
+    don't exist are skipped.
+    """
+    if project_ids is None:
+        project_ids = session.scalars(select(Project.id).where(due_for_archive(after)).order_by(Project.id))
+    project_ids = list(project_ids)
+    archived = []
+    for start in range(0, len(project_ids), ARCHIVE_BATCH_SIZE):
+        chunk = project_ids[start:start + ARCHIVE_BATCH_SIZE]
+        projects = session.scalars(
+            projects_query().options(selectinload(Project.minutes_revisions)).where(Project.id.in_(chunk))
+        ).all()
+        entries, now = [], datetime.utcnow()
+        for project in projects:
+            data, encoding = encode(_tree(project))
+            entries.append(ArchivedProject(
+                project_id=project.id, name=project.name, status=project.status,
+                delivery_date=project.delivery_date, created_at=project.created_at,
+                finished_at=project.updated_at, archived_at=now, task_count=len(project.tasks),
+                encoding=encoding, size=len(data), data=data
+            ))
+            record_change(session, 'project', project.id, 'deleted')
+        session.add_all(entries)
+        if projects:
+            # One statement; the trees go with ON DELETE CASCADE (counters and backups follow bulk deletes)
+            session.execute(delete(Project).where(Project.id.in_([project.id for project in projects])))
+        archived.extend(entry.to_dict() for entry in entries)
+        session.commit()
+        if progress is not None:
+            progress(start + len(chunk), len(project_ids))
+    return archived
+
+
+# ============= Reading and restoring =============
+
+def archive_listing(session, args):
+    """GET /api/archive: always paginated; ``status`` filters, ``q`` matches part of the name"""
+    stmt = select(ArchivedProject)
+    if args.get('status'):
+        stmt = stmt.where(ArchivedProject.status == args['status'])
+    if args.get('q'):
+        stmt = stmt.where(ArchivedProject.name.contains(args['q'], autoescape=True))
+    return page_payload(session, ARCHIVE_KEYS, stmt, args, 'projects', lambda entry: entry.to_dict())
+
+
+def _load(session, archive_id):
+    return session.get(ArchivedProject, archive_id, options=[undefer(ArchivedProject.data)])
+
+
+def archived_detail(session, archive_id):
+    """GET /api/archive/<id>: the entry with its decoded tree, None if it isn't archived"""
+    entry = _load(session, archive_id)
+    if entry is None:
+        return None
+    return {**entry.to_dict(), 'project': decode(entry.data, entry.encoding)}
+
+
+def referenced_uploads(session):
+    """Ids of the uploads images of archived projects point at (a restore points them there again)"""
+    documents = session.execute(select(ArchivedProject.data, ArchivedProject.encoding)).yield_per(ARCHIVE_BATCH_SIZE)
+    return image_uploads(decode(data, encoding) for data, encoding in documents)
+
+
+def _drop_unknown_assignees(tasks, members):
+    # Members deleted since archiving can't be assigned any more
+    for item in [*tasks, *(subtask for task in tasks for subtask in task.get('subtasks', []))]:
+        if item.get('assignee') not in members:
+            item['assignee'] = None
+
+
+def _when(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def restore_archived(session, archive_id):
+    """Move an archived project back into the hot tables (commits); the new Project, None if it isn't archived.
+
+    ArchiveConflict (409) when a live project has taken its name meanwhile.
+    """
+    entry = _load(session, archive_id)
+    if entry is None:
+        return None
+    existing_id = session.scalar(select(Project.id).where(Project.name == entry.name))
+    if existing_id is not None:
+        raise ArchiveConflict('Project with this name already exists', existing_id)
+    tree = decode(entry.data, entry.encoding)
+    tasks = tree.get('tasks', [])
+    assignees = {item.get('assignee') for task in tasks for item in [task, *task.get('subtasks', [])]}
+    members = member_map.ids(session, set(tree.get('team', [])) | (assignees - {None}))
+    _drop_unknown_assignees(tasks, members)
+    project = project_from_payload({**tree, 'team': [name for name in tree.get('team', []) if name in members]})
+    project.created_at = entry.created_at
+    for rev in tree.get('minutesHistory', []):
+        content, encoding = minutes.encode(rev['meetingMinutes'])
+        project.minutes_revisions.append(
+            MeetingMinutesRevision(content=content, encoding=encoding, created_at=_when(rev['created_at']))
+        )
+    session.add(project)
+    session.delete(entry)
+    session.commit()
+    return project
@@ -0,0 +1,253 @@
+"""
+ASGI entry point with an async read path for the heavy GET endpoints.
+
+``GET /api/data``, ``/api/projects``, ``/api/projects/summary`` and
+``/api/team-members`` are served on the event loop through an async
+SQLAlchemy engine, so many concurrent dashboard loads share a handful of OS
+threads instead of pinning one worker thread each for the duration of their
+database I/O. ``GET /api/events`` (Server-Sent Events) is served here too:
+an open stream is a coroutine waiting on a queue, not a worker thread. Every
+other request is handed to the regular Flask app through asgiref's WSGI
+adapter.
+
+Routes served here bypass Flask's request hooks, so ``_Request`` applies
+the same instrumentation: Prometheus request metrics (app/metrics.py),
+``Server-Timing`` and the request log line with ``PROFILE_REQUESTS``
+(app/profiling.py), and flask-cors' default headers. Results of more than
+``SERIALIZE_INLINE_ROWS`` rows are JSON-encoded in a thread so a large
+``/api/data`` doesn't stall every other request on the loop.
+
+Run with:
+    uvicorn asgi:application
+    GUNICORN_WORKER_CLASS=uvicorn gunicorn --config gunicorn.conf.py asgi:application
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app import create_app
+from app.events import format_sse, get_bus, streams_enabled
+from app.metrics import observe_request
+from app.pool import async_database_url, async_engine_options, enforce_sqlite_foreign_keys
+from app.profiling import QueryCounter, count_connection_queries, logger, request_record, server_timing
+from app.queries import snapshot_payload, team_members_listing, projects_listing, project_summaries_listing
+
+# Endpoints served natively on the event loop: loader(session, query params)
+ASYNC_ROUTES = {
+    '/api/data': snapshot_payload,
+    '/api/projects': projects_listing,
+    '/api/projects/summary': project_summaries_listing,
+    '/api/team-members': team_members_listing,
+}
+
+EVENTS_PATH = '/api/events'
+
+# Results with more rows than this are serialized in a thread instead of on the loop
+SERIALIZE_INLINE_ROWS = 50
+
+
+def _rows(payload):
+    """Rough size of a loader result: list items, or the items of a payload's lists"""
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        return sum(len(value) for value in payload.values() if isinstance(value, list))
+    return 0
+
+
+class _Request:
+    """One request served natively: CORS headers, metrics and (when enabled) profiling"""
+
+    def __init__(self, scope, endpoint, profile):
+        self.start = time.perf_counter()
+        self.method = scope['method']
+        self.path = scope['path']
+        self.endpoint = endpoint
+        self.origin = dict(scope.get('headers') or []).get(b'origin')
+        self.queries = QueryCounter() if profile else None
+        self.serialize = 0.0
+        self.status = None
+        self.size = 0
+        self.streamed = False
+
+    def _headers(self):
+        # As flask-cors with its defaults: echo the Origin when there is one
+        if self.origin:
+            headers = [(b'access-control-allow-origin', self.origin), (b'vary', b'Origin')]
+        else:
+            headers = [(b'access-control-allow-origin', b'*')]
+        if self.queries is not None and not self.streamed:
+            timing = server_timing(self.queries, self.serialize, time.perf_counter() - self.start)
+            headers.append((b'server-timing', timing.encode('latin-1')))
+        return headers
+
+    def wrap(self, send):
+        async def instrumented(message):
+            if message['type'] == 'http.response.start':
+                self.status = message['status']
+                message = {**message, 'headers': [*message.get('headers', []), *self._headers()]}
+            elif message['type'] == 'http.response.body':
+                self.size += len(message.get('body', b''))
+            await send(message)
+        return instrumented
+
+    def finish(self):
+        total = time.perf_counter() - self.start
+        size = None if self.streamed else self.size
+        observe_request(self.method, self.endpoint, self.status or 500, total, size)
+        if self.queries is not None:
+            logger.info(json.dumps(request_record(self.method, self.path, self.endpoint, self.status,
+                                                  total, self.queries, self.serialize, size)))
+
+
+class AsyncReadApp:
+    """ASGI app that serves ASYNC_ROUTES itself and mounts Flask for the rest"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.profile = bool(flask_app.config.get('PROFILE_REQUESTS'))
+        # Metrics are labelled with the Flask endpoint names, as on the WSGI path
+        adapter = flask_app.url_map.bind('localhost')
+        self.endpoints = {path: adapter.match(path, 'GET')[0] for path in (*ASYNC_ROUTES, EVENTS_PATH)}
+
+        database_url = flask_app.config['SQLALCHEMY_DATABASE_URI']
+        self.engine = create_async_engine(
+            async_database_url(database_url),
+            **async_engine_options(database_url, flask_app.config.get('DB_POOL_PROFILE'))
+        )
+        enforce_sqlite_foreign_keys(self.engine.sync_engine)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] in self.endpoints:
+            request = _Request(scope, self.endpoints[scope['path']], self.profile)
+            try:
+                if scope['path'] == EVENTS_PATH:
+                    await self.events(scope, receive, request.wrap(send), request)
+                else:
+                    args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+                    await self.read(ASYNC_ROUTES[scope['path']], args, request.wrap(send), request)
+            finally:
+                request.finish()
+        else:
+            await self.wsgi(scope, receive, send)
+
+    def _encode(self, payload):
+        return self.flask_app.json.dumps(payload).encode('utf-8')
+
+    @staticmethod
+    def _load(session, loader, args, queries):
+        if queries is None:
+            return loader(session, args)
+        with count_connection_queries(session.connection(), queries):
+            return loader(session, args)
+
+    async def read(self, loader, args, send, request):
+        try:
+            async with self.sessionmaker() as session:
+                # Reuse the sync query code; I/O happens on the event loop
+                payload = await session.run_sync(self._load, loader, args, request.queries)
+            start = time.perf_counter()
+            if _rows(payload) > SERIALIZE_INLINE_ROWS:
+                body = await asyncio.to_thread(self._encode, payload)
+            else:
+                body = self._encode(payload)
+            request.serialize += time.perf_counter() - start
+            status = 200
+        except ValueError as e:
+            # Bad limit/cursor/fields
+            status, body = 400, self._encode({'error': str(e)})
+        except Exception as e:
+            status, body = 500, self._encode({'error': str(e)})
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('ascii')),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def events(self, scope, receive, send, request):
+        """GET /api/events as in app/routes.py ``stream_events``, on the event loop"""
+        if not streams_enabled():
+            body = self._encode({'error': 'Live updates need a shared event bus (REDIS_URL) with more than one worker'})
+            await send({'type': 'http.response.start', 'status': 503, 'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('ascii')),
+            ]})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+        request.streamed = True
+        config = self.flask_app.config
+        heartbeat = config.get('SSE_HEARTBEAT_SECONDS', 15)
+        max_seconds = config.get('SSE_MAX_SECONDS', 300)
+        headers = dict(scope.get('headers') or [])
+        args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        last_id = headers.get(b'last-event-id', b'').decode('latin-1') or args.get('lastEventId', '')
+
+        loop = asyncio.get_running_loop()
+        bus = get_bus()
+        subscription = bus.subscribe(loop)
+        disconnected = loop.create_task(self._disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+
+            async def emit(text):
+                await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+            await emit('retry: 3000\n\n')
+            if last_id.isdigit():
+                # The Redis backlog is a blocking round trip; keep it off the loop
+                for change in await loop.run_in_executor(None, bus.since, int(last_id)):
+                    await emit(format_sse(change))
+            deadline = loop.time() + max_seconds
+            while not disconnected.done() and loop.time() < deadline:
+                get = loop.create_task(subscription.queue.get())
+                done, _ = await asyncio.wait({get, disconnected}, timeout=heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if get in done:
+                    await emit(format_sse(get.result()))
+                else:
+                    get.cancel()
+                    if not disconnected.done():
+                        await emit(': keep-alive\n\n')
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            bus.unsubscribe(subscription)
+            disconnected.cancel()
+
+    @staticmethod
+    async def _disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(flask_app=None):
+    """Wrap a Flask app (a new one by default) in the async read path"""
+    return AsyncReadApp(flask_app or create_app())
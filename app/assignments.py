@@ -0,0 +1,103 @@
+"""
+Team assignment (project <-> member) in set-based statements.
+
+Assigning or unassigning any number of members to any number of projects is
+one ``INSERT ... SELECT ... ON CONFLICT DO NOTHING`` (or one ``DELETE``) plus
+one aggregate ``UPDATE`` that recomputes the workload of the affected
+members, whatever the batch size. The caller commits once. Member names
+are translated to ids through the member map (app/members.py).
+"""
+
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, literal, select, true, update
+from sqlalchemy.types import DateTime
+
+from app.events import record_change
+from app.members import member_map, write_legacy_names
+from app.models import TeamMember, Project, ProjectTeam
+
+# Workload percentage each project assignment adds, capped at 100
+WORKLOAD_PER_PROJECT = 25
+
+
+def dialect_insert(session):
+    """INSERT construct with ON CONFLICT support for the session's database"""
+    if session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def recompute_workload(session, member_ids):
+    """Set workload from the number of assigned projects; returns {name: workload}"""
+    assigned = (
+        select(func.count(ProjectTeam.id))
+        .where(ProjectTeam.member_id == TeamMember.id)
+        .correlate(TeamMember)
+        .scalar_subquery()
+    )
+    cap = 100 // WORKLOAD_PER_PROJECT
+    stmt = (
+        update(TeamMember)
+        .where(TeamMember.id.in_(member_ids))
+        .values(workload=case((assigned >= cap, 100), else_=assigned * WORKLOAD_PER_PROJECT))
+        .returning(TeamMember.id, TeamMember.name, TeamMember.workload)
+        .execution_options(synchronize_session='fetch')
+    )
+    workloads = {}
+    for row in session.execute(stmt):
+        workloads[row.name] = row.workload
+        record_change(session, 'team_member', row.id)
+    return workloads
+
+
+def assign_members(session, project_ids, member_names):
+    """Assign every member to every project; existing assignments and unknown ids/names are skipped"""
+    names = {member_id: name for name, member_id in member_map.ids(session, member_names).items()}
+    if not names:
+        return {'assigned': [], 'workloads': {}}
+    pairs = (
+        select(Project.id, TeamMember.id, literal(datetime.utcnow(), DateTime))
+        .select_from(Project)
+        .join(TeamMember, true())
+        .where(Project.id.in_(project_ids), TeamMember.id.in_(names))
+    )
+    stmt = (
+        dialect_insert(session)(ProjectTeam)
+        .from_select(['project_id', 'member_id', 'created_at'], pairs)
+        .on_conflict_do_nothing(index_elements=['project_id', 'member_id'])
+        .returning(ProjectTeam.id, ProjectTeam.project_id, ProjectTeam.member_id)
+    )
+    assigned = session.execute(stmt).all()
+    write_legacy_names(session, 'project_team', [row.id for row in assigned])
+    for row in assigned:
+        record_change(session, 'project_team', row.id, 'created', projectId=row.project_id)
+    # A set-based insert: tell differential backups which projects changed
+    from app.backups import touch_projects
+    touch_projects(session, {row.project_id for row in assigned})
+    return {
+        'assigned': [{'project_id': row.project_id, 'member_name': names[row.member_id]} for row in assigned],
+        'workloads': recompute_workload(session, {row.member_id for row in assigned}) if assigned else {},
+    }
+
+
+def unassign_members(session, project_ids, member_names):
+    """Remove every listed member from every listed project"""
+    names = {member_id: name for name, member_id in member_map.ids(session, member_names).items()}
+    if not names:
+        return {'removed': [], 'workloads': {}}
+    stmt = (
+        delete(ProjectTeam)
+        .where(ProjectTeam.project_id.in_(project_ids), ProjectTeam.member_id.in_(names))
+        .returning(ProjectTeam.id, ProjectTeam.project_id, ProjectTeam.member_id)
+        .execution_options(synchronize_session='fetch')
+    )
+    removed = session.execute(stmt).all()
+    for row in removed:
+        record_change(session, 'project_team', row.id, 'deleted', projectId=row.project_id)
+    return {
+        'removed': [{'project_id': row.project_id, 'member_name': names[row.member_id]} for row in removed],
+        'workloads': recompute_workload(session, {row.member_id for row in removed}) if removed else {},
+    }
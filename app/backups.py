@@ -0,0 +1,432 @@
+"""
+Backup chains: a full snapshot followed by differential backups.
+
+``flask backup`` (or ``POST /api/backups``) writes the next file of the
+chain to ``BACKUP_DIR``:
+
+- a **full** backup holds every team member and project tree;
+- a **diff** holds only the members and project trees changed since the
+  previous backup (``updated_at`` after its cutoff), plus tombstones for the
+  ones deleted since.
+
+After ``BACKUP_CHAIN_LENGTH`` diffs the next backup is full again, starting
+a new chain. ``POST /api/backups/<id>/restore`` replays the chain up to that
+backup (the full one, then each diff in order) into one snapshot and
+restores it like ``POST /api/backup``.
+
+Project trees are the unit of change: ``projects.updated_at`` is bumped
+whenever one of its tasks, subtasks, images, links, team or channel rows
+changes, by the session hooks below (ORM flushes and bulk
+``Query.update()``/``delete()``; set-based inserts call ``touch_projects``).
+Deleting projects or team members records a ``Tombstone``; deleting every
+row (a restore) records one with ``row_id`` NULL.
+
+Files are msgpack when ``msgpack`` is installed and JSON otherwise,
+compressed with zstd when ``zstandard`` is installed and zlib otherwise;
+the encoding is stored with each backup. Rows changed within ``CLOCK_SKEW``
+before the previous cutoff are included again, so a change committed late
+by a worker with a slightly different clock isn't missed; replaying a
+chain is idempotent.
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import DateTime, delete, event, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import (Backup, Tombstone, TeamMember, Project, ProjectImage, ProjectLink, ProjectTeam,
+                        ProjectChannel, ProjectApplication, Task, Subtask)
+from app.queries import SNAPSHOT_VERSION, projects_query
+from app.snapshots import image_uploads, replace_snapshot
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Rows changed this long before the previous backup's cutoff are included again
+CLOCK_SKEW = timedelta(seconds=60)
+
+# Backup file layout version
+FORMAT_VERSION = 1
+
+# Deleted rows recorded as tombstones -> entity name
+TOMBSTONED = {Project: 'project', TeamMember: 'team_member'}
+
+# Rows of a project's tree -> their project id column (subtasks go through their task)
+PROJECT_CHILDREN = {
+    Task: Task.project_id,
+    ProjectImage: ProjectImage.project_id,
+    ProjectLink: ProjectLink.project_id,
+    ProjectTeam: ProjectTeam.project_id,
+    ProjectChannel: ProjectChannel.project_id,
+    ProjectApplication: ProjectApplication.project_id,
+}
+
+_backup_dir = None
+_chain_length = 30
+
+
+def init_backups(app):
+    """Configure the backup directory and track project/member changes in every session"""
+    global _backup_dir, _chain_length
+    _backup_dir = app.config.get('BACKUP_DIR') or os.path.join(app.instance_path, 'backups')
+    _chain_length = int(app.config.get('BACKUP_CHAIN_LENGTH', _chain_length))
+    if not event.contains(Session, 'after_flush', _track_flush):
+        event.listen(Session, 'after_flush', _track_flush)
+        event.listen(Session, 'do_orm_execute', _track_bulk_statements)
+        event.listen(Session, 'before_commit', _touch_all_pending)
+        event.listen(Session, 'after_commit', _forget)
+        event.listen(Session, 'after_soft_rollback', _after_rollback)
+
+
+# ============= Encoding =============
+
+def _plain(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not serializable')
+
+
+def default_encoding():
+    return f"{'msgpack' if msgpack is not None else 'json'}+{'zstd' if zstandard is not None else 'zlib'}"
+
+
+def encode(document, encoding=None):
+    """Serialize and compress a backup document; returns (bytes, encoding)"""
+    encoding = encoding or default_encoding()
+    serializer, compression = encoding.split('+')
+    if serializer == 'msgpack':
+        raw = msgpack.packb(document, default=_plain)
+    else:
+        raw = json.dumps(document, default=_plain, separators=(',', ':')).encode('utf-8')
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(raw), encoding
+    return zlib.compress(raw, 9), encoding
+
+
+def decode(data, encoding):
+    serializer, compression = encoding.split('+')
+    if (serializer == 'msgpack' and msgpack is None) or (compression == 'zstd' and zstandard is None):
+        raise RuntimeError(f'Reading {encoding} backups needs the msgpack/zstandard packages')
+    raw = zstandard.ZstdDecompressor().decompressobj().decompress(data) if compression == 'zstd' \
+        else zlib.decompress(data)
+    return msgpack.unpackb(raw) if serializer == 'msgpack' else json.loads(raw)
+
+
+def file_path(backup_id):
+    return os.path.join(_backup_dir, f'backup-{backup_id}.bin')
+
+
+def read_backup(backup):
+    """The decoded document of a stored backup"""
+    with open(file_path(backup.id), 'rb') as f:
+        return decode(f.read(), backup.encoding)
+
+
+# ============= Taking backups =============
+
+def _member_entries(session, since):
+    stmt = select(TeamMember).order_by(TeamMember.id)
+    if since is not None:
+        stmt = stmt.where(TeamMember.updated_at > since)
+    return [{
+        'id': member.id,
+        'name': member.name,
+        'role': member.role,
+        'skills': member.skills,
+        'workload': member.workload,
+        'updated_at': member.updated_at,
+    } for member in session.scalars(stmt)]
+
+
+def _project_entries(session, since):
+    stmt = projects_query().order_by(Project.id)
+    if since is not None:
+        stmt = stmt.where(Project.updated_at > since)
+    return [dict(project.to_dict(), updated_at=project.updated_at) for project in session.scalars(stmt)]
+
+
+def _tombstone_entries(session, since):
+    stmt = select(Tombstone).where(Tombstone.deleted_at > since).order_by(Tombstone.id)
+    return [{'entity': t.entity, 'id': t.row_id, 'deletedAt': t.deleted_at} for t in session.scalars(stmt)]
+
+
+def take_backup(session, full=False, progress=None):
+    """Write the next backup: a diff against the previous one, or a full backup to start a new chain.
+
+    A full backup is taken when ``full`` is set, when there is no backup yet
+    or once the current chain holds ``BACKUP_CHAIN_LENGTH`` diffs. Returns
+    the committed Backup.
+    """
+    taken_at = datetime.utcnow()
+    last = session.scalars(select(Backup).order_by(Backup.id.desc()).limit(1)).first()
+    base_id = None if last is None else (last.base_id or last.id)
+    if not full and last is not None:
+        diffs = session.scalar(select(func.count()).select_from(Backup).where(Backup.base_id == base_id))
+        full = diffs >= _chain_length
+    since = None if full or last is None else last.taken_at - CLOCK_SKEW
+    if progress is not None:
+        progress(0, 3)
+
+    document = {
+        'version': FORMAT_VERSION,
+        'snapshotVersion': SNAPSHOT_VERSION,
+        'kind': 'diff' if since is not None else 'full',
+        'since': since,
+        'takenAt': taken_at,
+        'teamMembers': _member_entries(session, since),
+        'projects': _project_entries(session, since),
+        'deleted': _tombstone_entries(session, since) if since is not None else [],
+    }
+    if progress is not None:
+        progress(1, 3)
+    data, encoding = encode(document)
+    if progress is not None:
+        progress(2, 3)
+
+    backup = Backup(kind=document['kind'], base_id=base_id if since is not None else None, since=since,
+                    taken_at=taken_at, encoding=encoding, size=len(data), sha256=hashlib.sha256(data).hexdigest(),
+                    team_members=len(document['teamMembers']), projects=len(document['projects']),
+                    deleted=len(document['deleted']))
+    session.add(backup)
+    session.flush()
+    os.makedirs(_backup_dir, exist_ok=True)
+    path = file_path(backup.id)
+    try:
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+        session.commit()
+    except BaseException:
+        session.rollback()
+        for leftover in (path, path + '.tmp'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+    if progress is not None:
+        progress(3, 3)
+    return backup
+
+
+# ============= Restoring =============
+
+def chain(session, backup_id):
+    """Backups to replay for ``backup_id``: its full backup, then each diff up to it (None if unknown)"""
+    target = session.get(Backup, backup_id)
+    if target is None:
+        return None
+    base_id = target.base_id or target.id
+    return session.scalars(
+        select(Backup).where(or_(Backup.id == base_id, Backup.base_id == base_id), Backup.id <= target.id)
+        .order_by(Backup.id)
+    ).all()
+
+
+def _when(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _rename_member(projects, old, new):
+    """Replace (or with ``new`` None, drop) a member name throughout the project trees"""
+    for project in projects.values():
+        project['team'] = [new if name == old else name for name in project.get('team', []) if new or name != old]
+        for task in project.get('tasks', []):
+            for item in [task, *task.get('subtasks', [])]:
+                if item.get('assignee') == old:
+                    item['assignee'] = new
+
+
+def apply_backup(members, projects, document):
+    """Replay one backup document onto ``members``/``projects`` ({id: entry}), in place"""
+    for tombstone in document.get('deleted', []):
+        rows = members if tombstone['entity'] == 'team_member' else projects
+        deleted_at = _when(tombstone['deletedAt'])
+        if tombstone['id'] is None:
+            # Every row was deleted (a restore); rows written afterwards are in this or a later backup
+            gone = [key for key, entry in rows.items() if _when(entry['updated_at']) < deleted_at]
+        else:
+            entry = rows.get(tombstone['id'])
+            # An id reused after the delete belongs to a newer row
+            gone = [tombstone['id']] if entry is not None and _when(entry['updated_at']) <= deleted_at else []
+        for key in gone:
+            entry = rows.pop(key)
+            if rows is members:
+                _rename_member(projects, entry['name'], None)
+    for member in document.get('teamMembers', []):
+        previous = members.get(member['id'])
+        if previous is not None and previous['name'] != member['name']:
+            _rename_member(projects, previous['name'], member['name'])
+        members[member['id']] = member
+    for project in document.get('projects', []):
+        projects[project['id']] = project
+
+
+def materialize(session, backup_id, progress=None):
+    """The dataset as of ``backup_id``, in the snapshot (``POST /api/backup``) format; None if unknown"""
+    backups = chain(session, backup_id)
+    if backups is None:
+        return None
+    members, projects = {}, {}
+    for n, backup in enumerate(backups):
+        apply_backup(members, projects, read_backup(backup))
+        if progress is not None:
+            progress(n + 1, len(backups))
+    return {
+        'teamMembers': [members[key] for key in sorted(members)],
+        'projects': [projects[key] for key in sorted(projects)],
+        'exportDate': backups[-1].taken_at.isoformat(),
+        'version': SNAPSHOT_VERSION,
+    }
+
+
+def restore_backup(session, backup_id, progress=None):
+    """Replace every team member and project with the dataset as of ``backup_id``"""
+    data = materialize(session, backup_id)
+    if data is None:
+        raise ValueError(f'Backup {backup_id} not found')
+    result = replace_snapshot(session, data, 'restore', progress)
+    return {**result, 'backup_id': backup_id}
+
+
+def referenced_uploads(session):
+    """Ids of the uploads images in stored backups point at (restoring one points them there again)"""
+    upload_ids = set()
+    for backup in session.scalars(select(Backup).order_by(Backup.id)):
+        if os.path.exists(file_path(backup.id)):
+            upload_ids |= image_uploads(read_backup(backup).get('projects', []))
+    return upload_ids
+
+
+def prune_backups(session, keep_chains=2):
+    """Delete all but the newest ``keep_chains`` chains (rows and files) and the tombstones no chain needs.
+
+    Returns the number of backups removed.
+    """
+    bases = select(Backup.id).where(Backup.kind == 'full').order_by(Backup.id.desc()).offset(keep_chains)
+    expired = session.scalars(
+        select(Backup.id).where(or_(Backup.id.in_(bases), Backup.base_id.in_(bases)))
+    ).all()
+    if expired:
+        session.execute(delete(Backup).where(Backup.id.in_(expired)))
+    # Diffs after the oldest remaining backup only look this far back
+    oldest = session.scalar(select(Backup.taken_at).order_by(Backup.id).limit(1))
+    if oldest is not None:
+        session.execute(delete(Tombstone).where(Tombstone.deleted_at < oldest - CLOCK_SKEW))
+    session.commit()
+    for backup_id in expired:
+        if os.path.exists(file_path(backup_id)):
+            os.remove(file_path(backup_id))
+    return len(expired)
+
+
+# ============= Change tracking =============
+
+def _touch(session, *criteria):
+    table = Project.__table__
+    session.connection().execute(update(table).where(or_(*criteria)).values(updated_at=datetime.utcnow()))
+
+
+def touch_projects(session, project_ids, task_ids=()):
+    """Mark projects (and the projects of ``task_ids``) changed for the next differential backup.
+
+    Needed after set-based inserts into a project's tree, which the session
+    hooks can't attribute to a project. Projects already stamped in this
+    transaction are skipped.
+    """
+    stamped = session.info.setdefault('backup_stamped', set())
+    project_ids, task_ids = set(project_ids) - stamped - {None}, set(task_ids) - {None}
+    stamped |= project_ids
+    criteria = []
+    if project_ids:
+        criteria.append(Project.id.in_(project_ids))
+    if task_ids:
+        criteria.append(Project.id.in_(select(Task.project_id).where(Task.id.in_(task_ids))))
+    if criteria:
+        _touch(session, *criteria)
+
+
+def _track_flush(session, flush_context):
+    project_ids, task_ids, tombstones = set(), set(), []
+    for objects, modified_only in ((session.new, False), (session.dirty, True), (session.deleted, False)):
+        for obj in objects:
+            model = type(obj)
+            if model is not Subtask and model not in PROJECT_CHILDREN:
+                continue
+            if modified_only and not session.is_modified(obj, include_collections=False):
+                continue
+            if model is not Subtask:
+                project_ids.add(obj.project_id)
+            elif obj.__dict__.get('task') is not None and obj.task.project_id is not None:
+                project_ids.add(obj.task.project_id)
+            else:
+                task_ids.add(obj.task_id)
+    # New, deleted and column-changed projects need no extra stamp
+    stamped = session.info.setdefault('backup_stamped', set())
+    stamped |= {obj.id for obj in session.new if isinstance(obj, Project)}
+    stamped |= {obj.id for obj in session.deleted if isinstance(obj, Project)}
+    stamped |= {obj.id for obj in session.dirty
+                if isinstance(obj, Project) and session.is_modified(obj, include_collections=False)}
+    touch_projects(session, project_ids, task_ids)
+
+    now = datetime.utcnow()
+    for obj in session.deleted:
+        if type(obj) in TOMBSTONED:
+            tombstones.append({'entity': TOMBSTONED[type(obj)], 'row_id': obj.id, 'deleted_at': now})
+    if tombstones:
+        session.connection().execute(insert(Tombstone.__table__), tombstones)
+
+
+def _track_bulk_statements(orm_execute_state):
+    if not (orm_execute_state.is_delete or orm_execute_state.is_update):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    model = mapper.class_
+    session = orm_execute_state.session
+    whereclause = orm_execute_state.statement.whereclause
+
+    if orm_execute_state.is_delete and model in TOMBSTONED:
+        table, now = Tombstone.__table__, datetime.utcnow()
+        if whereclause is None:
+            session.connection().execute(insert(table).values(entity=TOMBSTONED[model], row_id=None, deleted_at=now))
+            session.info['backup_wiped'] = True
+        else:
+            rows = select(literal(TOMBSTONED[model]), model.id, literal(now, DateTime)).where(whereclause)
+            session.connection().execute(insert(table).from_select(['entity', 'row_id', 'deleted_at'], rows))
+    elif model is Subtask or model in PROJECT_CHILDREN:
+        if whereclause is None:
+            # Unfiltered (a restore clearing tables): stamp every remaining project once, at commit
+            session.info['backup_touch_all'] = True
+        elif model is Subtask:
+            tasks = select(Subtask.task_id).where(whereclause)
+            _touch(session, Project.id.in_(select(Task.project_id).where(Task.id.in_(tasks))))
+        else:
+            _touch(session, Project.id.in_(select(PROJECT_CHILDREN[model]).where(whereclause)))
+
+
+def _touch_all_pending(session):
+    touch_all = session.info.pop('backup_touch_all', False)
+    # After every project was deleted there is nothing left to stamp
+    if touch_all and not session.info.pop('backup_wiped', False):
+        _touch(session, Project.id.isnot(None))
+    session.info.pop('backup_wiped', None)
+
+
+def _forget(session):
+    session.info.pop('backup_stamped', None)
+
+
+def _after_rollback(session, previous_transaction):
+    for key in ('backup_touch_all', 'backup_wiped', 'backup_stamped'):
+        session.info.pop(key, None)
@@ -0,0 +1,404 @@
+"""
+Incrementally maintained row counters for ``/api/stats``.
+
+``entity_counters`` holds one row per counter. Every writer touches the
+same few rows, so they are not updated inside the writer's transaction
+(where their row locks would be held until commit and serialize all
+writers); the transaction only collects deltas:
+
+* ORM inserts/deletes (and ``Task.completed`` flips) are collected in
+  ``after_flush``. Children an ORM delete leaves to ``ON DELETE CASCADE``
+  (unloaded ``passive_deletes`` relationships) are counted just before the
+  parent's DELETE.
+* Bulk ``Query.delete()`` with a WHERE clause counts the matching rows (and
+  the child rows the database will cascade-delete with them) first and
+  subtracts them. Statements whose effect can't be known up front
+  (unfiltered deletes, bulk updates/inserts) mark the affected counters
+  stale instead.
+
+Once the transaction has committed and given its connection back, the
+deltas are applied as one ``UPDATE ... SET value = value + :delta`` batch
+and stale counters are recounted, in a short transaction of their own.
+A rolled back transaction leaves nothing to apply. If that second
+transaction fails (or the process dies in between) the counters drift:
+``reconcile_counters()`` recounts everything with ``COUNT(*)`` and corrects
+it; run it periodically with ``flask reconcile-counters``. Reads go
+through a short per-process cache that is dropped whenever this process
+applies counted changes.
+
+The ``data_version`` row is bumped once by every transaction that changes
+application data, right after it commits, so caches of derived output
+(app/reports.py) can be keyed on it. ``member_version`` is bumped by every
+flush or bulk statement that adds, deletes or renames team members; the
+member map (app/members.py) relies on it changing atomically with the
+members, so that bump (with the deltas collected so far) is still written
+inside the transaction. Member changes are rare enough that its lock
+doesn't serialize ordinary writers.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, event, func, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Mapper, Session
+
+from app.events import ENTITY_TYPES
+from app.members import changes_member_names
+from app.metrics import record_cache
+from app.models import EntityCounter, User, Post, TeamMember, Project, Task, Subtask
+
+
+@dataclass
+class Counter:
+    """Rows of `model` (matching `criteria` / `matches` when given)"""
+    model: type
+    matches: Optional[Callable[[object], bool]] = None
+    criteria: Optional[Callable[[], object]] = None
+
+    def count_stmt(self, whereclause=None):
+        stmt = select(func.count()).select_from(self.model)
+        if self.criteria is not None:
+            stmt = stmt.where(self.criteria())
+        if whereclause is not None:
+            stmt = stmt.where(whereclause)
+        return stmt
+
+
+COUNTERS = {
+    'users': Counter(User),
+    'posts': Counter(Post),
+    'team_members': Counter(TeamMember),
+    'projects': Counter(Project),
+    'tasks_open': Counter(Task, lambda task: not task.completed, lambda: Task.completed.isnot(True)),
+    'tasks_completed': Counter(Task, lambda task: bool(task.completed), lambda: Task.completed.is_(True)),
+    'subtasks': Counter(Subtask),
+}
+
+# Bumped by every transaction that changes application data
+DATA_VERSION = 'data_version'
+# Bumped whenever team member ids or names change
+MEMBER_VERSION = 'member_version'
+VERSIONS = (DATA_VERSION, MEMBER_VERSION)
+
+_cache_lock = threading.Lock()
+_cache = {'values': None, 'expires': 0.0}
+_cache_seconds = 5.0
+
+
+def _count(executor, counters, where=None):
+    """{name: rows} for several counters in a single statement"""
+    if not counters:
+        return {}
+    columns = [counter.count_stmt(where).scalar_subquery().label(name) for name, counter in counters.items()]
+    return dict(executor.execute(select(*columns)).one()._mapping)
+
+
+def _counters_for(model):
+    return {name: c for name, c in COUNTERS.items() if c.model is model}
+
+
+def _cascade_children(table):
+    """(child table, foreign key) pairs the database deletes along with rows of `table`"""
+    return [
+        (other, fk)
+        for other in table.metadata.tables.values() if other is not table
+        for fk in other.foreign_keys
+        if fk.column.table is table and (fk.ondelete or '').upper() == 'CASCADE'
+    ]
+
+
+def _cascade_tables(table):
+    found = set()
+    for child, _ in _cascade_children(table):
+        found.add(child)
+        found |= _cascade_tables(child)
+    return found
+
+
+def _counted_tables():
+    return {c.model.__table__ for c in COUNTERS.values()}
+
+
+def _stale_for_tables(tables):
+    return {name for name, c in COUNTERS.items() if c.model.__table__ in tables}
+
+
+def _db_enforces_cascades(connection):
+    """SQLite only honours ON DELETE CASCADE with PRAGMA foreign_keys=ON"""
+    if connection.dialect.name != 'sqlite':
+        return True
+    if 'foreign_keys' not in connection.info:
+        connection.info['foreign_keys'] = bool(connection.exec_driver_sql('PRAGMA foreign_keys').scalar())
+    return connection.info['foreign_keys']
+
+
+def _cascaded_counts(connection, table, parent_keys, children=None):
+    """{counter: rows} the database removes from child tables when rows `parent_keys` of `table` are deleted
+
+    ``children`` limits the first level to those child tables.
+    """
+    counts = {}
+    for child, fk in _cascade_children(table):
+        if children is not None and child not in children:
+            continue
+        if not ({child} | _cascade_tables(child)) & _counted_tables():
+            continue
+        child_counters = {name: c for name, c in COUNTERS.items() if c.model.__table__ is child}
+        for name, rows in _count(connection, child_counters, fk.parent.in_(parent_keys)).items():
+            counts[name] = counts.get(name, 0) + rows
+        child_keys = select(*child.primary_key.columns).where(fk.parent.in_(parent_keys))
+        for name, rows in _cascaded_counts(connection, child, child_keys).items():
+            counts[name] = counts.get(name, 0) + rows
+    return counts
+
+
+# ============= Session hooks =============
+
+def _is_data(obj):
+    return getattr(obj, '__tablename__', None) in ENTITY_TYPES
+
+
+def _bump_data_version(session):
+    """Count this transaction once in the data version"""
+    if not session.info.get('data_version_bumped'):
+        session.info['data_version_bumped'] = True
+        deltas = session.info.setdefault('counter_deltas', {})
+        deltas[DATA_VERSION] = deltas.get(DATA_VERSION, 0) + 1
+
+
+def _member_changed(session):
+    """Write a member version bump now: the member map needs it atomic with the members.
+
+    Deltas collected so far go in the same batch; this transaction holds the
+    counter locks either way.
+    """
+    deltas = session.info.setdefault('counter_deltas', {})
+    pending = {name: delta for name, delta in deltas.items() if delta}
+    pending[MEMBER_VERSION] = pending.get(MEMBER_VERSION, 0) + 1
+    deltas.clear()
+    _write_deltas(session.connection(), pending)
+    session.info['counters_changed'] = True
+
+
+def _collect_deltas(session, flush_context):
+    if not session.info.get('data_version_bumped') and (
+        any(_is_data(obj) for obj in session.new) or any(_is_data(obj) for obj in session.deleted)
+        or any(_is_data(obj) and session.is_modified(obj, include_collections=False) for obj in session.dirty)
+    ):
+        _bump_data_version(session)
+    deltas = session.info.setdefault('counter_deltas', {})
+    for objects, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objects:
+            for name, counter in _counters_for(type(obj)).items():
+                if counter.matches is None or counter.matches(obj):
+                    deltas[name] = deltas.get(name, 0) + sign
+    # An open task marked completed (or reopened) moves between the two task counters
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            history = inspect(obj).attrs.completed.history
+            if history.has_changes() and history.deleted:
+                was, now = bool(history.deleted[0]), bool(obj.completed)
+                if was != now:
+                    deltas['tasks_completed'] = deltas.get('tasks_completed', 0) + (1 if now else -1)
+                    deltas['tasks_open'] = deltas.get('tasks_open', 0) + (-1 if now else 1)
+    if any(isinstance(obj, TeamMember) for obj in session.new) or any(
+        isinstance(obj, TeamMember) for obj in session.deleted
+    ) or any(isinstance(obj, TeamMember) and inspect(obj).attrs.name.history.has_changes() for obj in session.dirty):
+        _member_changed(session)
+
+
+def _write_deltas(connection, deltas):
+    """Apply {counter: delta} with one executemany UPDATE, in name order so writers lock rows alike"""
+    table = EntityCounter.__table__
+    stmt = (
+        update(table)
+        .where(table.c.name == bindparam('counter_name'))
+        .values(value=table.c.value + bindparam('delta'), updated_at=datetime.utcnow())
+    )
+    connection.execute(stmt, [{'counter_name': n, 'delta': d} for n, d in sorted(deltas.items())])
+
+
+def _track_bulk_statements(orm_execute_state):
+    if not (orm_execute_state.is_delete or orm_execute_state.is_update or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    session = orm_execute_state.session
+    model = mapper.class_
+    table = mapper.local_table
+    if table.name in ENTITY_TYPES:
+        _bump_data_version(session)
+    if changes_member_names(orm_execute_state):
+        _member_changed(session)
+    counters = _counters_for(model)
+    stale = session.info.setdefault('counters_stale', set())
+
+    if orm_execute_state.is_delete:
+        whereclause = orm_execute_state.statement.whereclause
+        if whereclause is None:
+            stale |= set(counters) | _stale_for_tables(_cascade_tables(table))
+            return
+        if session.autoflush:
+            # Count after pending rows are written, as the DELETE will see them
+            session.flush()
+        connection = session.connection()
+        deltas = session.info.setdefault('counter_deltas', {})
+        for name, matched in _count(connection, counters, whereclause).items():
+            deltas[name] = deltas.get(name, 0) - matched
+        if _cascade_tables(table) & _counted_tables() and _db_enforces_cascades(connection):
+            keys = select(*table.primary_key.columns).where(whereclause)
+            for name, rows in _cascaded_counts(connection, table, keys).items():
+                deltas[name] = deltas.get(name, 0) - rows
+    elif orm_execute_state.is_insert or any(c.criteria is not None for c in counters.values()):
+        stale |= set(counters)
+
+
+def _count_passive_cascades(mapper, connection, target):
+    """Before an ORM DELETE: subtract the rows the database will cascade-delete with `target`.
+
+    Relationships with ``passive_deletes`` that were never loaded are left to
+    ON DELETE CASCADE, so those child rows never pass through the session.
+    Loaded children are deleted (and counted) by the flush itself, before
+    their parent.
+    """
+    state = inspect(target)
+    children = {
+        rel.mapper.local_table for rel in mapper.relationships
+        if rel.passive_deletes and rel.cascade.delete and rel.key not in state.dict
+    }
+    if not any(({child} | _cascade_tables(child)) & _counted_tables() for child in children):
+        return
+    if not _db_enforces_cascades(connection):
+        return
+    deltas = state.session.info.setdefault('counter_deltas', {})
+    for name, rows in _cascaded_counts(connection, mapper.local_table, list(state.identity), children).items():
+        deltas[name] = deltas.get(name, 0) - rows
+
+
+def _after_commit(session):
+    """Keep the committed deltas and stale counters until the connection is given back"""
+    deltas = {name: delta for name, delta in (session.info.pop('counter_deltas', None) or {}).items() if delta}
+    stale = session.info.pop('counters_stale', None) or set()
+    session.info.pop('data_version_bumped', None)
+    if deltas or stale:
+        session.info['counters_committed'] = (session.get_bind(), deltas, stale)
+    elif session.info.pop('counters_changed', False):
+        invalidate_cache()
+
+
+def _apply_committed(session, transaction):
+    """After the outermost transaction ends: apply what it committed in a short transaction"""
+    if transaction.parent is not None or 'counters_committed' not in session.info:
+        return
+    bind, deltas, stale = session.info.pop('counters_committed')
+    session.info.pop('counters_changed', None)
+    try:
+        with Session(bind=bind) as counters:
+            # A recount already includes the committed change
+            pending = {name: delta for name, delta in deltas.items() if name not in stale}
+            if pending:
+                _write_deltas(counters.connection(), pending)
+            if stale:
+                reconcile_counters(counters, stale, commit=False)
+            counters.commit()
+    except Exception as e:
+        print(f"⚠ Warning: counters not updated, run `flask reconcile-counters` - {e}")
+    finally:
+        invalidate_cache()
+
+
+def _after_rollback(session, previous_transaction):
+    for key in ('counter_deltas', 'counters_stale', 'counters_changed', 'data_version_bumped'):
+        session.info.pop(key, None)
+
+
+def init_counters(app):
+    """Hook counter maintenance into every session"""
+    global _cache_seconds
+    _cache_seconds = float(app.config.get('STATS_CACHE_SECONDS', 5))
+    if not event.contains(Session, 'after_flush', _collect_deltas):
+        event.listen(Session, 'after_flush', _collect_deltas)
+        event.listen(Session, 'do_orm_execute', _track_bulk_statements)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_transaction_end', _apply_committed)
+        event.listen(Session, 'after_soft_rollback', _after_rollback)
+        event.listen(Mapper, 'before_delete', _count_passive_cascades)
+
+
+# ============= Reads and reconciliation =============
+
+def invalidate_cache():
+    with _cache_lock:
+        _cache['values'] = None
+
+
+def reconcile_counters(session, names=None, commit=True):
+    """Recount counters with COUNT(*) and fix the stored values; returns {name: drift}"""
+    names = sorted(set(names or COUNTERS) & set(COUNTERS))
+    # Lock existing counter rows first so concurrent increments queue behind the recount
+    stored = {
+        row.name: row for row in session.scalars(
+            select(EntityCounter).where(EntityCounter.name.in_(names)).with_for_update()
+        )
+    }
+    drift = {}
+    for name, actual in _count(session, {name: COUNTERS[name] for name in names}).items():
+        row = stored.get(name)
+        if row is None:
+            session.add(EntityCounter(name=name, value=actual))
+            drift[name] = actual
+        elif row.value != actual:
+            drift[name] = actual - row.value
+            row.value = actual
+    if commit:
+        _ensure_versions(session)
+        session.commit()
+        invalidate_cache()
+    return drift
+
+
+def _ensure_versions(session):
+    for name in VERSIONS:
+        if session.get(EntityCounter, name) is None:
+            session.add(EntityCounter(name=name, value=1))
+
+
+def data_version(session):
+    """Current data version (changes whenever any application data is committed)"""
+    stmt = select(EntityCounter.value).where(EntityCounter.name == DATA_VERSION)
+    version = session.execute(stmt).scalar()
+    if version is None:
+        # Databases created before the row existed
+        try:
+            _ensure_versions(session)
+            session.commit()
+        except IntegrityError:
+            session.rollback()  # created concurrently
+        version = session.execute(stmt).scalar()
+    return version
+
+
+def get_counters(session):
+    """{name: value} for every counter, from the cache when fresh"""
+    now = time.monotonic()
+    with _cache_lock:
+        if _cache['values'] is not None and now < _cache['expires']:
+            record_cache('stats', True)
+            return dict(_cache['values'])
+    record_cache('stats', False)
+
+    values = dict(session.execute(select(EntityCounter.name, EntityCounter.value)).all())
+    if set(COUNTERS) - set(values):
+        # First read on this database: build the missing counters
+        reconcile_counters(session, set(COUNTERS) - set(values))
+        values = dict(session.execute(select(EntityCounter.name, EntityCounter.value)).all())
+
+    with _cache_lock:
+        _cache['values'] = values
+        _cache['expires'] = now + _cache_seconds
+    return dict(values)
@@ -0,0 +1,189 @@
+"""
+Synthetic dataset generator for benchmarks and local testing.
+
+Builds a realistic resource-manager graph (team members, projects with
+tasks, subtasks, images, links, team assignments, channels and applications,
+plus users and their posts)
+directly through the models, at a configurable scale and with a fixed seed
+so runs are reproducible.
+"""
+
+import base64
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from app.models import TeamMember, Project, ProjectTeam, ProjectImage, ProjectLink, Task, Subtask, User, Post
+from app.ordering import ranked
+
+ROLES = ['Developer', 'Senior Developer', 'QA Engineer', 'DevOps Engineer', 'Business Analyst',
+         'Project Manager', 'UX Designer', 'Data Engineer', 'Security Engineer', 'Architect']
+SKILLS = ['python', 'javascript', 'sql', 'postgres', 'docker', 'kubernetes', 'react', 'flask',
+          'testing', 'aws', 'gcp', 'linux', 'networking', 'figma', 'java', 'go']
+STATUSES = ['planning', 'active', 'active', 'active', 'on-hold', 'completed', 'cancelled']
+CHANNELS = ['Web', 'Mobile App', 'LINE', 'Branch', 'Call Center', 'Partner API', 'Kiosk', 'Email']
+APPLICATIONS = ['CRM', 'ERP', 'HRIS', 'Core Banking', 'Data Warehouse', 'Portal', 'Payment Gateway',
+                'Loyalty', 'Ticketing', 'Document Management']
+VERBS = ['Design', 'Implement', 'Review', 'Test', 'Deploy', 'Migrate', 'Document', 'Refactor',
+         'Integrate', 'Monitor']
+NOUNS = ['login flow', 'reporting module', 'API gateway', 'database schema', 'CI pipeline',
+         'notification service', 'search index', 'user onboarding', 'audit log', 'billing export']
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+         'incididunt ut labore et dolore magna aliqua').split()
+
+
+@dataclass
+class Scale:
+    """Dataset size knobs"""
+    members: int = 20
+    projects: int = 50
+    tasks_per_project: int = 10
+    subtasks_per_task: int = 3
+    images_per_project: int = 1
+    image_bytes: int = 20000
+    links_per_project: int = 2
+    team_per_project: int = 3
+    channels: int = 5
+    applications: int = 6
+    minutes_words: int = 150
+    users: int = 20
+    posts: int = 100
+
+    @classmethod
+    def preset(cls, name):
+        return PRESETS[name]
+
+
+PRESETS = {
+    'tiny': Scale(members=5, projects=5, tasks_per_project=3, subtasks_per_task=2, image_bytes=2000,
+                  users=3, posts=10),
+    'small': Scale(),
+    'medium': Scale(members=60, projects=300, tasks_per_project=15, subtasks_per_task=4,
+                    users=100, posts=1000),
+    'large': Scale(members=200, projects=2000, tasks_per_project=20, subtasks_per_task=5,
+                   images_per_project=2, image_bytes=60000, users=500, posts=10000),
+}
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def _image_data(rng, size):
+    """Fake PNG data URL of roughly `size` bytes once decoded"""
+    payload = b'\x89PNG\r\n\x1a\n' + rng.randbytes(max(size - 8, 0))
+    return 'data:image/png;base64,' + base64.b64encode(payload).decode('ascii')
+
+
+def generate_dataset(session, scale=None, seed=42, commit=True):
+    """Insert a synthetic dataset through the ORM and return row counts"""
+    scale = scale or Scale()
+    rng = random.Random(seed)
+    today = date.today()
+    channels = CHANNELS[:max(scale.channels, 0)]
+    applications = APPLICATIONS[:max(scale.applications, 0)]
+
+    members = [
+        TeamMember(
+            name=f'{rng.choice(ROLES).split()[-1]} {i:04d}',
+            role=rng.choice(ROLES),
+            skills=rng.sample(SKILLS, k=rng.randint(2, 5)),
+            workload=0
+        )
+        for i in range(scale.members)
+    ]
+    session.add_all(members)
+    session.flush()
+    names = [m.name for m in members]
+    ids = {m.name: m.id for m in members}
+
+    counts = {'team_members': len(members), 'projects': 0, 'tasks': 0, 'subtasks': 0,
+              'images': 0, 'links': 0, 'project_team': 0, 'project_channels': 0, 'project_applications': 0}
+    assignments = {name: 0 for name in names}
+
+    for p in range(scale.projects):
+        created = datetime.utcnow() - timedelta(days=rng.randint(0, 720))
+        project = Project(
+            name=f'{rng.choice(APPLICATIONS) if applications else "Project"} {rng.choice(NOUNS).title()} {p:05d}',
+            description=_sentence(rng, 30),
+            status=rng.choice(STATUSES),
+            starred=rng.random() < 0.1,
+            meeting_minutes=_sentence(rng, scale.minutes_words) if scale.minutes_words else '',
+            channels=rng.sample(channels, k=rng.randint(0, min(3, len(channels)))),
+            applications=rng.sample(applications, k=rng.randint(0, min(2, len(applications)))),
+            delivery_date=today + timedelta(days=rng.randint(-180, 365)),
+            created_at=created
+        )
+        session.add(project)
+        session.flush()
+        counts['projects'] += 1
+        counts['project_channels'] += len(project.channel_links)
+        counts['project_applications'] += len(project.application_links)
+
+        team = rng.sample(names, k=min(scale.team_per_project, len(names)))
+        for name in team:
+            session.add(ProjectTeam(project_id=project.id, member_id=ids[name]))
+            assignments[name] += 1
+        counts['project_team'] += len(team)
+
+        session.add_all(ranked([
+            ProjectImage(project_id=project.id, image_data=_image_data(rng, scale.image_bytes))
+            for _ in range(scale.images_per_project)
+        ]))
+        counts['images'] += scale.images_per_project
+
+        for i in range(scale.links_per_project):
+            session.add(ProjectLink(project_id=project.id, url=f'https://wiki.example.com/p/{project.id}/{i}',
+                                    label=rng.choice(['Spec', 'Design', 'Runbook', 'Dashboard'])))
+        counts['links'] += scale.links_per_project
+
+        tasks = []
+        for _ in range(scale.tasks_per_project):
+            start = today + timedelta(days=rng.randint(-90, 90))
+            tasks.append(Task(
+                project_id=project.id,
+                text=f'{rng.choice(VERBS)} {rng.choice(NOUNS)}',
+                completed=rng.random() < 0.4,
+                start_date=start,
+                end_date=start + timedelta(days=rng.randint(1, 30)),
+                assignee_id=ids[rng.choice(team)] if team and rng.random() < 0.85 else None
+            ))
+        session.add_all(ranked(tasks))
+        session.flush()
+        counts['tasks'] += len(tasks)
+
+        for task in tasks:
+            session.add_all(ranked([
+                Subtask(
+                    task_id=task.id,
+                    text=f'{rng.choice(VERBS)} {rng.choice(NOUNS)}',
+                    completed=rng.random() < 0.5,
+                    assignee_id=ids[rng.choice(team)] if team and rng.random() < 0.6 else None
+                )
+                for _ in range(scale.subtasks_per_task)
+            ]))
+        counts['subtasks'] += len(tasks) * scale.subtasks_per_task
+
+    # Same workload rule as the team assignment routes
+    for member in members:
+        member.workload = min(assignments[member.name] * 25, 100)
+
+    users = [User(username=f'user{i:04d}', email=f'user{i:04d}@example.com') for i in range(scale.users)]
+    session.add_all(users)
+    session.add_all([
+        Post(
+            title=f'{rng.choice(VERBS)} the {rng.choice(NOUNS)}',
+            content=_sentence(rng, 60),
+            author=rng.choice(users) if users else None,
+            created_at=datetime.utcnow() - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        )
+        for _ in range(scale.posts)
+    ])
+    counts['users'] = len(users)
+    counts['posts'] = scale.posts
+
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return counts
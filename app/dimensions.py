@@ -0,0 +1,101 @@
+"""
+Channel and application dimensions.
+
+A project's channels and applications are rows in the ``project_channels``
+and ``project_applications`` junction tables (``Project.channels`` and
+``Project.applications`` read and write them as plain lists of names), each
+referencing a ``channels``/``applications`` row by name. Both junctions are
+indexed by (name, project), so "projects in channel X" is an index range
+scan, and the distinct channel/application lists with their project counts
+come from the junctions instead of a scan over every project.
+
+Dimension rows are created on demand: before each flush, names used by new
+junction rows are inserted with ``ON CONFLICT DO NOTHING`` in one statement
+per dimension.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.assignments import dialect_insert
+from app.models import Application, Channel, Project, ProjectApplication, ProjectChannel
+
+
+class Dimension:
+    """A project dimension: its table, junction model and the junction's name column"""
+
+    def __init__(self, model, link, column, empty_label):
+        self.model = model
+        self.link = link
+        self.column = column
+        # Filter value matching projects without any entry (as in the timeline filters)
+        self.empty_label = empty_label
+
+    @property
+    def name_column(self):
+        return getattr(self.link, self.column)
+
+
+DIMENSIONS = {
+    'channel': Dimension(Channel, ProjectChannel, 'channel_name', 'No Channel'),
+    'application': Dimension(Application, ProjectApplication, 'application_name', 'No Application'),
+}
+
+
+def _ensure_dimension_rows(session, flush_context, instances):
+    for dimension in DIMENSIONS.values():
+        names = {getattr(obj, dimension.column) for obj in session.new if isinstance(obj, dimension.link)}
+        if not names:
+            continue
+        now = datetime.utcnow()
+        stmt = (
+            dialect_insert(session)(dimension.model.__table__)
+            .values([{'name': name, 'created_at': now} for name in sorted(names)])
+            .on_conflict_do_nothing(index_elements=['name'])
+        )
+        session.connection().execute(stmt)
+
+
+def init_dimensions(app):
+    """Create missing channel/application rows whenever a session flushes new project links"""
+    if not event.contains(Session, 'before_flush', _ensure_dimension_rows):
+        event.listen(Session, 'before_flush', _ensure_dimension_rows)
+
+
+def project_filter(kind, value):
+    """WHERE clause on Project for one dimension value (its empty label: projects without any)"""
+    dimension = DIMENSIONS[kind]
+    if value == dimension.empty_label:
+        return ~select(dimension.link.id).where(dimension.link.project_id == Project.id).exists()
+    return Project.id.in_(select(dimension.link.project_id).where(dimension.name_column == value))
+
+
+def project_filters(args):
+    """WHERE clauses for the ``channel``/``application`` query parameters"""
+    return [project_filter(kind, args[kind]) for kind in DIMENSIONS if args.get(kind)]
+
+
+def dimension_listing(session, kind):
+    """GET /api/channels, /api/applications: names in use with their project counts"""
+    dimension = DIMENSIONS[kind]
+    rows = session.execute(
+        select(dimension.name_column, func.count().label('projects'))
+        .group_by(dimension.name_column)
+        .order_by(dimension.name_column)
+    )
+    return [{'name': name, 'projectCount': count} for name, count in rows]
+
+
+def names_by_project(session, kind, project_ids=None):
+    """{project id: [names in order]} for one dimension"""
+    dimension = DIMENSIONS[kind]
+    stmt = select(dimension.link.project_id, dimension.name_column).order_by(
+        dimension.link.project_id, dimension.link.position)
+    if project_ids is not None:
+        stmt = stmt.where(dimension.link.project_id.in_(project_ids))
+    result = {}
+    for project_id, name in session.execute(stmt):
+        result.setdefault(project_id, []).append(name)
+    return result
@@ -0,0 +1,316 @@
+"""
+Change notification bus for live multi-user updates.
+
+Every commit that inserts, updates or deletes a model publishes one change
+event per row (entity type, id, action, version). ``GET /api/events`` streams
+them to browsers as Server-Sent Events so open tabs can refetch only what
+changed instead of reloading ``/api/data``.
+
+Two backends are available (``EVENT_BUS``):
+
+- ``redis``: events go through Redis pub/sub and reach every gunicorn worker
+  and instance. Used automatically when ``REDIS_URL`` is set.
+- ``local``: in-process fan-out for single-worker setups. Its versions are
+  per process, so with more than one worker (``WEB_CONCURRENCY``) and no
+  Redis, ``/api/events`` is turned off (503) rather than silently missing
+  other workers' changes.
+
+Streams are served on the event loop by the ASGI app (app/asgi.py). On a
+gthread worker each stream holds a thread, so at most ``SSE_MAX_STREAMS``
+run per process; further clients are told to retry later.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+CHANNEL = 'it-resource:events'
+VERSION_KEY = 'it-resource:events:version'
+BACKLOG_KEY = 'it-resource:events:backlog'
+BACKLOG_SIZE = 1000
+
+# Entity type reported for each table
+ENTITY_TYPES = {
+    'team_members': 'team_member',
+    'projects': 'project',
+    'project_images': 'project_image',
+    'project_links': 'project_link',
+    'project_team': 'project_team',
+    'project_channels': 'project_channel',
+    'project_applications': 'project_application',
+    'tasks': 'task',
+    'subtasks': 'subtask',
+    'users': 'user',
+    'posts': 'post',
+}
+
+
+class LoopQueue:
+    """Subscriber queue of a stream served on an event loop; events arrive from other threads"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=BACKLOG_SIZE)
+
+    def put_nowait(self, e):
+        try:
+            self.loop.call_soon_threadsafe(self._put, e)
+        except RuntimeError:
+            pass  # loop closed; the stream is gone
+
+    def _put(self, e):
+        try:
+            self.queue.put_nowait(e)
+        except asyncio.QueueFull:
+            pass  # slow consumer; it will resync from the backlog on reconnect
+
+
+class LocalEventBus:
+    """In-process bus: fans events out to subscriber queues in this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._versions = itertools.count(1)
+        self._backlog = deque(maxlen=BACKLOG_SIZE)
+
+    def publish(self, events):
+        stamped = []
+        with self._lock:
+            for e in events:
+                stamped.append(dict(e, version=next(self._versions)))
+        self._deliver(stamped)
+        return stamped
+
+    def _deliver(self, events):
+        with self._lock:
+            self._backlog.extend(events)
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            for e in events:
+                try:
+                    q.put_nowait(e)
+                except queue.Full:
+                    pass  # slow consumer; it will resync from the backlog on reconnect
+
+    def subscribe(self, loop=None):
+        """A queue receiving every event published from now on (a LoopQueue for a stream on ``loop``)"""
+        q = LoopQueue(loop) if loop is not None else queue.Queue(maxsize=BACKLOG_SIZE)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def since(self, version):
+        """Buffered events newer than `version` (for Last-Event-ID resumes)"""
+        with self._lock:
+            return [e for e in self._backlog if e['version'] > version]
+
+
+class RedisEventBus(LocalEventBus):
+    """Redis pub/sub bus shared by all workers and instances.
+
+    Events are published to Redis only; a single listener thread per worker
+    relays them to that worker's local subscribers.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, events):
+        # Reserve a contiguous block of versions in one round trip
+        last = self.redis.incrby(VERSION_KEY, len(events))
+        stamped = [dict(e, version=last - len(events) + i + 1) for i, e in enumerate(events)]
+        pipe = self.redis.pipeline()
+        for e in stamped:
+            payload = json.dumps(e)
+            pipe.publish(CHANNEL, payload)
+            pipe.lpush(BACKLOG_KEY, payload)
+        pipe.ltrim(BACKLOG_KEY, 0, BACKLOG_SIZE - 1)
+        pipe.execute()
+        return stamped
+
+    def subscribe(self, loop=None):
+        self._ensure_listener()
+        return super().subscribe(loop)
+
+    def since(self, version):
+        events = [json.loads(raw) for raw in self.redis.lrange(BACKLOG_KEY, 0, -1)]
+        return sorted((e for e in events if e['version'] > version), key=lambda e: e['version'])
+
+    def _ensure_listener(self):
+        # Started lazily so the thread lives in the worker, not the preloading master
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='event-bus-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        self._deliver([json.loads(message['data'])])
+            except Exception as e:
+                print(f"⚠ Warning: Event bus listener lost Redis connection - {e}")
+                time.sleep(1)
+
+
+_bus = None
+_streams_enabled = True
+_stream_slots = None  # BoundedSemaphore of SSE streams on worker threads (None: unlimited)
+
+
+def get_bus():
+    return _bus
+
+
+def streams_enabled():
+    """Whether /api/events can see every change (False: several workers on the in-process bus)"""
+    return _streams_enabled
+
+
+def acquire_stream_slot():
+    """Claim one of this process's SSE_MAX_STREAMS thread-held streams; False when all are taken"""
+    return _stream_slots is None or _stream_slots.acquire(blocking=False)
+
+
+def release_stream_slot():
+    if _stream_slots is not None:
+        _stream_slots.release()
+
+
+def init_events(app):
+    """Create the configured event bus and hook change capture into sessions"""
+    global _bus
+    backend = app.config.get('EVENT_BUS') or os.environ.get('EVENT_BUS', 'auto')
+    redis_url = app.config.get('REDIS_URL') or os.environ.get('REDIS_URL')
+    if backend == 'auto':
+        backend = 'redis' if redis_url else 'local'
+
+    if backend == 'redis':
+        try:
+            _bus = RedisEventBus(redis_url)
+        except ImportError:
+            print("⚠ redis is not installed, using the in-process event bus")
+            _bus = LocalEventBus()
+    else:
+        _bus = LocalEventBus()
+
+    global _streams_enabled, _stream_slots
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    _streams_enabled = isinstance(_bus, RedisEventBus) or workers <= 1
+    if not _streams_enabled:
+        print(f"⚠ Live updates are off: {workers} workers need a shared event bus (set REDIS_URL)")
+    max_streams = int(app.config.get('SSE_MAX_STREAMS', 0))
+    _stream_slots = threading.BoundedSemaphore(max_streams) if max_streams > 0 else None
+
+    if not event.contains(Session, 'after_flush', _collect_changes):
+        event.listen(Session, 'after_flush', _collect_changes)
+        event.listen(Session, 'after_commit', _publish_changes)
+        event.listen(Session, 'after_soft_rollback', _discard_changes)
+    return _bus
+
+
+def mark_bulk_change(session, entity='snapshot'):
+    """Publish one coarse event for this transaction instead of per-row events.
+
+    Used by routes that replace large parts of the dataset (import, restore),
+    where clients should simply refetch everything.
+    """
+    session.info['bulk_change'] = entity
+
+
+def record_change(session, entity, id, action='updated', **parents):
+    """Queue an event for a row changed by a bulk statement, which flush events don't see"""
+    if 'bulk_change' in session.info:
+        return
+    pending = session.info.setdefault('pending_events', {})
+    pending.setdefault((entity, id), {'entity': entity, 'id': id, 'action': action, **parents})
+
+
+def _origin():
+    if has_request_context():
+        return request.headers.get('X-Client-Id')
+    return None
+
+
+def _describe(obj, action):
+    table = getattr(obj, '__tablename__', None)
+    entity = ENTITY_TYPES.get(table)
+    if entity is None:
+        return None
+    change = {'entity': entity, 'id': obj.id, 'action': action}
+    # Child rows carry their parent so clients know what to refetch
+    for attr, key in (('project_id', 'projectId'), ('task_id', 'taskId')):
+        value = getattr(obj, attr, None)
+        if value is not None:
+            change[key] = value
+    return change
+
+
+def _collect_changes(session, flush_context):
+    if 'bulk_change' in session.info:
+        return
+    pending = session.info.setdefault('pending_events', {})
+    for action, objects in (('created', session.new), ('updated', session.dirty), ('deleted', session.deleted)):
+        for obj in objects:
+            if action == 'updated' and not session.is_modified(obj, include_collections=False):
+                continue
+            change = _describe(obj, action)
+            if change is None:
+                continue
+            key = (change['entity'], change['id'])
+            # A row created and then updated in one transaction is still "created"
+            if key in pending and pending[key]['action'] == 'created' and action == 'updated':
+                continue
+            pending[key] = change
+
+
+def _publish_changes(session):
+    bulk = session.info.pop('bulk_change', None)
+    pending = session.info.pop('pending_events', {})
+    if _bus is None:
+        return
+    if bulk:
+        changes = [{'entity': bulk, 'id': None, 'action': 'replaced'}]
+    else:
+        changes = list(pending.values())
+    if not changes:
+        return
+    origin = _origin()
+    if origin:
+        changes = [dict(c, origin=origin) for c in changes]
+    try:
+        _bus.publish(changes)
+    except Exception as e:
+        # Notifications are best effort; never fail a committed request
+        print(f"⚠ Warning: Could not publish change events - {e}")
+
+
+def _discard_changes(session, previous_transaction):
+    session.info.pop('pending_events', None)
+    session.info.pop('bulk_change', None)
+
+
+def format_sse(change):
+    """Encode one change as a Server-Sent Events message"""
+    return f"id: {change['version']}\nevent: change\ndata: {json.dumps(change)}\n\n"
@@ -0,0 +1,186 @@
+"""
+Sparse fieldsets for the project and team member reads.
+
+``?fields=`` picks response keys and ``?include=`` / ``?exclude=`` pick the
+related collections, e.g.::
+
+    GET /api/projects?fields=id,name,status
+    GET /api/projects?fields=id,name&include=tasks
+    GET /api/projects?exclude=images,subtasks
+    GET /api/data?fields[projects]=id,name,team&fields[teamMembers]=id,name
+
+Only the selected columns are loaded (``load_only``) and only the selected
+relationships are eager loaded, so a list view that shows names and status
+never reads descriptions, meeting minutes, images or task trees.
+
+Rules:
+
+- without any of the parameters the full representation is returned;
+- ``fields`` lists columns and/or relations; relations named there are
+  included as if given in ``include``;
+- ``include`` without ``fields`` keeps every column and adds only the named
+  relations; ``exclude`` removes columns or relations from whatever is left;
+- ``subtasks`` implies ``tasks`` (tasks are returned without their
+  ``subtasks`` key otherwise).
+
+On ``/api/data`` the parameters are namespaced per collection
+(``fields[projects]``, ``include[teamMembers]``, ...); the plain names apply
+to ``projects``. Unknown names raise ValueError (400).
+"""
+
+from dataclasses import dataclass
+
+from sqlalchemy.orm import load_only, selectinload
+
+from app.models import TeamMember, Project, ProjectTeam, Task
+
+
+@dataclass(frozen=True)
+class EntityFields:
+    """Selectable response keys of one entity: column keys -> attribute names, relation keys"""
+    model: type
+    columns: dict
+    relations: tuple
+    # Attributes loaded even when not selected (sort keys used for cursors)
+    always: tuple = ()
+    # Column keys backed by a relationship instead of a column: key -> relationship
+    loaders: tuple = ()
+
+    def names(self):
+        return list(self.columns) + list(self.relations)
+
+
+PROJECT_FIELDS = EntityFields(
+    Project,
+    {
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'status': 'status',
+        'starred': 'starred',
+        'meetingMinutes': 'meeting_minutes',
+        'channels': 'channels',
+        'applications': 'applications',
+        'deliveryDate': 'delivery_date',
+        'created_at': 'created_at',
+    },
+    ('images', 'links', 'team', 'tasks', 'subtasks'),
+    always=('starred', 'created_at'),
+    loaders=(('channels', 'channel_links'), ('applications', 'application_links')),
+)
+
+TEAM_MEMBER_FIELDS = EntityFields(
+    TeamMember,
+    {
+        'id': 'id',
+        'name': 'name',
+        'role': 'role',
+        'skills': 'skills',
+        'workload': 'workload',
+        'created_at': 'created_at',
+    },
+    ('projects',),
+)
+
+# Columns that serialize None as an empty list (as in Project.to_dict)
+_LIST_COLUMNS = {'channels', 'applications'}
+
+
+def _names(value, param):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if not names:
+        raise ValueError(f'{param} must be a comma-separated list of field names')
+    return names
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    entity: EntityFields
+    columns: tuple
+    relations: frozenset
+
+    @classmethod
+    def parse(cls, entity, args, namespace=None, plain=True):
+        """Fieldset from query parameters, or None for the full representation.
+
+        Parameters are read as ``fields[<namespace>]`` etc. when a namespace is
+        given, and also under their plain names when ``plain`` is true.
+        """
+        def get(param):
+            value = args.get(f'{param}[{namespace}]') if namespace else None
+            if value is None and plain:
+                value = args.get(param)
+            return None if value is None else _names(value, param)
+
+        fields, include, exclude = get('fields'), get('include'), get('exclude') or []
+        if fields is None and include is None and not exclude:
+            return None
+
+        known = set(entity.names())
+        for param, names in (('fields', fields or []), ('exclude', exclude)):
+            unknown = [name for name in names if name not in known]
+            if unknown:
+                raise ValueError(f"Unknown {param}: {', '.join(unknown)} (allowed: {', '.join(entity.names())})")
+        unknown = [name for name in include or [] if name not in entity.relations]
+        if unknown:
+            raise ValueError(f"Unknown include: {', '.join(unknown)} (allowed: {', '.join(entity.relations)})")
+
+        columns = tuple(key for key in entity.columns
+                        if (fields is None or key in fields) and key not in exclude)
+        if fields is None and include is None:
+            relations = set(entity.relations)
+        else:
+            relations = set(include or []) | {name for name in fields or [] if name in entity.relations}
+        relations -= set(exclude)
+        if 'subtasks' in relations and 'tasks' not in exclude:
+            relations.add('tasks')
+        if 'tasks' not in relations:
+            relations.discard('subtasks')
+        return cls(entity, columns, frozenset(relations))
+
+    def load_options(self):
+        """Loader options loading only the selected columns and relations"""
+        model = self.entity.model
+        loaders = dict(self.entity.loaders)
+        attrs = dict.fromkeys([self.entity.columns[key] for key in self.columns if key not in loaders]
+                              + list(self.entity.always))
+        options = [load_only(*[getattr(model, attr) for attr in attrs])]
+        options.extend(selectinload(getattr(model, loaders[key])) for key in self.columns if key in loaders)
+        if model is Project:
+            if 'images' in self.relations:
+                options.append(selectinload(Project.images))
+            if 'links' in self.relations:
+                options.append(selectinload(Project.links))
+            if 'team' in self.relations:
+                # Only member names are needed; the parent project is already loaded
+                options.append(selectinload(Project.project_teams).lazyload(ProjectTeam.project))
+            if 'tasks' in self.relations:
+                tasks = selectinload(Project.tasks)
+                options.append(tasks.selectinload(Task.subtasks) if 'subtasks' in self.relations
+                               else tasks.lazyload(Task.subtasks))
+        elif 'projects' in self.relations:
+            options.append(
+                selectinload(TeamMember.project_teams).joinedload(ProjectTeam.project, innerjoin=True)
+                .load_only(Project.name)
+            )
+        return options
+
+    def serialize(self, obj):
+        """Response dict with only the selected keys"""
+        result = {}
+        for key in self.columns:
+            value = getattr(obj, self.entity.columns[key])
+            result[key] = (value or []) if key in _LIST_COLUMNS else value
+        relations = self.relations
+        if self.entity.model is Project:
+            if 'images' in relations:
+                result['images'] = [img.to_dict(position) for position, img in enumerate(obj.images)]
+            if 'links' in relations:
+                result['links'] = [link.to_dict() for link in obj.links]
+            if 'team' in relations:
+                result['team'] = [pt.member_name for pt in obj.project_teams]
+            if 'tasks' in relations:
+                result['tasks'] = [task.to_dict(include_subtasks='subtasks' in relations) for task in obj.tasks]
+        elif 'projects' in relations:
+            result['projects'] = [pt.project.name for pt in obj.project_teams]
+        return result
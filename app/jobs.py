@@ -0,0 +1,411 @@
+"""
+Background jobs for long-running bulk operations.
+
+``POST /api/import``, ``POST``/``PUT /api/backup``, ``POST /api/backup/export``,
+``POST /api/backups`` (and ``/api/backups/<id>/restore``), ``POST /api/archive/run``
+and (on request) ``POST /api/projects/sync`` store a row in ``jobs`` and return
+``202 Accepted`` with the job id straight away; the work itself runs
+outside the request so a large restore can't hold a web worker (and its
+gunicorn timeout) hostage. ``GET /api/jobs/<id>`` reports status and
+progress, ``GET /api/jobs/<id>/result`` returns the stored result. Moves
+that leave long ordering keys queue a ``rebalance_ranks`` job for their list
+(app/ordering.py).
+
+Backends (``JOB_BACKEND``):
+
+- ``redis``: job ids are pushed onto a Redis list and executed by
+  ``flask jobs-worker`` processes; progress is kept in Redis so any web
+  worker can report it. Used automatically when ``REDIS_URL`` is set.
+- ``thread``: a small thread pool inside each web worker
+  (``JOB_WORKERS`` threads).
+- ``inline``: runs the job before the request returns (benchmarks, tests).
+
+The job row is the source of truth for status and results in every backend.
+
+A worker can be recycled or crash with jobs running (or still waiting in its
+thread pool). Every process that executes jobs (web workers with ``thread``,
+``flask jobs-worker`` with ``redis``) runs a ``JobMonitor`` thread: it stamps
+``heartbeat_at`` on its running jobs every ``JOB_HEARTBEAT_SECONDS``, and when
+it starts and every ``JOB_STALE_SECONDS`` after that it marks running jobs
+without a recent heartbeat failed and hands queued jobs nobody has claimed
+back to the backend. Claiming is a ``queued`` -> ``running`` UPDATE, so a job
+submitted twice still runs once. On SQLite a running job's write transaction
+blocks other writers, so no heartbeats are written and running jobs count as
+lost ``JOB_TIMEOUT_HOURS`` after they started.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import undefer
+
+from app import db
+from app.archive import archive_projects
+from app.backups import restore_backup, take_backup
+from app.models import Job
+from app.ordering import rebalance_ranks
+from app.snapshots import replace_snapshot, merge_snapshot, sync_project, export_snapshot
+
+QUEUE_KEY = 'it-resource:jobs:queue'
+PROGRESS_KEY = 'it-resource:jobs:progress:{}'
+PROGRESS_TTL = 24 * 3600
+
+# Minimum progress change (fraction) and interval (seconds) between progress writes
+PROGRESS_STEP = 0.01
+PROGRESS_DB_INTERVAL = 2.0
+
+# kind -> callable(session, payload, progress) returning a JSON-serialisable result
+JOB_TYPES = {
+    'import': lambda session, payload, progress: replace_snapshot(session, payload, 'import', progress),
+    'restore': lambda session, payload, progress: replace_snapshot(session, payload, 'restore', progress),
+    'merge': lambda session, payload, progress: merge_snapshot(session, payload, progress),
+    'export': lambda session, payload, progress: export_snapshot(session, progress),
+    'sync_project': lambda session, payload, progress: {
+        'project': sync_project(session, payload)[0].to_dict(include_tasks=True)
+    },
+    'backup': lambda session, payload, progress: take_backup(session, payload.get('full', False), progress).to_dict(),
+    'restore_backup': lambda session, payload, progress: restore_backup(session, payload['backup_id'], progress),
+    'archive_projects': lambda session, payload, progress: {
+        'archived': archive_projects(session, payload.get('project_ids'), progress)
+    },
+    'rebalance_ranks': lambda session, payload, progress: rebalance_ranks(
+        session, [payload['table']], [payload['parent_id']], progress=progress
+    ),
+}
+
+
+class LocalProgress:
+    """Live progress of jobs running in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def set(self, job_id, fraction):
+        with self._lock:
+            self._values[job_id] = fraction
+
+    def get(self, job_id):
+        with self._lock:
+            return self._values.get(job_id)
+
+    def clear(self, job_id):
+        with self._lock:
+            self._values.pop(job_id, None)
+
+
+class RedisProgress:
+    """Live progress shared by every process through Redis"""
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def set(self, job_id, fraction):
+        self.redis.set(PROGRESS_KEY.format(job_id), fraction, ex=PROGRESS_TTL)
+
+    def get(self, job_id):
+        value = self.redis.get(PROGRESS_KEY.format(job_id))
+        return float(value) if value is not None else None
+
+    def clear(self, job_id):
+        self.redis.delete(PROGRESS_KEY.format(job_id))
+
+
+class JobMonitor:
+    """Heartbeats for the jobs running in this process, and recovery of lost jobs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = set()
+        self._pid = None
+
+    def start(self, app, runner):
+        """Start the monitor thread once per process (after gunicorn forks)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._running.clear()
+        threading.Thread(target=self._loop, args=(app, runner), name='job-monitor', daemon=True).start()
+
+    def add(self, job_id):
+        with self._lock:
+            self._running.add(job_id)
+
+    def discard(self, job_id):
+        with self._lock:
+            self._running.discard(job_id)
+
+    def beat(self):
+        """Stamp heartbeat_at on this process's running jobs (own connection, like progress)"""
+        with self._lock:
+            running = list(self._running)
+        if running:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    update(Job).where(Job.id.in_(running), Job.status == 'running')
+                    .values(heartbeat_at=datetime.utcnow())
+                )
+
+    def _loop(self, app, runner):
+        interval = app.config.get('JOB_HEARTBEAT_SECONDS', 30)
+        sweep_every = app.config.get('JOB_STALE_SECONDS', 300)
+        last_sweep = None
+        while True:
+            try:
+                with app.app_context():
+                    if _heartbeats():
+                        self.beat()
+                    now = time.monotonic()
+                    if last_sweep is None or now - last_sweep >= sweep_every:
+                        # First pass: every queued job, as this process may have had them in its pool
+                        recover_jobs(app, runner, db.session, requeue_all=last_sweep is None)
+                        last_sweep = now
+            except Exception as e:
+                print(f"⚠ Warning: Could not check background jobs - {e}")
+            time.sleep(interval)
+
+
+def _heartbeats():
+    # SQLite: a running job's write transaction would block the heartbeat
+    return db.engine.dialect.name != 'sqlite'
+
+
+def recover_jobs(app, runner, session, requeue_all=False):
+    """Fail running jobs whose worker is gone and resubmit unclaimed queued jobs.
+
+    Queued jobs are resubmitted once they are ``JOB_STALE_SECONDS`` old (any
+    age with ``requeue_all``). Returns (failed, requeued) counts.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=app.config.get('JOB_STALE_SECONDS', 300))
+    timeout = now - timedelta(hours=app.config.get('JOB_TIMEOUT_HOURS', 6))
+    lost = or_(Job.heartbeat_at < stale, and_(Job.heartbeat_at.is_(None), Job.started_at < timeout))
+    failed = session.execute(
+        update(Job).where(Job.status == 'running', lost)
+        .values(status='failed', error='Worker stopped while running the job; resubmit it',
+                payload=None, finished_at=now)
+    ).rowcount
+    session.commit()
+
+    stmt = select(Job.id).where(Job.status == 'queued')
+    if not requeue_all:
+        stmt = stmt.where(Job.created_at < stale)
+    queued = session.scalars(stmt.order_by(Job.created_at)).all()
+    session.rollback()  # don't hold the read transaction while jobs run
+    for job_id in queued:
+        runner.submit(app, job_id)
+    return failed, len(queued)
+
+
+_monitor = JobMonitor()
+
+
+class InlineRunner:
+    """Runs each job in the calling thread before enqueue() returns"""
+    name = 'inline'
+
+    def __init__(self):
+        self.progress = LocalProgress()
+
+    def submit(self, app, job_id):
+        run_job(app, job_id)
+
+
+class ThreadRunner:
+    """Runs jobs on a thread pool inside the web worker"""
+    name = 'thread'
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.progress = LocalProgress()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self, app):
+        """Start this process's job monitor (first request after the fork)"""
+        _monitor.start(app, self)
+
+    def submit(self, app, job_id):
+        # Created on first use so no threads exist before gunicorn forks
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+        self._executor.submit(run_job, app, job_id)
+
+
+class RedisRunner:
+    """Queues job ids in Redis for ``flask jobs-worker`` processes"""
+    name = 'redis'
+
+    def __init__(self, url):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.progress = RedisProgress(self.redis)
+
+    def submit(self, app, job_id):
+        self.redis.lpush(QUEUE_KEY, job_id)
+
+    def work(self, app, burst=False, poll_seconds=5):
+        """Execute queued jobs until interrupted (or the queue is empty with ``burst``)"""
+        if not burst:
+            _monitor.start(app, self)
+        while True:
+            item = self.redis.brpop(QUEUE_KEY, timeout=poll_seconds)
+            if item is None:
+                if burst:
+                    return
+                continue
+            run_job(app, item[1].decode())
+
+
+_runner = None
+
+
+def get_runner():
+    return _runner
+
+
+def init_jobs(app):
+    """Create the configured job backend"""
+    global _runner
+    backend = app.config.get('JOB_BACKEND') or os.environ.get('JOB_BACKEND', 'auto')
+    redis_url = app.config.get('REDIS_URL') or os.environ.get('REDIS_URL')
+    if backend == 'auto':
+        backend = 'redis' if redis_url else 'thread'
+
+    if backend == 'redis':
+        try:
+            _runner = RedisRunner(redis_url)
+        except ImportError:
+            print("⚠ redis is not installed, running jobs on an in-process thread pool")
+            backend = 'thread'
+    if backend == 'inline':
+        _runner = InlineRunner()
+    elif backend != 'redis':
+        _runner = ThreadRunner(int(app.config.get('JOB_WORKERS', 2)))
+
+        @app.before_request
+        def start_job_monitor():
+            _runner.start(app)
+    return _runner
+
+
+def enqueue(kind, payload=None):
+    """Store a queued job and hand it to the backend; returns the Job"""
+    if kind not in JOB_TYPES:
+        raise ValueError(f'Unknown job type: {kind}')
+    app = current_app._get_current_object()
+    job_id = str(uuid.uuid4())
+    job = Job(id=job_id, kind=kind, status='queued',
+              payload=app.json.dumps(payload if payload is not None else {}))
+    db.session.add(job)
+    db.session.commit()
+    try:
+        _runner.submit(app, job_id)
+    except Exception as e:
+        job.status = 'failed'
+        job.error = f'Could not queue job: {e}'
+        job.payload = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        raise
+    # The job may already have moved on in another session
+    db.session.expire(job)
+    return job
+
+
+class _Reporter:
+    """progress(done, total) callback handed to the job function"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.last = 0.0
+        self.last_db = time.monotonic()
+        # SQLite: the job's own write transaction holds the database lock,
+        # so progress can't be written to the jobs table until it commits
+        self.persist = db.engine.dialect.name != 'sqlite'
+
+    def __call__(self, done, total):
+        fraction = min(1.0, done / total) if total else 1.0
+        if fraction - self.last < PROGRESS_STEP and fraction < 1.0:
+            return
+        self.last = fraction
+        try:
+            _runner.progress.set(self.job_id, fraction)
+            now = time.monotonic()
+            if self.persist and now - self.last_db >= PROGRESS_DB_INTERVAL:
+                self.last_db = now
+                # Own connection: visible to other workers before the job commits
+                with db.engine.begin() as connection:
+                    connection.execute(update(Job).where(Job.id == self.job_id).values(progress=fraction))
+        except Exception as e:
+            # Progress is best effort; never fail the job over it
+            print(f"⚠ Warning: Could not record job progress - {e}")
+
+
+def run_job(app, job_id):
+    """Claim a queued job and execute it in its own app context and session"""
+    with app.app_context():
+        session = db.session
+        now = datetime.utcnow()
+        claimed = session.execute(
+            update(Job).where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', started_at=now, heartbeat_at=now if _heartbeats() else None)
+        ).rowcount
+        session.commit()
+        if not claimed:
+            return
+        _monitor.add(job_id)
+        try:
+            job = session.get(Job, job_id, options=[undefer(Job.payload)])
+            payload = json.loads(job.payload) if job.payload else {}
+            try:
+                result = JOB_TYPES[job.kind](session, payload, _Reporter(job_id))
+            except Exception as e:
+                session.rollback()
+                job = session.get(Job, job_id)
+                job.status = 'failed'
+                job.error = str(e)
+            else:
+                job = session.get(Job, job_id)
+                job.status = 'succeeded'
+                job.progress = 1.0
+                job.result = app.json.dumps(result)
+            job.payload = None
+            job.finished_at = datetime.utcnow()
+            session.commit()
+        finally:
+            _monitor.discard(job_id)
+        _runner.progress.clear(job_id)
+        prune_jobs(session, app.config.get('JOB_RETENTION_HOURS', 24))
+
+
+def prune_jobs(session, retention_hours):
+    """Delete finished jobs (and their stored results) older than the retention period"""
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    session.execute(delete(Job).where(Job.status.in_(('succeeded', 'failed')), Job.finished_at < cutoff))
+    session.commit()
+
+
+def job_status(session, job_id):
+    """Status dict for GET /api/jobs/<id> (None if unknown)"""
+    job = session.get(Job, job_id)
+    if job is None:
+        return None
+    status = job.to_dict()
+    if job.status == 'running':
+        live = _runner.progress.get(job_id)
+        if live is not None:
+            status['progress'] = max(live, job.progress or 0.0)
+    status['status_url'] = f'/api/jobs/{job.id}'
+    if job.status == 'succeeded':
+        status['result_url'] = f'/api/jobs/{job.id}/result'
+    return status
@@ -0,0 +1,92 @@
+"""
+JSON providers for API responses.
+
+Uses orjson when it is installed and falls back to the stdlib ``json``
+module otherwise. Both providers serialize ``date``/``datetime`` values
+as ISO 8601 strings, so models can hand raw values to ``jsonify``.
+"""
+
+import dataclasses
+import decimal
+import os
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _iso_default(o):
+    """Fallback serializer shared by both providers"""
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider, with ISO 8601 dates instead of RFC 822"""
+
+    default = staticmethod(_iso_default)
+    ensure_ascii = False
+    sort_keys = False
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson-backed provider; dates and datetimes are encoded natively"""
+
+    mimetype = 'application/json'
+    option = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj, **kwargs):
+        return self._dumpb(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = 0
+        if self._app.debug:
+            option = orjson.OPT_INDENT_2
+        # Hand bytes straight to the response, skipping a decode/encode round trip
+        return self._app.response_class(self._dumpb(obj, option) + b'\n', mimetype=self.mimetype)
+
+    def _dumpb(self, obj, option=0):
+        return orjson.dumps(obj, default=_iso_default, option=self.option | option)
+
+
+PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'stdlib': StdlibJSONProvider,
+}
+
+
+def get_provider_class(name=None):
+    """Resolve a provider class by name ('orjson', 'stdlib' or 'auto')"""
+    name = (name or os.environ.get('JSON_PROVIDER', 'auto')).lower()
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name == 'orjson' and orjson is None:
+        print("⚠ orjson is not installed, falling back to stdlib json")
+        name = 'stdlib'
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown JSON provider '{name}'. Expected one of: {', '.join(PROVIDERS)}")
+    return PROVIDERS[name]
+
+
+def init_json(app, name=None):
+    """Install the selected JSON provider on the app"""
+    app.json = get_provider_class(name or app.config.get('JSON_PROVIDER'))(app)
+    return app.json
@@ -0,0 +1,259 @@
+"""
+Team member id <-> name map.
+
+Team assignments and task/subtask assignees reference ``team_members.id``
+(``ProjectTeam.member_id``, ``Task.assignee_id``, ``Subtask.assignee_id``),
+so renaming a member is a one-row UPDATE and the joins and indexes work on
+integers. The API still speaks names: ``member_name`` / ``assignee_name``
+(models.py) translate through a per-process map instead of joining
+``team_members`` on every read, and names assigned to them are resolved to
+ids in one pass just before the session flushes.
+
+The map is checked against the ``member_version`` counter (app/counters.py),
+which every transaction that adds, deletes or renames a member bumps: the
+first lookup in each transaction reads that one row, and all (id, name)
+pairs are reloaded only when it changed. Member changes made by this process
+drop the map right away, and again if their transaction rolls back. Names
+that don't belong to a member are rejected (ValueError) rather than stored as
+"no member".
+
+Until the contract migration (drop_member_name_columns) has run, the old
+``member_name`` / ``assignee_name`` columns are still there for instances of
+the previous release: while they exist, rows written here get them filled in
+from the ids in the same transaction (``write_legacy_names``).
+"""
+
+import threading
+
+from sqlalchemy import column, event, inspect, select, table, update
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import flag_dirty
+
+from app.metrics import record_cache
+
+# Instance dict key of a name assigned but not resolved to an id yet
+_PENDING = '_pending_member_name'
+
+# Name columns dual-written until the contract migration drops them: table -> (id column, name column)
+LEGACY_NAME_COLUMNS = {
+    'project_team': ('member_id', 'member_name'),
+    'tasks': ('assignee_id', 'assignee_name'),
+    'subtasks': ('assignee_id', 'assignee_name'),
+}
+
+# Tables of LEGACY_NAME_COLUMNS whose name column still exists; looked up on the first write
+_legacy_tables = None
+
+
+class MemberMap:
+    """Process-wide {id: name} / {name: id} for team members"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (member_version, {id: name}, {name: id}); replaced as a whole on reload
+        self._state = None
+
+    def clear(self):
+        with self._lock:
+            self._state = None
+
+    def _current(self, session):
+        """The map, checked against the member version once per transaction"""
+        state = self._state
+        if session is None or (state is not None and session.info.get('member_map_checked')):
+            return state or (None, {}, {})
+        from app.counters import MEMBER_VERSION
+        from app.models import EntityCounter, TeamMember
+        with session.no_autoflush:
+            version = session.execute(
+                select(EntityCounter.value).where(EntityCounter.name == MEMBER_VERSION)
+            ).scalar()
+            if state is None or version is None or state[0] != version:
+                record_cache('members', False)
+                rows = session.execute(select(TeamMember.id, TeamMember.name)).all()
+                state = (version, {row.id: row.name for row in rows}, {row.name: row.id for row in rows})
+                with self._lock:
+                    self._state = state
+            else:
+                record_cache('members', True)
+        session.info['member_map_checked'] = True
+        return state
+
+    def name(self, member_id, session=None):
+        if member_id is None:
+            return None
+        return self._current(session)[1].get(member_id)
+
+    def ids(self, session, names):
+        """{name: id} for the given names that belong to a member"""
+        by_name = self._current(session)[2]
+        return {name: by_name[name] for name in names if name in by_name}
+
+    def names(self, session, member_ids):
+        """{id: name} for the given ids that belong to a member"""
+        by_id = self._current(session)[1]
+        return {member_id: by_id[member_id] for member_id in member_ids if member_id in by_id}
+
+
+member_map = MemberMap()
+
+
+def member_name_property(id_attr, relation):
+    """Name of the team member referenced by the integer column ``id_attr``.
+
+    Reads go through ``member_map``; assigned names are resolved before the
+    next flush (None clears the reference, unknown names raise ValueError).
+    In queries it is a correlated subquery on team_members.
+    """
+    def fget(obj):
+        state = obj.__dict__
+        if _PENDING in state:
+            return state[_PENDING][0]
+        member_id = getattr(obj, id_attr)
+        if member_id is None:
+            # Transient objects built with the relationship (e.g. benchmarks)
+            member = state.get(relation)
+            return member.name if member is not None else None
+        return member_map.name(member_id, object_session(obj))
+
+    def fset(obj, name):
+        obj.__dict__[_PENDING] = (name, id_attr, relation)
+        if inspect(obj).persistent:
+            flag_dirty(obj)  # so the next flush resolves it
+
+    # Built once per class: declarative constructors evaluate it on every keyword they set
+    expressions = {}
+
+    def expr(cls):
+        if cls not in expressions:
+            from app.models import TeamMember
+            expressions[cls] = (
+                select(TeamMember.name).where(TeamMember.id == getattr(cls, id_attr)).scalar_subquery()
+            )
+        return expressions[cls]
+
+    return hybrid_property(fget, fset, expr=expr)
+
+
+# ============= Session hooks =============
+
+def _resolve_names(session, flush_context, instances):
+    pending = [obj for objects in (session.new, session.dirty) for obj in objects if _PENDING in obj.__dict__]
+    if not pending:
+        return
+    from app.models import TeamMember
+    # Members added in this flush have no id yet; link those through the relationship
+    added = {obj.name: obj for obj in session.new if isinstance(obj, TeamMember)}
+    names = {obj.__dict__[_PENDING][0] for obj in pending} - {None}
+    ids = member_map.ids(session, names - set(added))
+    for obj in pending:
+        name, id_attr, relation = obj.__dict__.pop(_PENDING)
+        if name in added:
+            setattr(obj, relation, added[name])
+        elif name in ids:
+            setattr(obj, id_attr, ids[name])
+        elif name is None:
+            setattr(obj, id_attr, None)
+        else:
+            raise ValueError(f'Unknown team member: {name}')
+
+
+def _legacy_columns(connection):
+    global _legacy_tables
+    if _legacy_tables is None:
+        inspector = inspect(connection)
+        _legacy_tables = {
+            name: columns for name, columns in LEGACY_NAME_COLUMNS.items()
+            if columns[1] in {c['name'] for c in inspector.get_columns(name)}
+        }
+    return _legacy_tables
+
+
+def write_legacy_names(session, table_name, row_ids):
+    """Fill the old name column of rows ``row_ids`` of ``table_name`` from their ids, while it exists"""
+    legacy = _legacy_columns(session.connection())
+    if table_name not in legacy or not row_ids:
+        return
+    id_column, name_column = legacy[table_name]
+    rows = table(table_name, column('id'), column(id_column), column(name_column))
+    members = table('team_members', column('id'), column('name'))
+    session.connection().execute(
+        update(rows).where(rows.c.id.in_(row_ids))
+        .values({name_column: select(members.c.name).where(members.c.id == rows.c[id_column]).scalar_subquery()})
+    )
+
+
+def _members_changed(session):
+    session.info['members_changed'] = True
+    session.info.pop('member_map_checked', None)
+    member_map.clear()
+
+
+def _written_references(session):
+    """{table: ids} of rows inserted or re-pointed at another member in this flush"""
+    written = {}
+    for obj in (*session.new, *session.dirty):
+        name = getattr(obj, '__tablename__', None)
+        if name not in LEGACY_NAME_COLUMNS:
+            continue
+        id_column = LEGACY_NAME_COLUMNS[name][0]
+        if obj in session.new or inspect(obj).attrs[id_column].history.has_changes():
+            written.setdefault(name, []).append(obj.id)
+    return written
+
+
+def _after_flush(session, flush_context):
+    from app.models import TeamMember
+    if _legacy_tables != {}:
+        for name, row_ids in _written_references(session).items():
+            write_legacy_names(session, name, row_ids)
+    if any(isinstance(obj, TeamMember) for objects in (session.new, session.deleted) for obj in objects) or any(
+        isinstance(obj, TeamMember) and inspect(obj).attrs.name.history.has_changes() for obj in session.dirty
+    ):
+        _members_changed(session)
+
+
+def changes_member_names(orm_execute_state):
+    """True for bulk statements that may add, delete or rename team members"""
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.local_table.name != 'team_members':
+        return False
+    if orm_execute_state.is_insert or orm_execute_state.is_delete:
+        return True
+    if orm_execute_state.is_update:
+        # Workload recomputation and other updates that leave names alone don't count
+        values = getattr(orm_execute_state.statement, '_values', None)
+        return values is None or any(getattr(key, 'key', key) == 'name' for key in values)
+    return False
+
+
+def _track_bulk_statements(orm_execute_state):
+    if changes_member_names(orm_execute_state):
+        _members_changed(orm_execute_state.session)
+
+
+def _after_commit(session):
+    session.info.pop('members_changed', None)
+    # Other processes may change members before the next transaction: check again there
+    session.info.pop('member_map_checked', None)
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('member_map_checked', None)
+    if session.info.pop('members_changed', False):
+        # The map may have been loaded from the rolled back changes
+        member_map.clear()
+
+
+def init_members(app):
+    """Resolve member names on flush and keep the member map in step with this process's changes"""
+    global _legacy_tables
+    member_map.clear()
+    _legacy_tables = None
+    if not event.contains(Session, 'before_flush', _resolve_names):
+        event.listen(Session, 'before_flush', _resolve_names)
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'do_orm_execute', _track_bulk_statements)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_soft_rollback', _after_rollback)
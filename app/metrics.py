@@ -0,0 +1,157 @@
+"""
+Prometheus metrics exposed at ``GET /metrics``.
+
+Exports per-endpoint request counts, latency and response-size histograms,
+database pool occupancy and checkout waits, cache hits/misses and
+import/export row throughput.
+
+Under gunicorn set ``PROMETHEUS_MULTIPROC_DIR`` to an empty, writable
+directory: every worker then writes its samples there and ``/metrics``
+aggregates all workers, whichever one serves the scrape.
+"""
+
+import os
+import time
+
+from flask import Response, g, jsonify, request
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, multiprocess
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+if prometheus_client is not None:
+    REQUESTS = Counter(
+        'http_requests_total', 'HTTP requests', ['method', 'endpoint', 'status'])
+    LATENCY = Histogram(
+        'http_request_duration_seconds', 'HTTP request latency', ['method', 'endpoint'],
+        buckets=LATENCY_BUCKETS)
+    RESPONSE_SIZE = Histogram(
+        'http_response_size_bytes', 'HTTP response body size', ['endpoint'],
+        buckets=SIZE_BUCKETS)
+
+    POOL_SIZE = Gauge(
+        'db_pool_size', 'Configured pool size', multiprocess_mode='livesum')
+    POOL_CHECKED_OUT = Gauge(
+        'db_pool_checked_out', 'Connections currently checked out', multiprocess_mode='livesum')
+    POOL_OVERFLOW = Gauge(
+        'db_pool_overflow', 'Overflow connections currently open', multiprocess_mode='livesum')
+    POOL_WAIT = Histogram(
+        'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection',
+        buckets=WAIT_BUCKETS)
+    POOL_TIMEOUTS = Counter(
+        'db_pool_checkout_timeouts_total', 'Checkouts that gave up waiting for a connection')
+
+    CACHE_REQUESTS = Counter(
+        'cache_requests_total', 'Cache lookups', ['cache', 'result'])
+    ROWS = Counter(
+        'data_rows_processed_total', 'Rows processed by import/export operations', ['operation', 'entity'])
+
+
+def enabled():
+    return prometheus_client is not None
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup; hit ratio = hits / (hits + misses)"""
+    if enabled():
+        CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_rows(operation, entity, count):
+    if enabled() and count:
+        ROWS.labels(operation, entity).inc(count)
+
+
+def record_snapshot_rows(operation, data):
+    """Count rows in a snapshot payload ({'teamMembers': [...], 'projects': [...]})"""
+    if not enabled() or not isinstance(data, dict):
+        return
+    projects = data.get('projects') or []
+    tasks = [t for p in projects for t in (p.get('tasks') or [])]
+    record_rows(operation, 'team_members', len(data.get('teamMembers') or []))
+    record_rows(operation, 'projects', len(projects))
+    record_rows(operation, 'tasks', len(tasks))
+    record_rows(operation, 'subtasks', sum(len(t.get('subtasks') or []) for t in tasks))
+
+
+def observe_request(method, endpoint, status, seconds, size=None):
+    """Count one served request (Flask's after_request, and the routes app/asgi.py serves itself)"""
+    if not enabled():
+        return
+    REQUESTS.labels(method, endpoint, status).inc()
+    LATENCY.labels(method, endpoint).observe(seconds)
+    if size is not None:
+        RESPONSE_SIZE.labels(endpoint).observe(size)
+    try:
+        _update_pool_gauges()
+    except Exception:
+        pass
+
+
+def _record_pool_wait(seconds, timed_out):
+    POOL_WAIT.observe(seconds)
+    if timed_out:
+        POOL_TIMEOUTS.inc()
+
+
+def _update_pool_gauges():
+    from sqlalchemy.pool import QueuePool
+    from app import db
+
+    pool = db.engine.pool
+    if isinstance(pool, QueuePool):
+        POOL_SIZE.set(pool.size())
+        POOL_CHECKED_OUT.set(pool.checkedout())
+        POOL_OVERFLOW.set(max(0, pool.overflow()))
+
+
+def init_metrics(app):
+    """Register request instrumentation and the /metrics endpoint"""
+
+    if not enabled():
+        def metrics_unavailable():
+            return jsonify({'error': 'prometheus_client is not installed'}), 501
+        app.add_url_rule('/metrics', 'metrics', metrics_unavailable)
+        return
+
+    from app.pool import wait_stats
+    if _record_pool_wait not in wait_stats.observers:
+        wait_stats.observers.append(_record_pool_wait)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        observe_request(request.method, request.endpoint or 'unmatched', response.status_code,
+                        time.perf_counter() - start,
+                        None if response.is_streamed else response.calculate_content_length() or 0)
+        return response
+
+    def metrics_view():
+        _update_pool_gauges()
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return Response(prometheus_client.generate_latest(registry),
+                        mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live gauges (call from gunicorn's child_exit hook)"""
+    if enabled() and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
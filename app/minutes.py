@@ -0,0 +1,105 @@
+"""
+Meeting minutes and their history.
+
+``Project.description`` and ``Project.meeting_minutes`` are deferred columns
+(models.py): ordinary project loads such as writes, team changes and the
+member listing never read them, and only the full representations
+(``/api/data``, ``/api/projects``, backups) undefer them. The minutes editor
+uses ``GET``/``PUT /api/projects/<id>/minutes`` to read or replace just this
+one column instead of round-tripping the whole project and its task tree.
+
+When minutes are replaced the previous text is kept as a
+``MeetingMinutesRevision`` (the newest ``MINUTES_HISTORY`` per project;
+0 disables history). Revisions of at least ``MINUTES_COMPRESS_MIN_BYTES``
+are stored zlib-compressed unless ``MINUTES_COMPRESSION`` is off.
+"""
+
+import zlib
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import undefer
+
+from app.models import MeetingMinutesRevision, Project
+
+_history = 10
+_compress = True
+_compress_min_bytes = 512
+
+
+def init_minutes(app):
+    global _history, _compress, _compress_min_bytes
+    _history = int(app.config.get('MINUTES_HISTORY', 10))
+    _compress = bool(app.config.get('MINUTES_COMPRESSION', True))
+    _compress_min_bytes = int(app.config.get('MINUTES_COMPRESS_MIN_BYTES', 512))
+
+
+def encode(text):
+    """(content, encoding) for storing a revision"""
+    raw = text.encode('utf-8')
+    if _compress and len(raw) >= _compress_min_bytes:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return packed, 'zlib'
+    return raw, 'plain'
+
+
+def decode(content, encoding):
+    raw = zlib.decompress(content) if encoding == 'zlib' else content
+    return raw.decode('utf-8')
+
+
+def set_minutes(session, project, text):
+    """Replace a project's minutes, keeping the previous text as a revision; True if they changed"""
+    text = text or ''
+    previous = project.meeting_minutes or ''
+    if text == previous:
+        return False
+    if previous and _history > 0:
+        # Make room for the new revision: keep the newest (history - 1)
+        kept = (
+            select(MeetingMinutesRevision.id)
+            .where(MeetingMinutesRevision.project_id == project.id)
+            .order_by(MeetingMinutesRevision.id.desc())
+            .limit(_history - 1)
+        )
+        session.execute(
+            delete(MeetingMinutesRevision)
+            .where(MeetingMinutesRevision.project_id == project.id,
+                   MeetingMinutesRevision.id.notin_(kept.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        content, encoding = encode(previous)
+        session.add(MeetingMinutesRevision(project_id=project.id, content=content, encoding=encoding))
+    project.meeting_minutes = text
+    return True
+
+
+def minutes_payload(session, project_id, history=False):
+    """GET /api/projects/<id>/minutes (None if the project doesn't exist)"""
+    row = session.execute(
+        select(Project.id, Project.meeting_minutes, Project.updated_at).where(Project.id == project_id)
+    ).first()
+    if row is None:
+        return None
+    payload = {'projectId': row.id, 'meetingMinutes': row.meeting_minutes or '', 'updated_at': row.updated_at}
+    if history:
+        revisions = session.execute(
+            select(MeetingMinutesRevision)
+            .where(MeetingMinutesRevision.project_id == project_id)
+            .order_by(MeetingMinutesRevision.id.desc())
+        ).scalars()
+        payload['history'] = [
+            {'id': rev.id, 'meetingMinutes': decode(rev.content, rev.encoding), 'created_at': rev.created_at}
+            for rev in revisions
+        ]
+    return payload
+
+
+def save_minutes(session, project_id, text):
+    """PUT /api/projects/<id>/minutes: replace the minutes and commit (None if the project doesn't exist)"""
+    project = session.get(Project, project_id, options=[undefer(Project.meeting_minutes)])
+    if project is None:
+        return None
+    changed = set_minutes(session, project, text)
+    session.commit()
+    return {'projectId': project_id, 'meetingMinutes': text or '', 'changed': changed}
@@ -2,6 +2,14 @@ from app import db
 from datetime import datetime
 from sqlalchemy.dialects.postgresql import ARRAY, JSON
 
+from app.members import member_name_property
+
+# Postgres arrays; stored as JSON on SQLite so local/dev databases work too
+StringArray = ARRAY(db.String).with_variant(db.JSON(), 'sqlite')
+
+# Manual ordering keys (app/ordering.py); compared bytewise, whatever the database's default collation
+RankKey = db.String(64).with_variant(db.String(64, collation='C'), 'postgresql')
+
 class TeamMember(db.Model):
     """Team Member model"""
     __tablename__ = 'team_members'
@@ -9,15 +17,18 @@ class TeamMember(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), unique=True, nullable=False)
     role = db.Column(db.String(100), nullable=False)
-    skills = db.Column(ARRAY(db.String), default=[], nullable=False)
+    skills = db.Column(StringArray, default=[], nullable=False)
     workload = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
-    project_teams = db.relationship('ProjectTeam', back_populates='member', cascade='all, delete-orphan')
-    tasks = db.relationship('Task', foreign_keys='Task.assignee_name', back_populates='assignee')
-    subtasks = db.relationship('Subtask', foreign_keys='Subtask.assignee_name', back_populates='assignee')
+    # Deletes are left to the database's ON DELETE rules (passive_deletes): children aren't loaded first
+    project_teams = db.relationship('ProjectTeam', back_populates='member', cascade='all, delete-orphan',
+                                    passive_deletes=True)
+    tasks = db.relationship('Task', foreign_keys='Task.assignee_id', back_populates='assignee', passive_deletes=True)
+    subtasks = db.relationship('Subtask', foreign_keys='Subtask.assignee_id', back_populates='assignee',
+                               passive_deletes=True)
     
     def to_dict(self):
         # Get all projects this member is assigned to
@@ -30,7 +41,7 @@ class TeamMember(db.Model):
             'skills': self.skills,
             'workload': self.workload,
             'projects': projects,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class Project(db.Model):
@@ -39,21 +50,58 @@ class Project(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), unique=True, nullable=False)
-    description = db.Column(db.Text)
+    # Large free text, deferred: loaded together on first access or with undefer_group('text')
+    description = db.deferred(db.Column(db.Text), group='text')
     status = db.Column(db.String(50), default='planning', nullable=False)
-    starred = db.Column(db.Boolean, default=False)
-    meeting_minutes = db.Column(db.Text)
-    channels = db.Column(ARRAY(db.String), default=[], nullable=True)  # Channels field
-    applications = db.Column(ARRAY(db.String), default=[], nullable=True)  # New: applications field
+    # starred and created_at are keyset pagination keys: never NULL
+    starred = db.Column(db.Boolean, default=False, server_default=db.false(), nullable=False)
+    meeting_minutes = db.deferred(db.Column(db.Text), group='text')
     delivery_date = db.Column(db.Date, nullable=True)  # Delivery date field
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.current_timestamp(),
+                           nullable=False)
+    # Also bumped when anything in the project's tree changes (differential backups, app/backups.py)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
-    # Relationships
-    images = db.relationship('ProjectImage', back_populates='project', cascade='all, delete-orphan')
-    links = db.relationship('ProjectLink', back_populates='project', cascade='all, delete-orphan')
-    project_teams = db.relationship('ProjectTeam', back_populates='project', cascade='all, delete-orphan')
-    tasks = db.relationship('Task', back_populates='project', cascade='all, delete-orphan')
+    # Relationships (deleting a project leaves its children to ON DELETE CASCADE in the database)
+    # Tasks and images are listed in their manual order (see app/ordering.py)
+    images = db.relationship('ProjectImage', back_populates='project', cascade='all, delete-orphan',
+                             passive_deletes=True, order_by='(ProjectImage.rank, ProjectImage.id)')
+    links = db.relationship('ProjectLink', back_populates='project', cascade='all, delete-orphan',
+                            passive_deletes=True)
+    project_teams = db.relationship('ProjectTeam', back_populates='project', cascade='all, delete-orphan',
+                                    passive_deletes=True)
+    tasks = db.relationship('Task', back_populates='project', cascade='all, delete-orphan', passive_deletes=True,
+                            order_by='(Task.rank, Task.id)')
+    minutes_revisions = db.relationship('MeetingMinutesRevision', back_populates='project', cascade='all, delete-orphan',
+                                        passive_deletes=True)
+    # Channels and applications, in the order they were given (see app/dimensions.py)
+    channel_links = db.relationship('ProjectChannel', back_populates='project', cascade='all, delete-orphan',
+                                    passive_deletes=True, order_by='ProjectChannel.position')
+    application_links = db.relationship('ProjectApplication', back_populates='project', cascade='all, delete-orphan',
+                                        passive_deletes=True, order_by='ProjectApplication.position')
+    
+    __table_args__ = (
+        # Keyset pagination order: starred DESC, created_at DESC, id DESC
+        db.Index('ix_projects_listing', 'starred', 'created_at', 'id'),
+        # Finished projects due for the archive (app/archive.py)
+        db.Index('ix_projects_status_updated_at', 'status', 'updated_at'),
+    )
+    
+    @property
+    def channels(self):
+        return [link.channel_name for link in self.channel_links]
+    
+    @channels.setter
+    def channels(self, names):
+        self.channel_links = _relink(self.channel_links, ProjectChannel, 'channel_name', names)
+    
+    @property
+    def applications(self):
+        return [link.application_name for link in self.application_links]
+    
+    @applications.setter
+    def applications(self, names):
+        self.application_links = _relink(self.application_links, ProjectApplication, 'application_name', names)
     
     def to_dict(self, include_tasks=True):
         result = {
@@ -65,11 +113,11 @@ class Project(db.Model):
             'meetingMinutes': self.meeting_minutes,
             'channels': self.channels or [],  # Include channels in response
             'applications': self.applications or [],  # New: include applications in response
-            'deliveryDate': self.delivery_date.isoformat() if self.delivery_date else None,  # Include delivery date
-            'images': [img.to_dict() for img in self.images],
+            'deliveryDate': self.delivery_date,  # Include delivery date
+            'images': [img.to_dict(position) for position, img in enumerate(self.images)],
             'links': [link.to_dict() for link in self.links],
-            'team': [pt.member.name for pt in self.project_teams],
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'team': [pt.member_name for pt in self.project_teams],
+            'created_at': self.created_at
         }
         
         if include_tasks:
@@ -77,24 +125,47 @@ class Project(db.Model):
         
         return result
 
+def _relink(links, model, attr, names):
+    """Junction rows for ``names`` in order, reusing existing rows so unchanged names aren't deleted and re-inserted"""
+    existing = {getattr(link, attr): link for link in links}
+    result = []
+    for position, name in enumerate(dict.fromkeys(names or [])):
+        link = existing.get(name) or model(**{attr: name})
+        link.position = position
+        result.append(link)
+    return result
+
 class ProjectImage(db.Model):
     """Project Image model"""
     __tablename__ = 'project_images'
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
-    image_data = db.Column(db.Text, nullable=False)  # Base64 encoded
-    display_order = db.Column(db.Integer, default=0)
+    image_data = db.Column(db.Text)  # Base64 data URL; NULL for images stored as an upload
+    upload_id = db.Column(db.String(36), db.ForeignKey('uploads.id', ondelete='CASCADE'))  # see app/uploads.py
+    rank = db.Column(RankKey, nullable=False)  # position among the project's images
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     project = db.relationship('Project', back_populates='images')
+    upload = db.relationship('Upload')
     
-    def to_dict(self):
+    __table_args__ = (
+        # A project's images in order
+        db.Index('ix_project_images_project_rank', 'project_id', 'rank'),
+        # Uploads no image uses (flask prune-uploads), and the cascade when one is deleted
+        db.Index('ix_project_images_upload_id', 'upload_id'),
+    )
+    
+    def to_dict(self, position=0):
         return {
             'id': self.id,
-            'image_data': self.image_data,
-            'display_order': self.display_order
+            # Uploaded images are referenced by URL instead of being inlined
+            'image_data': self.image_data if self.upload_id is None else f'/api/uploads/{self.upload_id}/content',
+            'upload_id': self.upload_id,
+            'rank': self.rank,
+            # Before rank keys: kept for existing clients, the image's position in its project's list
+            'display_order': position
         }
 
 class ProjectLink(db.Model):
@@ -116,21 +187,90 @@ class ProjectLink(db.Model):
             'label': self.label
         }
 
+class Channel(db.Model):
+    """Channel a project is delivered through"""
+    __tablename__ = 'channels'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Application(db.Model):
+    """Application a project belongs to"""
+    __tablename__ = 'applications'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ProjectChannel(db.Model):
+    """Project Channel (Many-to-Many between Projects and Channels)"""
+    __tablename__ = 'project_channels'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    channel_name = db.Column(db.String(255), db.ForeignKey('channels.name', ondelete='CASCADE', onupdate='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relationships
+    project = db.relationship('Project', back_populates='channel_links')
+    
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'channel_name', name='unique_project_channel'),
+        # "Projects in channel X" and per-channel counts
+        db.Index('ix_project_channels_channel', 'channel_name', 'project_id'),
+    )
+
+class ProjectApplication(db.Model):
+    """Project Application (Many-to-Many between Projects and Applications)"""
+    __tablename__ = 'project_applications'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    application_name = db.Column(db.String(255), db.ForeignKey('applications.name', ondelete='CASCADE', onupdate='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relationships
+    project = db.relationship('Project', back_populates='application_links')
+    
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'application_name', name='unique_project_application'),
+        db.Index('ix_project_applications_application', 'application_name', 'project_id'),
+    )
+
+class MeetingMinutesRevision(db.Model):
+    """Previous meeting minutes of a project (see app/minutes.py)"""
+    __tablename__ = 'meeting_minutes_revisions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False, index=True)
+    content = db.Column(db.LargeBinary, nullable=False)
+    encoding = db.Column(db.String(16), nullable=False, default='plain')  # 'plain' (UTF-8) or 'zlib'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    project = db.relationship('Project', back_populates='minutes_revisions')
+
 class ProjectTeam(db.Model):
     """Project Team (Many-to-Many between Projects and Team Members)"""
     __tablename__ = 'project_team'
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
-    member_name = db.Column(db.String(255), db.ForeignKey('team_members.name', ondelete='CASCADE', onupdate='CASCADE'), nullable=False)
+    member_id = db.Column(db.Integer, db.ForeignKey('team_members.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    project = db.relationship('Project', back_populates='project_teams')
+    project = db.relationship('Project', back_populates='project_teams', lazy='joined', innerjoin=True)  # name is always needed
     member = db.relationship('TeamMember', back_populates='project_teams')
     
+    # Read/written by name through the member map (app/members.py)
+    member_name = member_name_property('member_id', 'member')
+    
     __table_args__ = (
-        db.UniqueConstraint('project_id', 'member_name', name='unique_project_member'),
+        db.UniqueConstraint('project_id', 'member_id', name='unique_project_member'),
+        # A member's projects and assignment counts
+        db.Index('ix_project_team_member_id', 'member_id'),
     )
 
 class Task(db.Model):
@@ -143,26 +283,41 @@ class Task(db.Model):
     completed = db.Column(db.Boolean, default=False)
     start_date = db.Column(db.Date)
     end_date = db.Column(db.Date)
-    assignee_name = db.Column(db.String(255), db.ForeignKey('team_members.name', ondelete='SET NULL', onupdate='CASCADE'))
-    display_order = db.Column(db.Integer, default=0)
+    assignee_id = db.Column(db.Integer, db.ForeignKey('team_members.id', ondelete='SET NULL'))
+    rank = db.Column(RankKey, nullable=False)  # position in the project's task list
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     project = db.relationship('Project', back_populates='tasks')
-    assignee = db.relationship('TeamMember', foreign_keys=[assignee_name], back_populates='tasks')
-    subtasks = db.relationship('Subtask', back_populates='task', cascade='all, delete-orphan')
+    assignee = db.relationship('TeamMember', foreign_keys=[assignee_id], back_populates='tasks')
+    subtasks = db.relationship('Subtask', back_populates='task', cascade='all, delete-orphan', lazy='selectin',
+                               passive_deletes=True, order_by='(Subtask.rank, Subtask.id)')
     
-    def to_dict(self):
-        return {
+    assignee_name = member_name_property('assignee_id', 'assignee')
+    
+    __table_args__ = (
+        # Tasks of a project, and its open/total counts for the summary listing
+        db.Index('ix_tasks_project_completed', 'project_id', 'completed'),
+        # A project's tasks in order
+        db.Index('ix_tasks_project_rank', 'project_id', 'rank'),
+        db.Index('ix_tasks_assignee_id', 'assignee_id'),
+    )
+    
+    def to_dict(self, include_subtasks=True):
+        result = {
             'id': self.id,
             'text': self.text,
             'completed': self.completed,
-            'startDate': self.start_date.isoformat() if self.start_date else None,
-            'endDate': self.end_date.isoformat() if self.end_date else None,
-            'assignee': self.assignee_name,
-            'subtasks': [subtask.to_dict() for subtask in self.subtasks]
+            'startDate': self.start_date,
+            'endDate': self.end_date,
+            'assignee': self.assignee_name
         }
+        
+        if include_subtasks:
+            result['subtasks'] = [subtask.to_dict() for subtask in self.subtasks]
+        
+        return result
 
 class Subtask(db.Model):
     """Subtask model"""
@@ -172,14 +327,22 @@ class Subtask(db.Model):
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='CASCADE'), nullable=False)
     text = db.Column(db.Text, nullable=False)
     completed = db.Column(db.Boolean, default=False)
-    assignee_name = db.Column(db.String(255), db.ForeignKey('team_members.name', ondelete='SET NULL', onupdate='CASCADE'))
-    display_order = db.Column(db.Integer, default=0)
+    assignee_id = db.Column(db.Integer, db.ForeignKey('team_members.id', ondelete='SET NULL'))
+    rank = db.Column(RankKey, nullable=False)  # position in the task's subtask list
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     task = db.relationship('Task', back_populates='subtasks')
-    assignee = db.relationship('TeamMember', foreign_keys=[assignee_name], back_populates='subtasks')
+    assignee = db.relationship('TeamMember', foreign_keys=[assignee_id], back_populates='subtasks')
+    
+    assignee_name = member_name_property('assignee_id', 'assignee')
+    
+    __table_args__ = (
+        # A task's subtasks in order (also the lookup behind loading and cascading from tasks)
+        db.Index('ix_subtasks_task_rank', 'task_id', 'rank'),
+        db.Index('ix_subtasks_assignee_id', 'assignee_id'),
+    )
     
     def to_dict(self):
         return {
@@ -199,14 +362,14 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    posts = db.relationship('Post', backref='author', lazy=True, cascade='all, delete-orphan')
+    posts = db.relationship('Post', backref=db.backref('author', lazy='joined'), lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
             'id': self.id,
             'username': self.username,
             'email': self.email,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
 class Post(db.Model):
@@ -220,6 +383,11 @@ class Post(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Keyset pagination order: created_at DESC, id DESC
+        db.Index('ix_posts_created_at_id', 'created_at', 'id'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -227,6 +395,153 @@ class Post(db.Model):
             'content': self.content,
             'user_id': self.user_id,
             'author': self.author.username if self.author else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+class EntityCounter(db.Model):
+    """Row counts maintained incrementally by app/counters.py"""
+    __tablename__ = 'entity_counters'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Upload(db.Model):
+    """File received by app/uploads.py; its bytes live under UPLOAD_DIR"""
+    __tablename__ = 'uploads'
+    
+    id = db.Column(db.String(36), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(255), nullable=False)
+    size = db.Column(db.BigInteger)  # declared size of a resumable upload, final size once complete
+    sha256 = db.Column(db.String(64))
+    status = db.Column(db.String(16), nullable=False, default='pending')  # pending / complete
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        # Expired pending uploads (flask prune-uploads)
+        db.Index('ix_uploads_status_created_at', 'status', 'created_at'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'contentType': self.content_type,
+            'size': self.size,
+            'sha256': self.sha256,
+            'status': self.status,
+            'created_at': self.created_at,
+            'completed_at': self.completed_at
+        }
+
+class Backup(db.Model):
+    """One file of a backup chain (app/backups.py): a full snapshot or the changes since the previous backup"""
+    __tablename__ = 'backups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(8), nullable=False)  # full / diff
+    # Full backup a diff builds on (NULL for a full backup); deleting it removes the whole chain
+    base_id = db.Column(db.Integer, db.ForeignKey('backups.id', ondelete='CASCADE'), index=True)
+    since = db.Column(db.DateTime)  # previous backup's cutoff (diffs)
+    taken_at = db.Column(db.DateTime, nullable=False)  # changes up to this moment are included
+    encoding = db.Column(db.String(32), nullable=False)  # e.g. msgpack+zstd, json+zlib
+    size = db.Column(db.BigInteger)
+    sha256 = db.Column(db.String(64))
+    team_members = db.Column(db.Integer, default=0)
+    projects = db.Column(db.Integer, default=0)
+    deleted = db.Column(db.Integer, default=0)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'base_id': self.base_id,
+            'since': self.since,
+            'taken_at': self.taken_at,
+            'encoding': self.encoding,
+            'size': self.size,
+            'sha256': self.sha256,
+            'teamMembers': self.team_members,
+            'projects': self.projects,
+            'deleted': self.deleted
+        }
+
+class Tombstone(db.Model):
+    """A deleted project or team member, carried by the next differential backup (row_id NULL: every row)"""
+    __tablename__ = 'tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(32), nullable=False)  # project / team_member
+    row_id = db.Column(db.Integer)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class ArchivedProject(db.Model):
+    """A finished project moved out of the hot tables with its whole tree, compressed (app/archive.py)"""
+    __tablename__ = 'archived_projects'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, index=True)  # the project's id while it was live (not a foreign key)
+    # Not unique: a project recreated under the same name can be archived again
+    name = db.Column(db.String(255), nullable=False, index=True)
+    status = db.Column(db.String(50), nullable=False)
+    delivery_date = db.Column(db.Date)
+    created_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)  # the project's last change (updated_at)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    task_count = db.Column(db.Integer, default=0)
+    encoding = db.Column(db.String(32), nullable=False)  # as backups: msgpack+zstd, json+zlib, ...
+    size = db.Column(db.Integer)
+    # Deferred: listings shouldn't read the trees
+    data = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    
+    __table_args__ = (
+        # Listing order: archived_at DESC, id DESC
+        db.Index('ix_archived_projects_listing', 'archived_at', 'id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'projectId': self.project_id,
+            'name': self.name,
+            'status': self.status,
+            'deliveryDate': self.delivery_date,
+            'created_at': self.created_at,
+            'finishedAt': self.finished_at,
+            'archivedAt': self.archived_at,
+            'taskCount': self.task_count,
+            'size': self.size
+        }
+
+class Job(db.Model):
+    """Background job (import, restore, merge, export, project sync); see app/jobs.py"""
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.String(36), primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='queued', index=True)
+    progress = db.Column(db.Float, nullable=False, default=0.0)
+    # Deferred: status polls shouldn't load a whole snapshot
+    payload = db.deferred(db.Column(db.Text))  # JSON input, cleared once the job finishes
+    result = db.deferred(db.Column(db.Text))   # JSON result of a succeeded job
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    # Stamped periodically while running, so jobs lost with their worker can be found
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
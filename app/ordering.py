@@ -0,0 +1,330 @@
+"""
+Manual ordering of tasks, subtasks and project images.
+
+Each row carries a ``rank``: a short string key, and siblings (a project's
+tasks or images, a task's subtasks) are listed in ``ORDER BY rank, id``
+straight from SQL (the relationships in models.py are ordered that way).
+Moving an item gives it a new key strictly between its new neighbours'
+keys, so a drag-and-drop move updates exactly that one row:
+
+    PUT /api/tasks/<id>/position                      {"after": <task id>}
+    PUT /api/subtasks/<id>/position                   {"before": <subtask id>}
+    PUT /api/projects/<pid>/images/<id>/position      {"after": null}
+
+``after: null`` moves the item to the front, ``before: null`` to the end.
+
+Keys are base-62 fractional indexes (digits ``0-9A-Za-z``, compared
+bytewise): an integer part whose length is encoded in its first character
+(``a0``, ``a1`` ... ``az``, ``b00`` ...), so appending stays short, followed
+by an optional fraction for keys made between two neighbours. New rows
+without a key are appended after their last sibling just before the
+session flushes.
+
+Repeated moves into the same gap make keys longer. When a move produces a
+key longer than ``RANK_REBALANCE_LENGTH`` the siblings are renumbered by a
+background job (app/jobs.py); ``flask rebalance-ranks`` does the same for
+every list with long keys and can be run periodically. A move that would
+still produce a key longer than ``RANK_MAX_LENGTH`` (the job hasn't run
+yet, the column holds 64 characters) renumbers the list in its own
+transaction first. So does a move next to a key two siblings share:
+concurrent moves into the same gap, or concurrent appends, compute the
+same key, and no key fits between equal neighbours.
+"""
+
+from sqlalchemy import bindparam, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.models import ProjectImage, Subtask, Task
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+INTEGER_ZERO = 'a0'
+SMALLEST_INTEGER = 'A' + DIGITS[0] * 26
+
+# Ranked model -> (parent foreign key, parent relationship)
+RANKED = {
+    Task: ('project_id', 'project'),
+    Subtask: ('task_id', 'task'),
+    ProjectImage: ('project_id', 'project'),
+}
+
+# Table name (job payloads, CLI) -> ranked model
+RANKED_TABLES = {model.__tablename__: model for model in RANKED}
+
+# Rows renumbered per UPDATE batch while rebalancing
+REBALANCE_BATCH_SIZE = 1000
+
+# Width of the rank columns (models.py RankKey)
+RANK_COLUMN_LENGTH = 64
+
+_rebalance_length = 16
+_max_length = 48
+
+
+# ============= Keys =============
+
+def _integer_length(head):
+    if 'a' <= head <= 'z':
+        return ord(head) - ord('a') + 2
+    if 'A' <= head <= 'Z':
+        return ord('Z') - ord(head) + 2
+    raise ValueError(f'Invalid rank key head: {head!r}')
+
+
+def _split(key):
+    """(integer part, fraction) of a rank key; ValueError if malformed"""
+    if not key or key == SMALLEST_INTEGER:
+        raise ValueError(f'Invalid rank key: {key!r}')
+    length = _integer_length(key[0])
+    integer, fraction = key[:length], key[length:]
+    if len(integer) < length or fraction.endswith(DIGITS[0]) or any(c not in DIGITS for c in key[1:]):
+        raise ValueError(f'Invalid rank key: {key!r}')
+    return integer, fraction
+
+
+def _midpoint(a, b):
+    """Fraction strictly between fractions ``a`` and ``b`` (``b`` None: 1)"""
+    if b is not None:
+        # Shared prefix (a padded with zeros) stays as is
+        n = 0
+        while (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _step_integer(integer, step):
+    """Next (step 1) or previous (step -1) integer part; None past the last one"""
+    head, digits = integer[0], list(integer[1:])
+    last = len(DIGITS) - 1
+    for i in reversed(range(len(digits))):
+        d = DIGITS.index(digits[i]) + step
+        if 0 <= d <= last:
+            digits[i] = DIGITS[d]
+            return head + ''.join(digits)
+        digits[i] = DIGITS[0] if step > 0 else DIGITS[last]
+    # Carried past the first digit: one more (or one fewer) digit
+    if step > 0:
+        if head == 'z':
+            return None
+        if head == 'Z':
+            return INTEGER_ZERO
+        head = chr(ord(head) + 1)
+        return head + ''.join(digits + [DIGITS[0]] if head > 'a' else digits[:-1])
+    if head == 'A':
+        return None
+    if head == 'a':
+        return 'Z' + DIGITS[last]
+    head = chr(ord(head) - 1)
+    return head + ''.join(digits + [DIGITS[last]] if head < 'Z' else digits[:-1])
+
+
+def key_between(a, b):
+    """A rank key sorting strictly between ``a`` and ``b`` (None: open end)"""
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f'Rank keys out of order: {a!r} >= {b!r}')
+    if a is None:
+        if b is None:
+            return INTEGER_ZERO
+        integer, fraction = _split(b)
+        if integer == SMALLEST_INTEGER:
+            return integer + _midpoint('', fraction)
+        if fraction:
+            return integer
+        previous = _step_integer(integer, -1)
+        if previous is None:
+            raise ValueError('No rank key before the smallest key')
+        return previous
+    integer, fraction = _split(a)
+    if b is None:
+        following = _step_integer(integer, 1)
+        return integer + _midpoint(fraction, None) if following is None else following
+    integer_b, fraction_b = _split(b)
+    if integer == integer_b:
+        return integer + _midpoint(fraction, fraction_b)
+    following = _step_integer(integer, 1)
+    if following is not None and following < b:
+        return following
+    return integer + _midpoint(fraction, None)
+
+
+def rank_keys(start=None):
+    """Endless ascending keys after ``start``: a0, a1, ... az, b00, ..."""
+    key = start
+    while True:
+        key = key_between(key, None)
+        yield key
+
+
+def ranked(items):
+    """Number ``items`` in list order (new rows built from a payload); returns the list"""
+    for item, key in zip(items, rank_keys()):
+        item.rank = key
+    return items
+
+
+# ============= Moves =============
+
+def _siblings(model, obj):
+    fk, _ = RANKED[model]
+    return getattr(model, fk) == getattr(obj, fk), model.id != obj.id
+
+
+def _neighbours(session, model, obj, anchor_id, after):
+    """(lower, upper) keys around the target position and whether a sibling shares the anchor's key"""
+    siblings = _siblings(model, obj)
+    if anchor_id is None:
+        edge = select(func.min(model.rank) if after else func.max(model.rank)).where(*siblings)
+        edge_rank = session.execute(edge).scalar()
+        return ((None, edge_rank) if after else (edge_rank, None)), False
+    # The anchor's key, the next key on the far side of it and its ties, in one statement
+    anchor = select(model.rank).where(model.id == anchor_id, *siblings).scalar_subquery()
+    neighbour = (
+        select(func.min(model.rank)).where(*siblings, model.rank > anchor) if after
+        else select(func.max(model.rank)).where(*siblings, model.rank < anchor)
+    ).scalar_subquery()
+    ties = select(func.count()).where(*siblings, model.rank == anchor, model.id != anchor_id).scalar_subquery()
+    anchor_rank, neighbour_rank, tied = session.execute(select(anchor, neighbour, ties)).one()
+    if anchor_rank is None:
+        raise ValueError(f'{model.__name__} {anchor_id} is not in the same list')
+    return ((anchor_rank, neighbour_rank) if after else (neighbour_rank, anchor_rank)), tied > 0
+
+
+def move(session, obj, data):
+    """Give ``obj`` a rank right after/before a sibling, per ``{"after": id}`` or ``{"before": id}``.
+
+    Only ``obj.rank`` changes (the caller commits), unless the list has to
+    be renumbered first (a tie at the anchor, or a key longer than
+    ``RANK_MAX_LENGTH``). Returns the new key; ValueError (400) for a
+    missing position or an id that isn't a sibling.
+    """
+    model = type(obj)
+    if 'after' in data:
+        anchor_id, after = data['after'], True
+    elif 'before' in data:
+        anchor_id, after = data['before'], False
+    else:
+        raise ValueError("'after' or 'before' is required")
+    (lower, upper), tied = _neighbours(session, model, obj, anchor_id, after)
+    key = None if tied else key_between(lower, upper)
+    if key is None or len(key) > _max_length:
+        _renumber(session, model, [getattr(obj, RANKED[model][0])])
+        # Its stored key changed underneath the session: make sure the new one is written
+        session.expire(obj, ['rank'])
+        (lower, upper), _ = _neighbours(session, model, obj, anchor_id, after)
+        key = key_between(lower, upper)
+    obj.rank = key
+    return key
+
+
+def rebalance_due(rank):
+    """True when ``rank`` is long enough that its list should be renumbered"""
+    return rank is not None and len(rank) > _rebalance_length
+
+
+# ============= Rebalancing =============
+
+def _renumber(session, model, parent_ids):
+    """Renumber the lists of ``parent_ids`` to consecutive keys (the caller commits); returns rows changed"""
+    parent = getattr(model, RANKED[model][0])
+    # Locked so moves committed meanwhile are read before renumbering (no-op on SQLite)
+    rows = session.execute(
+        select(model.id, parent.label('parent_id'), model.rank).where(parent.in_(parent_ids))
+        .order_by(parent, model.rank, model.id).with_for_update()
+    )
+    changes, keys, current = [], None, object()
+    for row in rows:
+        if row.parent_id != current:
+            keys, current = rank_keys(), row.parent_id
+        key = next(keys)
+        if key != row.rank:
+            changes.append({'row_id': row.id, 'new_rank': key})
+    if changes:
+        # Core executemany: order is unchanged, so this isn't a data change for caches or counters
+        table = model.__table__
+        session.execute(
+            update(table).where(table.c.id == bindparam('row_id')).values(rank=bindparam('new_rank')),
+            changes
+        )
+    return len(changes)
+
+
+def rebalance_ranks(session, tables=None, parent_ids=None, min_length=None, progress=None):
+    """Renumber sibling lists to short consecutive keys, keeping their order.
+
+    Lists are limited to ``parent_ids`` when given, else to those holding a
+    key longer than ``min_length`` (every list when None). Only rows whose key
+    changes are written; commits once per batch of lists. Returns
+    {table: rows renumbered}.
+    """
+    result = {}
+    tables = tables or list(RANKED_TABLES)
+    for n, name in enumerate(tables):
+        model = RANKED_TABLES[name]
+        parent = getattr(model, RANKED[model][0])
+        if parent_ids is not None:
+            parents = list(parent_ids)
+        else:
+            stmt = select(parent).distinct()
+            if min_length is not None:
+                stmt = stmt.where(func.length(model.rank) > min_length)
+            parents = list(session.scalars(stmt))
+        result[name] = 0
+        for start in range(0, len(parents), REBALANCE_BATCH_SIZE):
+            chunk = parents[start:start + REBALANCE_BATCH_SIZE]
+            result[name] += _renumber(session, model, chunk)
+            session.commit()
+            if progress is not None:
+                progress(n + (start + len(chunk)) / max(len(parents), 1), len(tables))
+    return result
+
+
+# ============= Session hooks =============
+
+def _parent_key(obj):
+    """Parent id of a new ranked row, or the pending parent object itself"""
+    fk, relation = RANKED[type(obj)]
+    parent_id = getattr(obj, fk)
+    if parent_id is not None:
+        return parent_id
+    parent = obj.__dict__.get(relation)
+    if parent is None:
+        return None
+    identity = inspect(parent).identity
+    return identity[0] if identity else parent
+
+
+def _assign_ranks(session, flush_context, instances):
+    pending = [obj for obj in session.new if type(obj) in RANKED and obj.rank is None]
+    if not pending:
+        return
+    lists = {}
+    for obj in pending:
+        lists.setdefault((type(obj), _parent_key(obj)), []).append(obj)
+    # Last key of each existing list, one statement per model
+    last = {}
+    with session.no_autoflush:
+        for model in {model for model, _ in lists}:
+            ids = [key for m, key in lists if m is model and isinstance(key, int)]
+            if ids:
+                parent = getattr(model, RANKED[model][0])
+                rows = session.execute(select(parent, func.max(model.rank)).where(parent.in_(ids)).group_by(parent))
+                last.update({(model, parent_id): rank for parent_id, rank in rows})
+    for (model, key), objects in lists.items():
+        for obj, rank in zip(objects, rank_keys(last.get((model, key)))):
+            obj.rank = rank
+
+
+def init_ordering(app):
+    """Append new tasks, subtasks and images to their lists on flush"""
+    global _rebalance_length, _max_length
+    _rebalance_length = int(app.config.get('RANK_REBALANCE_LENGTH', 16))
+    _max_length = min(int(app.config.get('RANK_MAX_LENGTH', 48)), RANK_COLUMN_LENGTH)
+    if not event.contains(Session, 'before_flush', _assign_ranks):
+        event.listen(Session, 'before_flush', _assign_ranks)
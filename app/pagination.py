@@ -0,0 +1,135 @@
+"""
+Keyset (cursor) pagination.
+
+A page is fetched with ``WHERE (sort keys) < (last row's keys) ORDER BY ...
+LIMIT n`` instead of ``OFFSET``, so page 500 costs the same index range scan
+as page 1 and rows inserted or deleted meanwhile don't shift items between
+pages. The position is handed to clients as an opaque cursor token.
+
+Sort keys must be non-null and end with a unique column (the primary key)
+so the ordering is total.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import and_, func, or_, select, text, tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class InvalidCursor(ValueError):
+    """Cursor token that can't be decoded for this listing"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+    return value
+
+
+def encode_cursor(values):
+    """Opaque token for a row's sort key values"""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Sort key values from a token produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = [_decode_value(v) for v in json.loads(raw)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+    if len(values) != size or any(v is None for v in values):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def parse_limit(value, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    """Page size from a query-string value, clamped to 1..maximum"""
+    if value in (None, ''):
+        return default
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+
+
+class Keyset:
+    """Ordered sort keys of a listing: [(attribute name, descending), ...]"""
+
+    def __init__(self, model, keys):
+        self.model = model
+        self.keys = keys
+
+    def columns(self):
+        return [getattr(self.model, name) for name, _ in self.keys]
+
+    def order_by(self):
+        return [col.desc() if desc else col.asc() for col, (_, desc) in zip(self.columns(), self.keys)]
+
+    def after(self, values):
+        """WHERE clause selecting rows that sort after the given key values"""
+        columns = self.columns()
+        directions = {desc for _, desc in self.keys}
+        if len(directions) == 1:
+            # Row-value comparison lets the planner use one composite index range
+            lhs, rhs = tuple_(*columns), tuple_(*values)
+            return lhs < rhs if directions.pop() else lhs > rhs
+        # Mixed directions: (a > x) OR (a = x AND b < y) OR ...
+        clauses = []
+        for i, (col, (_, desc)) in enumerate(zip(columns, self.keys)):
+            equal = [c == v for c, v in zip(columns[:i], values[:i])]
+            clauses.append(and_(*equal, col < values[i] if desc else col > values[i]))
+        return or_(*clauses)
+
+    def values(self, obj):
+        return [getattr(obj, name) for name, _ in self.keys]
+
+    def page(self, session, stmt, limit, cursor=None, scalars=True):
+        """(items, next_cursor) for one page of ``stmt``; next_cursor is None on the last page.
+
+        ``scalars=False`` pages a column select; its rows must carry the sort
+        keys under their attribute names.
+        """
+        if cursor:
+            stmt = stmt.where(self.after(decode_cursor(cursor, len(self.keys))))
+        result = session.execute(stmt.order_by(*self.order_by()).limit(limit + 1))
+        items = (result.scalars().unique() if scalars else result).all()
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, encode_cursor(self.values(items[-1]))
+
+
+def estimated_count(session, model):
+    """Approximate row count from planner statistics instead of COUNT(*).
+
+    PostgreSQL reads ``pg_class.reltuples`` (kept current by autovacuum /
+    ANALYZE). SQLite has no such statistic; the largest primary key is used,
+    which is an O(log n) index lookup and an upper bound when rows were
+    deleted. Returns None when no estimate is available.
+    """
+    table = model.__table__
+    if session.get_bind().dialect.name == 'postgresql':
+        estimate = session.execute(
+            text('SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:name AS regclass)'),
+            {'name': table.name}
+        ).scalar()
+        return int(estimate) if estimate is not None and estimate >= 0 else None
+    pk = list(table.primary_key.columns)[0]
+    return session.execute(select(func.max(pk))).scalar() or 0
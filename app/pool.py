@@ -0,0 +1,265 @@
+"""
+Database connection pool configuration.
+
+Pool settings come from a named deployment profile (``DB_POOL_PROFILE``) and
+are sized from the number of gunicorn workers and threads, so every thread can
+hold a connection without the deployment exceeding the database's connection
+budget. Individual values can still be overridden with ``DB_POOL_*``
+environment variables.
+
+The pool also records how long requests wait to check out a connection, and
+SQLite connections are opened with foreign keys enforced so the models'
+``ON DELETE`` rules apply there as they do on Postgres.
+"""
+
+import math
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+def _cloudrun(workers, threads):
+    # Cloud SQL has a small connection budget shared by every instance, and
+    # idle connections are dropped by the proxy, so recycle aggressively.
+    budget = int(os.environ.get('DB_MAX_CONNECTIONS', 20))
+    share = budget // max(workers, 1)
+    pool_size = max(1, min(threads, share))
+    return {
+        'pool_size': pool_size,
+        # Overflow connections count against the budget too
+        'max_overflow': max(0, min(threads - pool_size, share - pool_size)),
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+        'pool_use_lifo': True,
+        'statement_timeout_ms': 30000,
+    }
+
+
+def _compose(workers, threads):
+    return {
+        'pool_size': threads,
+        'max_overflow': max(2, threads // 2),
+        'pool_timeout': 30,
+        'pool_recycle': 3600,
+        'pool_pre_ping': True,
+        'pool_use_lifo': False,
+        'statement_timeout_ms': 60000,
+    }
+
+
+def _dev_sqlite(workers, threads):
+    # SQLite serializes writers; extra connections only add lock contention
+    return {
+        'pool_size': min(threads, 5),
+        'max_overflow': 0,
+        'pool_timeout': 30,
+        'pool_recycle': -1,
+        'pool_pre_ping': False,
+        'pool_use_lifo': False,
+        'statement_timeout_ms': 15000,
+    }
+
+
+PROFILES = {
+    'cloudrun': _cloudrun,
+    'compose': _compose,
+    'dev-sqlite': _dev_sqlite,
+}
+
+# Environment overrides applied on top of the profile
+OVERRIDES = {
+    'pool_size': ('DB_POOL_SIZE', int),
+    'max_overflow': ('DB_MAX_OVERFLOW', int),
+    'pool_timeout': ('DB_POOL_TIMEOUT', float),
+    'pool_recycle': ('DB_POOL_RECYCLE', int),
+    'pool_pre_ping': ('DB_POOL_PRE_PING', lambda v: v.lower() in ('1', 'true', 'yes')),
+    'pool_use_lifo': ('DB_POOL_USE_LIFO', lambda v: v.lower() in ('1', 'true', 'yes')),
+    'statement_timeout_ms': ('DB_STATEMENT_TIMEOUT_MS', int),
+}
+
+
+def worker_counts():
+    """Return (workers, threads) for this deployment"""
+    workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 8))
+    return workers, threads
+
+
+def detect_profile(database_url):
+    """Pick a profile from DB_POOL_PROFILE or the environment"""
+    profile = os.environ.get('DB_POOL_PROFILE')
+    if profile:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown DB_POOL_PROFILE '{profile}'. Expected one of: {', '.join(PROFILES)}")
+        return profile
+    if database_url.startswith('sqlite'):
+        return 'dev-sqlite'
+    if os.environ.get('K_SERVICE'):  # set by Cloud Run
+        return 'cloudrun'
+    return 'compose'
+
+
+def resolve_settings(database_url, profile=None, workers=None, threads=None):
+    """Return the profile name and its settings after environment overrides"""
+    profile = profile or detect_profile(database_url)
+    default_workers, default_threads = worker_counts()
+    settings = PROFILES[profile](workers or default_workers, threads or default_threads)
+    for key, (env, cast) in OVERRIDES.items():
+        if os.environ.get(env):
+            settings[key] = cast(os.environ[env])
+    return profile, settings
+
+
+def engine_options(database_url, profile=None, workers=None, threads=None):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for the given database URL"""
+    profile, settings = resolve_settings(database_url, profile, workers, threads)
+    timeout_ms = settings.pop('statement_timeout_ms')
+
+    if database_url.startswith('sqlite'):
+        # sqlite3's busy timeout is the closest equivalent of a statement timeout
+        connect_args = {'timeout': timeout_ms / 1000}
+        if database_url in ('sqlite://', 'sqlite:///:memory:'):
+            # In-memory databases use a single static connection; no pool to tune
+            return {'connect_args': connect_args}
+    else:
+        connect_args = {'options': f'-c statement_timeout={timeout_ms}'}
+
+    return dict(settings, poolclass=InstrumentedQueuePool, connect_args=connect_args)
+
+
+def async_database_url(database_url):
+    """Map a sync database URL to its asyncio driver (asyncpg / aiosqlite)"""
+    if database_url.startswith('sqlite:'):
+        return database_url.replace('sqlite:', 'sqlite+aiosqlite:', 1)
+    if database_url.startswith(('postgresql:', 'postgresql+psycopg2:')):
+        return 'postgresql+asyncpg:' + database_url.split(':', 1)[1]
+    return database_url
+
+
+def async_engine_options(database_url, profile=None, workers=None, threads=None):
+    """Build create_async_engine() options from the same profile as the sync engine"""
+    profile, settings = resolve_settings(database_url, profile, workers, threads)
+    timeout_ms = settings.pop('statement_timeout_ms')
+
+    if database_url.startswith('sqlite'):
+        connect_args = {'timeout': timeout_ms / 1000}
+        if database_url in ('sqlite://', 'sqlite:///:memory:'):
+            return {'connect_args': connect_args}
+    else:
+        connect_args = {'server_settings': {'statement_timeout': str(timeout_ms)}}
+
+    return dict(settings, connect_args=connect_args)
+
+
+def _enable_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def enforce_sqlite_foreign_keys(engine):
+    """Turn on FOREIGN KEY / ON DELETE enforcement for every new SQLite connection of ``engine``"""
+    if engine.dialect.name == 'sqlite' and not event.contains(engine, 'connect', _enable_foreign_keys):
+        event.listen(engine, 'connect', _enable_foreign_keys)
+
+
+class PoolWaitStats:
+    """Thread-safe checkout wait-time counters for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Callables notified of every checkout as (seconds, timed_out)
+        self.observers = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if timed_out:
+                self.timeouts += 1
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+        for observer in self.observers:
+            observer(seconds, timed_out)
+
+    def percentile(self, q):
+        """Approximate percentile (upper bucket bound) of the wait time"""
+        with self._lock:
+            target = math.ceil(self.checkouts * q)
+            seen = 0
+            for bound, count in zip(WAIT_BUCKETS + (math.inf,), self.buckets):
+                seen += count
+                if target and seen >= target:
+                    return bound
+        return 0.0
+
+    def to_dict(self):
+        p95 = self.percentile(0.95)
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avgWaitMs': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'maxWaitMs': round(self.max_wait * 1000, 3),
+                'p95WaitMs': None if math.isinf(p95) else p95 * 1000,
+                'waitBuckets': {
+                    ('+Inf' if math.isinf(bound) else str(bound)): count
+                    for bound, count in zip(WAIT_BUCKETS + (math.inf,), self.buckets)
+                },
+            }
+
+
+wait_stats = PoolWaitStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            wait_stats.record(time.perf_counter() - start, timed_out)
+
+
+def pool_status(engine):
+    """Snapshot of the engine's pool occupancy and wait-time metrics"""
+    pool = engine.pool
+    status = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checkedIn': pool.checkedin(),
+            'checkedOut': pool.checkedout(),
+            'overflow': max(0, pool.overflow()),
+            'maxOverflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    status['wait'] = wait_stats.to_dict()
+    return status
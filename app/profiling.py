@@ -0,0 +1,256 @@
+"""
+Opt-in request profiling and SQL query instrumentation.
+
+With ``PROFILE_REQUESTS=1`` every request records wall time, SQL statement
+count and total SQL time (via ``before/after_cursor_execute``), JSON
+serialization time and response size. The numbers are returned in a
+``Server-Timing`` header and logged as one JSON line per request on the
+``app.profiling`` logger.
+
+Sampling mode (``PROFILE_SAMPLE_RATE`` > 0) runs a sampled fraction of
+requests under cProfile (or pyinstrument when installed) and writes the
+profile to ``PROFILE_DIR`` when the request took at least ``PROFILE_SLOW_MS``.
+
+``count_queries()`` exposes the same SQL counters to scripts and benchmarks.
+Requests served on the event loop (app/asgi.py) count the statements of
+their own connection (``count_connection_queries``), since concurrent
+requests share the loop's thread; they get the same header and log line but
+are never sampled.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('app.profiling')
+
+_local = threading.local()
+
+# cProfile/pyinstrument can't profile two threads at once; sample one request at a time
+_profiler_lock = threading.Lock()
+
+
+class QueryCounter:
+    """SQL statements executed on the current thread while active"""
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.duration = 0.0
+        self.keep_statements = keep_statements
+        self.statements = []
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.duration += elapsed
+        if self.keep_statements:
+            self.statements.append(statement)
+
+
+def _active_counters():
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    return counters
+
+
+@contextmanager
+def count_queries(keep_statements=False):
+    """Count SQL statements executed on this thread inside the block"""
+    counter = QueryCounter(keep_statements)
+    counters = _active_counters()
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+@contextmanager
+def count_connection_queries(connection, counter):
+    """Count SQL statements executed on ``connection`` inside the block"""
+    counters = connection.info.setdefault('query_counters', [])
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    for counter in _active_counters() + conn.info.get('query_counters', []):
+        counter.record(statement, elapsed)
+
+
+def install_query_hooks():
+    """Listen to cursor execution on every engine (idempotent)"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def server_timing(queries, serialize, total):
+    """Server-Timing header value: SQL, serialization and total time (seconds in, ms out)"""
+    return ', '.join([
+        f'db;dur={queries.duration * 1000:.2f};desc="{queries.count} queries"',
+        f'serialize;dur={serialize * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ])
+
+
+def request_record(method, path, endpoint, status, total, queries, serialize, size):
+    """The JSON log line of one profiled request (as a dict)"""
+    return {
+        'event': 'request',
+        'method': method,
+        'path': path,
+        'endpoint': endpoint,
+        'status': status,
+        'duration_ms': round(total * 1000, 2),
+        'sql_count': queries.count,
+        'sql_ms': round(queries.duration * 1000, 2),
+        'serialize_ms': round(serialize * 1000, 2),
+        'response_bytes': size,
+    }
+
+
+class _Profiler:
+    """Thin wrapper over pyinstrument or cProfile"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        if kind == 'pyinstrument':
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+        else:
+            import cProfile
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def dump(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+        if self.kind == 'pyinstrument':
+            path = os.path.join(directory, f'{name}.html')
+            with open(path, 'w') as f:
+                f.write(self._profiler.output_html())
+        else:
+            path = os.path.join(directory, f'{name}.prof')
+            self._profiler.dump_stats(path)
+        return path
+
+
+def _profiler_kind(name):
+    if name in ('auto', 'pyinstrument'):
+        try:
+            import pyinstrument  # noqa: F401
+            return 'pyinstrument'
+        except ImportError:
+            if name == 'pyinstrument':
+                print("⚠ pyinstrument is not installed, sampling with cProfile")
+    return 'cprofile'
+
+
+def init_profiling(app):
+    """Register request instrumentation when PROFILE_REQUESTS is enabled"""
+    if not app.config.get('PROFILE_REQUESTS'):
+        return
+
+    install_query_hooks()
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    slow_ms = app.config.get('PROFILE_SLOW_MS', 500)
+    profile_dir = app.config.get('PROFILE_DIR', '/tmp/it-resource-profiles')
+    kind = _profiler_kind(app.config.get('PROFILER', 'auto'))
+
+    # Time JSON serialization done through jsonify()
+    json_response = app.json.response
+
+    def timed_response(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return json_response(*args, **kwargs)
+        finally:
+            if has_request_context() and 'profile' in g:
+                g.profile['serialize'] += time.perf_counter() - start
+
+    app.json.response = timed_response
+
+    @app.before_request
+    def start_profile():
+        counter = QueryCounter()
+        _active_counters().append(counter)
+        g.profile = {'start': time.perf_counter(), 'queries': counter, 'serialize': 0.0, 'profiler': None}
+        if sample_rate and random.random() < sample_rate and _profiler_lock.acquire(blocking=False):
+            try:
+                profiler = _Profiler(kind)
+                profiler.start()
+                g.profile['profiler'] = profiler
+            except Exception:
+                _profiler_lock.release()
+                raise
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.get('profile')
+        if profile is None:
+            return response
+        total = time.perf_counter() - profile['start']
+        queries = profile['queries']
+        size = None if response.is_streamed else response.calculate_content_length()
+
+        response.headers['Server-Timing'] = server_timing(queries, profile['serialize'], total)
+        record = request_record(request.method, request.path, request.endpoint, response.status_code,
+                                total, queries, profile['serialize'], size)
+
+        profiler = profile['profiler']
+        if profiler is not None:
+            profiler.stop()
+            profile['profiler'] = None
+            _profiler_lock.release()
+            if total * 1000 >= slow_ms:
+                name = f"{time.strftime('%Y%m%dT%H%M%S')}-{request.endpoint or 'unknown'}-{int(total * 1000)}ms"
+                record['profile'] = profiler.dump(profile_dir, name)
+
+        logger.info(json.dumps(record))
+        return response
+
+    @app.teardown_request
+    def cleanup_profile(exc):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        counters = _active_counters()
+        if profile['queries'] in counters:
+            counters.remove(profile['queries'])
+        if profile['profiler'] is not None:
+            # after_request didn't run (unhandled exception)
+            profile['profiler'].stop()
+            _profiler_lock.release()
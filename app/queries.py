@@ -0,0 +1,197 @@
+"""
+Read queries shared by the Flask routes and the async read path.
+
+Every function takes a SQLAlchemy ``Session`` explicitly so the same code can
+run on ``db.session`` in a Flask request or inside ``AsyncSession.run_sync``.
+Relationships walked by ``to_dict`` are eager loaded up front.
+
+The listing functions take the request's query parameters as a plain mapping
+(``request.args`` or a dict parsed from the ASGI query string): without
+``limit``/``cursor`` they return the full list as before, with either one
+they return a keyset-paginated page (see app/pagination.py). ``fields``,
+``include`` and ``exclude`` select a sparse representation that is loaded
+column- and relation-selectively (see app/fieldsets.py).
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload, undefer_group
+
+from app.dimensions import project_filters
+from app.fieldsets import Fieldset, PROJECT_FIELDS, TEAM_MEMBER_FIELDS
+from app.models import TeamMember, Project, ProjectImage, Task, Post
+from app.pagination import Keyset, estimated_count, parse_limit
+
+# Version string reported in snapshot payloads
+SNAPSHOT_VERSION = '2.5.0'
+
+# Stable sort orders for paginated listings (backed by indexes in models.py)
+PROJECT_KEYS = Keyset(Project, [('starred', True), ('created_at', True), ('id', True)])
+TEAM_MEMBER_KEYS = Keyset(TeamMember, [('id', False)])
+POST_KEYS = Keyset(Post, [('created_at', True), ('id', True)])
+
+
+def team_members_query(fieldset=None):
+    """Team members with the projects they are assigned to (or only the fieldset's)"""
+    if fieldset is not None:
+        return select(TeamMember).options(*fieldset.load_options())
+    return select(TeamMember).options(
+        selectinload(TeamMember.project_teams)
+    )
+
+
+def projects_query(fieldset=None):
+    """Projects with their full tree (or only the fieldset's columns and relations)"""
+    if fieldset is not None:
+        return select(Project).options(*fieldset.load_options())
+    return select(Project).options(
+        undefer_group('text'),
+        selectinload(Project.channel_links),
+        selectinload(Project.application_links),
+        selectinload(Project.images),
+        selectinload(Project.links),
+        selectinload(Project.project_teams),
+        selectinload(Project.tasks).selectinload(Task.subtasks),
+    )
+
+
+def project_summaries_query():
+    """Project index rows: a few columns plus task/image counts from correlated aggregate subqueries"""
+    def count(model, *criteria):
+        return (
+            select(func.count()).select_from(model)
+            .where(model.project_id == Project.id, *criteria)
+            .correlate(Project).scalar_subquery()
+        )
+
+    return select(
+        Project.id, Project.name, Project.status, Project.starred, Project.delivery_date, Project.created_at,
+        count(Task).label('task_count'),
+        count(Task, Task.completed.isnot(True)).label('open_task_count'),
+        count(ProjectImage).label('image_count'),
+    )
+
+
+def load_team_members(session, fieldset=None):
+    return session.scalars(team_members_query(fieldset).order_by(*TEAM_MEMBER_KEYS.order_by())).all()
+
+
+def load_projects(session, fieldset=None, filters=()):
+    """All projects (matching ``filters``), starred first, newest first"""
+    return session.scalars(projects_query(fieldset).where(*filters).order_by(*PROJECT_KEYS.order_by())).all()
+
+
+def member_serializer(fieldset):
+    return fieldset.serialize if fieldset is not None else lambda member: member.to_dict()
+
+
+def project_serializer(fieldset, include_tasks=True):
+    if fieldset is not None:
+        return fieldset.serialize
+    return lambda project: project.to_dict(include_tasks=include_tasks)
+
+
+def team_members_payload(session, fieldset=None):
+    serialize = member_serializer(fieldset)
+    return [serialize(member) for member in load_team_members(session, fieldset)]
+
+
+def projects_payload(session, include_tasks=True, fieldset=None, filters=()):
+    serialize = project_serializer(fieldset, include_tasks)
+    return [serialize(project) for project in load_projects(session, fieldset, filters)]
+
+
+def project_summary(row):
+    return {
+        'id': row.id,
+        'name': row.name,
+        'status': row.status,
+        'starred': row.starred,
+        'deliveryDate': row.delivery_date,
+        'taskCount': row.task_count,
+        'openTaskCount': row.open_task_count,
+        'imageCount': row.image_count
+    }
+
+
+def is_paginated(args):
+    return bool(args.get('limit') or args.get('cursor'))
+
+
+def page_payload(session, keyset, stmt, args, key, serialize, default_limit=50, scalars=True):
+    """One keyset page: {key: [...], 'next_cursor': ..., 'limit': n[, 'total_estimate': n]}
+
+    ``total=estimate`` in ``args`` adds an approximate row count from table
+    statistics; an exact COUNT(*) is never run.
+    """
+    limit = parse_limit(args.get('limit'), default=default_limit)
+    items, next_cursor = keyset.page(session, stmt, limit, args.get('cursor'), scalars=scalars)
+    payload = {key: [serialize(item) for item in items], 'next_cursor': next_cursor, 'limit': limit}
+    if args.get('total') == 'estimate':
+        payload['total_estimate'] = estimated_count(session, keyset.model)
+    return payload
+
+
+def team_members_listing(session, args):
+    """GET /api/team-members: full list, or a page when limit/cursor is given"""
+    fieldset = Fieldset.parse(TEAM_MEMBER_FIELDS, args)
+    if not is_paginated(args):
+        return team_members_payload(session, fieldset)
+    return page_payload(session, TEAM_MEMBER_KEYS, team_members_query(fieldset), args,
+                        'teamMembers', member_serializer(fieldset))
+
+
+def projects_listing(session, args):
+    """GET /api/projects: full list, or a page when limit/cursor is given (``channel``/``application`` filter)"""
+    fieldset = Fieldset.parse(PROJECT_FIELDS, args)
+    filters = project_filters(args)
+    if not is_paginated(args):
+        return projects_payload(session, fieldset=fieldset, filters=filters)
+    return page_payload(session, PROJECT_KEYS, projects_query(fieldset).where(*filters), args,
+                        'projects', project_serializer(fieldset))
+
+
+def project_summaries_listing(session, args):
+    """GET /api/projects/summary: the project index without trees, full list or a page"""
+    stmt = project_summaries_query().where(*project_filters(args))
+    if not is_paginated(args):
+        rows = session.execute(stmt.order_by(*PROJECT_KEYS.order_by()))
+        return [project_summary(row) for row in rows]
+    return page_payload(session, PROJECT_KEYS, stmt, args,
+                        'projects', project_summary, scalars=False)
+
+
+def project_detail(session, project_id, args):
+    """GET /api/projects/<id>: one project's tree (or its fieldset), None if it doesn't exist"""
+    fieldset = Fieldset.parse(PROJECT_FIELDS, args)
+    project = session.scalars(projects_query(fieldset).where(Project.id == project_id)).first()
+    if project is None:
+        return None
+    return project_serializer(fieldset)(project)
+
+
+def posts_listing(session, args):
+    """GET /api/posts: always paginated; ``per_page`` is accepted as an alias of ``limit``"""
+    if not args.get('limit') and args.get('per_page'):
+        args = {**args, 'limit': args.get('per_page')}
+    return page_payload(session, POST_KEYS, select(Post), args, 'posts',
+                        lambda post: post.to_dict(), default_limit=10)
+
+
+def snapshot_payload(session, args=None):
+    """Full dataset in the IT Resource Manager backup format.
+
+    ``args`` may select sparse fieldsets per collection (``fields[projects]``,
+    ``include[teamMembers]``, ...; plain ``fields``/``include``/``exclude``
+    apply to projects).
+    """
+    args = args or {}
+    member_fields = Fieldset.parse(TEAM_MEMBER_FIELDS, args, 'teamMembers', plain=False)
+    project_fields = Fieldset.parse(PROJECT_FIELDS, args, 'projects')
+    return {
+        'teamMembers': team_members_payload(session, member_fields),
+        'projects': projects_payload(session, fieldset=project_fields),
+        'exportDate': datetime.utcnow().isoformat(),
+        'version': SNAPSHOT_VERSION
+    }
@@ -0,0 +1,310 @@
+"""
+Server-rendered reports for the dashboard exports.
+
+``GET /api/reports/dashboard`` (master project timeline) and
+``GET /api/reports/task-overview`` build their content from a few
+column/aggregate queries instead of the browser walking the whole dataset,
+and render it with the Jinja templates in ``templates/reports``. The output
+is print-ready HTML, or PDF with ``format=pdf`` when WeasyPrint is installed.
+
+Rendered reports are cached per process by (report, format, filters, data
+version, day): ``data_version`` (app/counters.py) changes with every commit
+that touches application data, so an unchanged dataset is never rendered
+twice, and the same key is the response's ETag.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from flask import render_template
+from sqlalchemy import case, extract, func, select
+
+from app.counters import data_version
+from app.dimensions import names_by_project, project_filter
+from app.members import member_map
+from app.metrics import record_cache
+from app.models import TeamMember, Project, Task, Subtask
+from app.queries import PROJECT_KEYS
+
+FORMATS = {'html': 'text/html; charset=utf-8', 'pdf': 'application/pdf'}
+
+# Query parameters each report accepts as filters
+FILTERS = {
+    'dashboard': ('channel', 'application', 'project', 'assignee', 'month'),
+    'task-overview': ('member', 'status', 'project'),
+}
+
+TASK_STATUSES = ('delayed', 'onplan', 'done', 'nodate')
+
+_cache_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_size = 32
+
+
+class ReportFormatUnavailable(RuntimeError):
+    """Requested output format needs an optional dependency that isn't installed"""
+
+
+@dataclass(frozen=True)
+class ReportKey:
+    name: str
+    format: str
+    filters: tuple
+    version: int
+    day: date
+
+    @property
+    def etag(self):
+        return hashlib.sha1(repr(self).encode('utf-8')).hexdigest()
+
+    @property
+    def filename(self):
+        return f"{self.name}-{self.day.isoformat()}.{self.format}"
+
+
+def init_reports(app):
+    global _cache_size
+    _cache_size = int(app.config.get('REPORT_CACHE_SIZE', 32))
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def report_key(session, name, args):
+    """Cache key (and ETag source) for a report request; raises ValueError on bad parameters"""
+    if name not in FILTERS:
+        raise ValueError(f'Unknown report: {name}')
+    fmt = args.get('format') or 'html'
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    filters = tuple((key, args[key]) for key in FILTERS[name] if args.get(key) not in (None, '', 'all'))
+    status = dict(filters).get('status')
+    if name == 'task-overview' and status and status not in TASK_STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(TASK_STATUSES)}")
+    month = dict(filters).get('month')
+    if name == 'dashboard' and month and month not in {str(n) for n in range(1, 13)}:
+        raise ValueError('month must be 1-12')
+    # Delayed/on-plan depend on today's date as well as the data
+    return ReportKey(name, fmt, filters, data_version(session), date.today())
+
+
+def render_report(session, key):
+    """(body, mimetype) for a report, rendered at most once per key"""
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            record_cache('reports', True)
+            return _cache[key], FORMATS[key.format]
+    record_cache('reports', False)
+
+    builder = dashboard_context if key.name == 'dashboard' else task_overview_context
+    template = 'reports/dashboard.html' if key.name == 'dashboard' else 'reports/task_overview.html'
+    html = render_template(template, today=key.day, **builder(session, dict(key.filters), key.day))
+    body = html_to_pdf(html) if key.format == 'pdf' else html.encode('utf-8')
+
+    with _cache_lock:
+        _cache[key] = body
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    return body, FORMATS[key.format]
+
+
+def html_to_pdf(html):
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise ReportFormatUnavailable('PDF output needs WeasyPrint (pip install weasyprint); use format=html')
+    return HTML(string=html).write_pdf()
+
+
+# ============= Report content =============
+
+def dashboard_context(session, filters, today):
+    """Projects with their task date range and completion, aggregated per project in SQL"""
+    tasks = select(
+        Task.project_id,
+        func.min(Task.start_date).label('start'),
+        func.max(Task.end_date).label('end'),
+        func.count().label('tasks'),
+        func.sum(case((Task.completed.is_(True), 1), else_=0)).label('completed'),
+        func.sum(case(((Task.completed.isnot(True)) & (Task.end_date < today), 1), else_=0)).label('overdue'),
+    ).group_by(Task.project_id)
+    if 'assignee' in filters:
+        tasks = tasks.where(Task.assignee_id.in_(member_map.ids(session, [filters['assignee']]).values()))
+    tasks = tasks.subquery()
+
+    stmt = (
+        select(Project.id, Project.name, Project.status, Project.starred, Project.delivery_date,
+               tasks.c.start, tasks.c.end, tasks.c.tasks, tasks.c.completed, tasks.c.overdue)
+        .join(tasks, tasks.c.project_id == Project.id, isouter='assignee' not in filters)
+        .order_by(*PROJECT_KEYS.order_by())
+    )
+    if 'project' in filters:
+        stmt = stmt.where(Project.name == filters['project'])
+    if 'month' in filters:
+        # As the timeline's "Completed in Month": completed projects delivered in that month of any year
+        stmt = stmt.where(Project.status == 'completed',
+                          extract('month', Project.delivery_date) == int(filters['month']))
+    for kind in ('channel', 'application'):
+        if kind in filters:
+            stmt = stmt.where(project_filter(kind, filters[kind]))
+
+    rows = session.execute(stmt).all()
+    ids = [row.id for row in rows] if 'project' in filters else None
+    channels = names_by_project(session, 'channel', ids)
+    applications = names_by_project(session, 'application', ids)
+
+    # Timeline spans every task and delivery date, snapped to whole weeks
+    dates = [d for row in rows for d in (row.start, row.end, row.delivery_date) if d]
+    start = min(dates, default=today)
+    end = max(dates, default=today)
+    start -= timedelta(days=start.weekday())
+    end += timedelta(days=6 - end.weekday())
+    span = (end - start).days + 1
+
+    def position(day):
+        return round(100.0 * (day - start).days / span, 2)
+
+    projects = []
+    for row in rows:
+        bar = None
+        if row.start or row.end:
+            first, last = row.start or row.end, row.end or row.start
+            bar = {'left': position(first), 'width': max(round(100.0 * ((last - first).days + 1) / span, 2), 0.5)}
+        projects.append({
+            'name': row.name,
+            'status': row.status,
+            'starred': row.starred,
+            'delivery_date': row.delivery_date,
+            'delivery': position(row.delivery_date) if row.delivery_date else None,
+            'channels': channels.get(row.id, []),
+            'applications': applications.get(row.id, []),
+            'start': row.start,
+            'end': row.end,
+            'tasks': row.tasks or 0,
+            'completed': row.completed or 0,
+            'overdue': row.overdue or 0,
+            'bar': bar,
+        })
+
+    months = []
+    cursor = start.replace(day=1)
+    while cursor <= end:
+        if cursor >= start:
+            months.append({'label': cursor.strftime('%b %Y'), 'left': position(cursor)})
+        cursor = (cursor + timedelta(days=32)).replace(day=1)
+
+    by_status = {}
+    for p in projects:
+        by_status[p['status']] = by_status.get(p['status'], 0) + 1
+    return {
+        'title': 'Master Project Timeline',
+        'filters': filters,
+        'projects': projects,
+        'months': months,
+        'today_marker': position(today) if start <= today <= end else None,
+        'range_start': start,
+        'range_end': end,
+        'summary': {
+            'projects': len(projects),
+            'by_status': by_status,
+            'tasks': sum(p['tasks'] for p in projects),
+            'completed': sum(p['completed'] for p in projects),
+            'overdue': sum(p['overdue'] for p in projects),
+        },
+    }
+
+
+def _task_status(task, today):
+    if task['completed']:
+        return 'done'
+    if task['end_date'] and task['end_date'] < today:
+        return 'delayed'
+    return 'onplan'
+
+
+def task_overview_context(session, filters, today):
+    """Tasks grouped per team member (or per project for unassigned tasks), from column queries"""
+    member = filters.get('member')
+    status = filters.get('status')
+
+    stmt = (
+        select(Task.text, Task.completed, Task.start_date, Task.end_date, Task.assignee_id,
+               Project.name.label('project'), Project.status.label('project_status'))
+        .join(Project, Task.project_id == Project.id)
+        .order_by(Project.name, Task.rank, Task.id)
+    )
+    if 'project' in filters:
+        stmt = stmt.where(Project.name == filters['project'])
+    if member == 'unassigned':
+        stmt = stmt.where(Task.assignee_id.is_(None))
+    elif member:
+        stmt = stmt.where(Task.assignee_id.in_(member_map.ids(session, [member]).values()))
+    tasks = [dict(row._mapping) for row in session.execute(stmt)]
+    for task in tasks:
+        task['status'] = _task_status(task, today)
+
+    if member == 'unassigned':
+        groups = OrderedDict()
+        for task in tasks:
+            if status and not _in_status(task, status):
+                continue
+            groups.setdefault((task['project'], task['project_status']), []).append(task)
+        return {
+            'title': 'Team Task Overview',
+            'filters': filters,
+            'unassigned': [{'project': p, 'status': s, 'tasks': t} for (p, s), t in groups.items()],
+        }
+
+    members_stmt = select(TeamMember.id, TeamMember.name, TeamMember.role).order_by(TeamMember.id)
+    if member:
+        members_stmt = members_stmt.where(TeamMember.name == member)
+    members = session.execute(members_stmt).all()
+
+    subtasks_stmt = (
+        select(Subtask.text, Subtask.completed, Subtask.assignee_id,
+               Task.text.label('task'), Project.name.label('project'))
+        .join(Task, Subtask.task_id == Task.id)
+        .join(Project, Task.project_id == Project.id)
+        .where(Subtask.assignee_id.in_([m.id for m in members]))
+        .order_by(Project.name, Task.rank, Task.id, Subtask.rank, Subtask.id)
+    )
+    if 'project' in filters:
+        subtasks_stmt = subtasks_stmt.where(Project.name == filters['project'])
+    subtasks = {}
+    for row in session.execute(subtasks_stmt):
+        subtasks.setdefault(row.assignee_id, []).append(row)
+
+    by_member = {}
+    for task in tasks:
+        by_member.setdefault(task['assignee_id'], []).append(task)
+
+    cards = []
+    for m in members:
+        member_tasks = by_member.get(m.id, [])
+        groups = {key: [t for t in member_tasks if _in_status(t, key)] for key in TASK_STATUSES}
+        if status:
+            groups = {status: groups[status]}
+            if not groups[status]:
+                continue
+        cards.append({
+            'name': m.name,
+            'role': m.role,
+            'total': len(member_tasks),
+            'counts': {key: sum(1 for t in member_tasks if _in_status(t, key)) for key in TASK_STATUSES},
+            'groups': groups,
+            'subtasks': subtasks.get(m.id, []),
+        })
+    return {'title': 'Team Task Overview', 'filters': filters, 'members': cards}
+
+
+def _in_status(task, status):
+    """Task overview categories; 'nodate' overlaps the other three like in the SPA"""
+    if status == 'nodate':
+        return not task['start_date']
+    return task['status'] == status
@@ -1,17 +1,64 @@
-import json
-import os
-
-from flask import Blueprint, jsonify, request, render_template
+from flask import Blueprint, Response, jsonify, request, render_template, send_file, stream_with_context
+from sqlalchemy.orm import defer, lazyload, undefer
 from app import db
 from app.models import (
     User, Post,
-    TeamMember, Project, ProjectTeam, ProjectImage, ProjectLink,
-    Task, Subtask
+    TeamMember, Project, ProjectImage,
+    Task, Subtask, Job, Upload, Backup
+)
+from app.queries import (snapshot_payload, team_members_listing, projects_listing, project_summaries_listing,
+                         project_detail, posts_listing)
+from app.events import (get_bus, format_sse, streams_enabled, acquire_stream_slot,
+                        release_stream_slot)
+from app.metrics import record_snapshot_rows
+from app.counters import get_counters
+from app.jobs import enqueue, job_status
+from app.reports import ReportFormatUnavailable, report_key, render_report
+from app.assignments import assign_members, unassign_members
+from app.minutes import minutes_payload, save_minutes, set_minutes
+from app.dimensions import dimension_listing
+from app.members import member_map
+from app.ordering import move, rebalance_due
+from app.backups import file_path as backup_file_path, restore_backup, take_backup
+from app.archive import ArchiveConflict, archive_listing, archive_projects, archived_detail, restore_archived
+from app.uploads import (UploadConflict, append_chunk, discard, receive, start_upload,
+                         stored_file, upload_status)
+from app.snapshots import (
+    parse_date, tasks_from_payload,
+    replace_snapshot, merge_snapshot, sync_project as sync_project_data
 )
 from datetime import datetime
+from werkzeug.exceptions import RequestEntityTooLarge
 
 bp = Blueprint('main', __name__)
 
+def wants_async(default=True):
+    """Whether a bulk operation should run as a background job.
+
+    ``?sync=1`` forces inline execution; ``Prefer: respond-async`` (RFC 7240)
+    opts in where the default is inline.
+    """
+    if request.args.get('sync', '').lower() in ('1', 'true', 'yes'):
+        return False
+    if 'respond-async' in request.headers.get('Prefer', '').lower():
+        return True
+    return default
+
+def job_accepted(job, message):
+    """202 Accepted pointing at the job's status URL"""
+    response = jsonify({'message': message, 'job': job_status(db.session, job.id)})
+    response.status_code = 202
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response
+
+def moved(item, table, parent_id):
+    """Commit a position change; its list is renumbered in the background once keys grow long"""
+    item_id, rank = item.id, move(db.session, item, request.get_json() or {})
+    db.session.commit()
+    if rebalance_due(rank):
+        enqueue('rebalance_ranks', {'table': table, 'parent_id': parent_id})
+    return jsonify({'id': item_id, 'rank': rank}), 200
+
 # ============= Basic Routes =============
 
 @bp.route('/')
@@ -34,24 +81,9 @@ def backup_endpoint():
     if request.method == 'GET':
         # Read all data from database
         try:
-
-            
-            # Get all team members
-            team_members = TeamMember.query.all()
-            team_members_data = [member.to_dict() for member in team_members]
-            
-            # Get all projects with tasks, images, links, team
-            projects = Project.query.order_by(Project.starred.desc(), Project.created_at.desc()).all()
-            projects_data = [project.to_dict(include_tasks=True) for project in projects]
-            
-            # Return data in backup format
-            backup_data = {
-                'teamMembers': team_members_data,
-                'projects': projects_data,
-                'exportDate': datetime.utcnow().isoformat(),
-                'version': '2.5.0'
-            }
-            
+            # Team members plus all projects with tasks, images, links, team
+            backup_data = snapshot_payload(db.session)
+            record_snapshot_rows('export', backup_data)
             return jsonify(backup_data), 200
             
         except Exception as e:
@@ -70,92 +102,11 @@ def backup_endpoint():
             if 'teamMembers' not in new_data or 'projects' not in new_data:
                 return jsonify({'error': 'Invalid data format. Expected teamMembers and projects'}), 400
             
-            # Clear existing data
-            Subtask.query.delete()
-            Task.query.delete()
-            ProjectLink.query.delete()
-            ProjectImage.query.delete()
-            ProjectTeam.query.delete()
-            Project.query.delete()
-            TeamMember.query.delete()
+            if wants_async():
+                return job_accepted(enqueue('restore', new_data), 'Restore queued')
             
-            # Import team members
-            for member_data in new_data['teamMembers']:
-                member = TeamMember(
-                    name=member_data['name'],
-                    role=member_data['role'],
-                    skills=member_data.get('skills', []),
-                    workload=member_data.get('workload', 0)
-                )
-                db.session.add(member)
-            
-            db.session.flush()
-            
-            # Import projects
-            for project_data in new_data['projects']:
-                project = Project(
-                    name=project_data['name'],
-                    description=project_data.get('description', ''),
-                    status=project_data.get('status', 'planning'),
-                    starred=project_data.get('starred', False),
-                    meeting_minutes=project_data.get('meetingMinutes', '')
-                )
-                db.session.add(project)
-                db.session.flush()
-                
-                # Import project team
-                for member_name in project_data.get('team', []):
-                    pt = ProjectTeam(project_id=project.id, member_name=member_name)
-                    db.session.add(pt)
-                
-                # Import project images
-                for image_data in project_data.get('images', []):
-                    img = ProjectImage(
-                        project_id=project.id,
-                        image_data=image_data.get('image_data', image_data) if isinstance(image_data, dict) else image_data
-                    )
-                    db.session.add(img)
-                
-                # Import project links
-                for link_data in project_data.get('links', []):
-                    link = ProjectLink(
-                        project_id=project.id,
-                        url=link_data['url'],
-                        label=link_data.get('label')
-                    )
-                    db.session.add(link)
-                
-                # Import tasks
-                for task_data in project_data.get('tasks', []):
-                    task = Task(
-                        project_id=project.id,
-                        text=task_data['text'],
-                        completed=task_data.get('completed', False),
-                        start_date=task_data.get('startDate'),
-                        end_date=task_data.get('endDate'),
-                        assignee_name=task_data.get('assignee')
-                    )
-                    db.session.add(task)
-                    db.session.flush()
-                    
-                    # Import subtasks
-                    for subtask_data in task_data.get('subtasks', []):
-                        subtask = Subtask(
-                            task_id=task.id,
-                            text=subtask_data['text'],
-                            completed=subtask_data.get('completed', False),
-                            assignee_name=subtask_data.get('assignee')
-                        )
-                        db.session.add(subtask)
-            
-            db.session.commit()
-            
-            return jsonify({
-                'message': 'Backup saved successfully to database',
-                'timestamp': datetime.utcnow().isoformat(),
-                'teamMembers': len(new_data['teamMembers']),
-                'projects': len(new_data['projects'])
-            }), 201
+            result = replace_snapshot(db.session, new_data, 'restore')
+            return jsonify({'message': 'Backup saved successfully to database', **result}), 201
             
         except Exception as e:
             db.session.rollback()
@@ -171,143 +122,11 @@ def backup_endpoint():
             if not new_data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            updated_count = 0
-            created_count = 0
-            
-            # Update or create team members
-            if 'teamMembers' in new_data:
-                for member_data in new_data['teamMembers']:
-                    existing_member = TeamMember.query.filter_by(name=member_data['name']).first()
-                    
-                    if existing_member:
-                        # Update existing
-                        existing_member.role = member_data.get('role', existing_member.role)
-                        existing_member.skills = member_data.get('skills', existing_member.skills)
-                        existing_member.workload = member_data.get('workload', existing_member.workload)
-                        updated_count += 1
-                    else:
-                        # Create new
-                        new_member = TeamMember(
-                            name=member_data['name'],
-                            role=member_data['role'],
-                            skills=member_data.get('skills', []),
-                            workload=member_data.get('workload', 0)
-                        )
-                        db.session.add(new_member)
-                        created_count += 1
-            
-            db.session.flush()
-            
-            # Update or create projects
-            if 'projects' in new_data:
-                for project_data in new_data['projects']:
-                    existing_project = Project.query.filter_by(name=project_data['name']).first()
-                    
-                    if existing_project:
-                        # Update existing project
-                        existing_project.description = project_data.get('description', existing_project.description)
-                        existing_project.status = project_data.get('status', existing_project.status)
-                        existing_project.starred = project_data.get('starred', existing_project.starred)
-                        existing_project.meeting_minutes = project_data.get('meetingMinutes', existing_project.meeting_minutes)
-                        
-                        # Update team members
-                        ProjectTeam.query.filter_by(project_id=existing_project.id).delete()
-                        for member_name in project_data.get('team', []):
-                            pt = ProjectTeam(project_id=existing_project.id, member_name=member_name)
-                            db.session.add(pt)
-                        
-                        # Update tasks
-                        Task.query.filter_by(project_id=existing_project.id).delete()
-                        for task_data in project_data.get('tasks', []):
-                            task = Task(
-                                project_id=existing_project.id,
-                                text=task_data['text'],
-                                completed=task_data.get('completed', False),
-                                start_date=task_data.get('startDate'),
-                                end_date=task_data.get('endDate'),
-                                assignee_name=task_data.get('assignee')
-                            )
-                            db.session.add(task)
-                            db.session.flush()
-                            
-                            # Add subtasks
-                            for subtask_data in task_data.get('subtasks', []):
-                                subtask = Subtask(
-                                    task_id=task.id,
-                                    text=subtask_data['text'],
-                                    completed=subtask_data.get('completed', False),
-                                    assignee_name=subtask_data.get('assignee')
-                                )
-                                db.session.add(subtask)
-                        
-                        updated_count += 1
-                    else:
-                        # Create new project
-                        new_project = Project(
-                            name=project_data['name'],
-                            description=project_data.get('description', ''),
-                            status=project_data.get('status', 'planning'),
-                            starred=project_data.get('starred', False),
-                            meeting_minutes=project_data.get('meetingMinutes', '')
-                        )
-                        db.session.add(new_project)
-                        db.session.flush()
-                        
-                        # Add team
-                        for member_name in project_data.get('team', []):
-                            pt = ProjectTeam(project_id=new_project.id, member_name=member_name)
-                            db.session.add(pt)
-                        
-                        # Add images
-                        for image_data in project_data.get('images', []):
-                            img = ProjectImage(
-                                project_id=new_project.id,
-                                image_data=image_data.get('image_data', image_data) if isinstance(image_data, dict) else image_data
-                            )
-                            db.session.add(img)
-                        
-                        # Add links
-                        for link_data in project_data.get('links', []):
-                            link = ProjectLink(
-                                project_id=new_project.id,
-                                url=link_data['url'],
-                                label=link_data.get('label')
-                            )
-                            db.session.add(link)
-                        
-                        # Add tasks
-                        for task_data in project_data.get('tasks', []):
-                            task = Task(
-                                project_id=new_project.id,
-                                text=task_data['text'],
-                                completed=task_data.get('completed', False),
-                                start_date=task_data.get('startDate'),
-                                end_date=task_data.get('endDate'),
-                                assignee_name=task_data.get('assignee')
-                            )
-                            db.session.add(task)
-                            db.session.flush()
-                            
-                            # Add subtasks
-                            for subtask_data in task_data.get('subtasks', []):
-                                subtask = Subtask(
-                                    task_id=task.id,
-                                    text=subtask_data['text'],
-                                    completed=subtask_data.get('completed', False),
-                                    assignee_name=subtask_data.get('assignee')
-                                )
-                                db.session.add(subtask)
-                        
-                        created_count += 1
+            if wants_async():
+                return job_accepted(enqueue('merge', new_data), 'Merge queued')
             
-            db.session.commit()
-            
-            return jsonify({
-                'message': 'Backup merged successfully with database',
-                'timestamp': datetime.utcnow().isoformat(),
-                'updated': updated_count,
-                'created': created_count
-            }), 200
+            result = merge_snapshot(db.session, new_data)
+            return jsonify({'message': 'Backup merged successfully with database', **result}), 200
             
         except Exception as e:
             db.session.rollback()
@@ -317,32 +136,11 @@ def backup_endpoint():
 def get_json_data():
     """Get data from PostgreSQL database (IT Resource Manager format)"""
     try:
-
-        
-        # Get all team members with their projects
-        team_members = TeamMember.query.all()
-        team_members_data = []
-        
-        for member in team_members:
-            member_dict = member.to_dict()
-            team_members_data.append(member_dict)
-        
-        # Get all projects with tasks, images, links, team
-        projects = Project.query.order_by(Project.starred.desc(), Project.created_at.desc()).all()
-        projects_data = []
-        
-        for project in projects:
-            project_dict = project.to_dict(include_tasks=True)
-            projects_data.append(project_dict)
-        
-        # Return data in the same format as the JSON file
-        return jsonify({
-            'teamMembers': team_members_data,
-            'projects': projects_data,
-            'exportDate': datetime.utcnow().isoformat(),
-            'version': '2.5.0'
-        }), 200
+        # Return data in the same format as the JSON file (?fields[projects]=... for sparse reads)
+        return jsonify(snapshot_payload(db.session, request.args)), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -436,20 +234,11 @@ def delete_user(user_id):
 
 @bp.route('/api/posts', methods=['GET'])
 def get_posts():
-    """Get all posts with pagination"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
-    
-    pagination = Post.query.order_by(Post.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-    
-    return jsonify({
-        'posts': [post.to_dict() for post in pagination.items],
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'current_page': page
-    }), 200
+    """Get posts, newest first, one keyset page at a time (?limit=&cursor=&total=estimate)"""
+    try:
+        return jsonify(posts_listing(db.session, request.args)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @bp.route('/api/posts/<int:post_id>', methods=['GET'])
 def get_post(post_id):
@@ -557,48 +346,192 @@ def get_user_posts(user_id):
 
 @bp.route('/api/upload', methods=['POST'])
 def upload_file():
-    """Upload a file"""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
-    
-    file = request.files['file']
-    
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    
-    # Save file (you should add proper validation and security checks)
-    filename = file.filename
-    # file.save(os.path.join('uploads', filename))
-    
-    return jsonify({
-        'message': 'File uploaded successfully',
-        'filename': filename
-    }), 201
+    """Upload a file (multipart field ``file``, or the raw body with ?filename=), streamed to disk"""
+    try:
+        upload = receive(db.session, request)
+        db.session.commit()
+        return jsonify({
+            'message': 'File uploaded successfully',
+            'filename': upload.filename,
+            **upload_status(upload)
+        }), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge as e:
+        return jsonify({'error': e.description}), 413
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """Start a resumable upload: {"filename", "size", "contentType"}; chunks follow with PATCH"""
+    try:
+        upload = start_upload(db.session, request.get_json() or {})
+        db.session.commit()
+        response = jsonify({**upload_status(upload), 'upload_url': f'/api/uploads/{upload.id}'})
+        response.status_code = 201
+        response.headers['Location'] = f'/api/uploads/{upload.id}'
+        response.headers['Upload-Offset'] = '0'
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge as e:
+        return jsonify({'error': e.description}), 413
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Status of an upload; ``offset`` is where a resumed upload continues"""
+    upload = db.session.get(Upload, upload_id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    status = upload_status(upload)
+    response = jsonify(status)
+    response.headers['Upload-Offset'] = str(status['offset'])
+    return response, 200
+
+@bp.route('/api/uploads/<upload_id>', methods=['PATCH'])
+def upload_chunk(upload_id):
+    """Append the raw body to a resumable upload at the ``Upload-Offset`` header"""
+    try:
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return jsonify({'error': 'Upload-Offset header is required'}), 400
+        upload = append_chunk(db.session, upload_id, offset, request.stream)
+        if upload is None:
+            return jsonify({'error': 'Upload not found'}), 404
+        status = upload_status(upload)
+        response = jsonify(status)
+        response.headers['Upload-Offset'] = str(status['offset'])
+        return response, 200
+    except UploadConflict as e:
+        response = jsonify({'error': str(e), 'offset': e.offset})
+        response.headers['Upload-Offset'] = str(e.offset)
+        return response, 409
+    except RequestEntityTooLarge as e:
+        return jsonify({'error': e.description}), 413
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/uploads/<upload_id>/content', methods=['GET'])
+def get_upload_content(upload_id):
+    """Stored file of a completed upload (streamed from disk; ETag and Range supported)"""
+    path, upload = stored_file(db.session, upload_id)
+    if path is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    # Content never changes once complete
+    return send_file(path, mimetype=upload.content_type, download_name=upload.filename, conditional=True,
+                     etag=upload.sha256, max_age=365 * 24 * 3600)
 
 # ============= Stats & Analytics Routes =============
 
 @bp.route('/api/stats', methods=['GET'])
 def get_stats():
-    """Get application statistics"""
-    total_users = User.query.count()
-    total_posts = Post.query.count()
+    """Get application statistics (from maintained counters, no COUNT(*) scans)"""
+    try:
+        counters = get_counters(db.session)
+        return jsonify({
+            'total_users': counters['users'],
+            'total_posts': counters['posts'],
+            'total_team_members': counters['team_members'],
+            'total_projects': counters['projects'],
+            'tasks': {
+                'open': counters['tasks_open'],
+                'completed': counters['tasks_completed'],
+                'total': counters['tasks_open'] + counters['tasks_completed']
+            },
+            'total_subtasks': counters['subtasks'],
+            'timestamp': datetime.utcnow().isoformat()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/pool', methods=['GET'])
+def get_pool_stats():
+    """Get database connection pool occupancy and checkout wait times"""
+    from flask import current_app
+    from app.pool import pool_status
     
-    return jsonify({
-        'total_users': total_users,
-        'total_posts': total_posts,
-        'timestamp': datetime.utcnow().isoformat()
-    }), 200
+    status = pool_status(db.engine)
+    status['profile'] = current_app.config.get('DB_POOL_PROFILE')
+    return jsonify(status), 200
+
+# ============= Live Updates Route =============
+
+@bp.route('/api/events', methods=['GET'])
+def stream_events():
+    """Stream change notifications as Server-Sent Events"""
+    from flask import current_app
+    import queue
+    import time
+    
+    if not streams_enabled():
+        return jsonify({'error': 'Live updates need a shared event bus (REDIS_URL) with more than one worker'}), 503
+    bus = get_bus()
+    heartbeat = current_app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+    # Streams end periodically so long-lived connections don't pin a worker forever;
+    # EventSource reconnects automatically and resumes from Last-Event-ID
+    max_seconds = current_app.config.get('SSE_MAX_SECONDS', 300)
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    
+    def generate():
+        if not acquire_stream_slot():
+            # Every stream thread of this worker is taken: end now, the browser reconnects later
+            yield f"retry: {current_app.config.get('SSE_BUSY_RETRY_MS', 30000)}\n\n"
+            return
+        subscription = bus.subscribe()
+        try:
+            yield 'retry: 3000\n\n'
+            if last_id and last_id.isdigit():
+                for change in bus.since(int(last_id)):
+                    yield format_sse(change)
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                try:
+                    yield format_sse(subscription.get(timeout=heartbeat))
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+        finally:
+            bus.unsubscribe(subscription)
+            release_stream_slot()
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 # ============= IT Resource Manager API Routes =============
 
+# Channel and Application Routes
+@bp.route('/api/channels', methods=['GET'])
+def get_channels():
+    """Channels in use with their project counts (filter projects with ?channel=)"""
+    try:
+        return jsonify(dimension_listing(db.session, 'channel')), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/applications', methods=['GET'])
+def get_applications():
+    """Applications in use with their project counts (filter projects with ?application=)"""
+    try:
+        return jsonify(dimension_listing(db.session, 'application')), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Team Members Routes
 @bp.route('/api/team-members', methods=['GET'])
 def get_team_members():
-    """Get all team members with their projects"""
+    """Get all team members with their projects (paginated with ?limit=&cursor=)"""
     try:
-
-        team_members = TeamMember.query.all()
-        return jsonify([member.to_dict() for member in team_members]), 200
+        return jsonify(team_members_listing(db.session, request.args)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -672,11 +605,34 @@ def delete_team_member(member_id):
 # Projects Routes
 @bp.route('/api/projects', methods=['GET'])
 def get_projects():
-    """Get all projects with tasks, images, links, and team"""
+    """Get all projects with tasks, images, links, and team (paginated with ?limit=&cursor=)"""
+    try:
+        return jsonify(projects_listing(db.session, request.args)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/projects/summary', methods=['GET'])
+def get_project_summaries():
+    """Project index with task/image counts but no trees (paginated with ?limit=&cursor=)"""
     try:
+        return jsonify(project_summaries_listing(db.session, request.args)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        projects = Project.query.order_by(Project.starred.desc(), Project.created_at.desc()).all()
-        return jsonify([project.to_dict() for project in projects]), 200
+@bp.route('/api/projects/<int:project_id>', methods=['GET'])
+def get_project(project_id):
+    """Get one project with tasks, images, links, and team (?fields=/include= as on /api/projects)"""
+    try:
+        project = project_detail(db.session, project_id, request.args)
+        if project is None:
+            return jsonify({'error': 'Project not found'}), 404
+        return jsonify(project), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -689,6 +645,8 @@ def create_project():
         
         if not data or not data.get('name'):
             return jsonify({'error': 'Project name is required'}), 400
+        if not isinstance(data.get('starred', False), bool):
+            return jsonify({'error': 'starred must be true or false'}), 400
         
         # Check if project already exists by name
         existing = Project.query.filter_by(name=data['name']).first()
@@ -733,103 +691,19 @@ def sync_project():
         if not data or not data.get('name'):
             return jsonify({'error': 'Project name is required'}), 400
         
-        # Check if project already exists by name
-        existing = Project.query.filter_by(name=data['name']).first()
-        if existing:
-            # Update existing project instead of creating duplicate
-            if 'description' in data:
-                existing.description = data['description']
-            if 'status' in data:
-                existing.status = data['status']
-            if 'starred' in data:
-                existing.starred = data['starred']
-            if 'meetingMinutes' in data:
-                existing.meeting_minutes = data['meetingMinutes']
-            if 'channels' in data:
-                existing.channels = data['channels']
-            if 'applications' in data:
-                existing.applications = data['applications']
-            if 'deliveryDate' in data:
-                if data['deliveryDate']:
-                    try:
-                        from datetime import datetime as dt
-                        existing.delivery_date = dt.fromisoformat(data['deliveryDate'].replace('Z', '+00:00')).date()
-                    except:
-                        existing.delivery_date = None
-                else:
-                    existing.delivery_date = None
-            
-            db.session.commit()
-            return jsonify({'message': 'Project updated with existing database record', 'project': existing.to_dict()}), 200
-        
-        # Create new project
-        delivery_date = None
-        if data.get('deliveryDate'):
-            try:
-                from datetime import datetime as dt
-                delivery_date = dt.fromisoformat(data['deliveryDate'].replace('Z', '+00:00')).date()
-            except:
-                pass
-        
-        project = Project(
-            name=data['name'],
-            description=data.get('description', ''),
-            status=data.get('status', 'planning'),
-            starred=data.get('starred', False),
-            meeting_minutes=data.get('meetingMinutes', ''),
-            channels=data.get('channels', []),
-            applications=data.get('applications', []),
-            delivery_date=delivery_date
-        )
-        
-        db.session.add(project)
-        db.session.flush()  # Get the ID
-        
-        # Add tasks if provided
-        if 'tasks' in data and data['tasks']:
-            for task_data in data['tasks']:
-                from datetime import datetime as dt
-                start_date = None
-                end_date = None
-                
-                if task_data.get('startDate'):
-                    try:
-                        start_date = dt.fromisoformat(task_data['startDate'].replace('Z', '+00:00')).date()
-                    except:
-                        pass
-                
-                if task_data.get('endDate'):
-                    try:
-                        end_date = dt.fromisoformat(task_data['endDate'].replace('Z', '+00:00')).date()
-                    except:
-                        pass
-                
-                task = Task(
-                    project_id=project.id,
-                    text=task_data.get('text', ''),
-                    completed=task_data.get('completed', False),
-                    start_date=start_date,
-                    end_date=end_date,
-                    assignee_name=task_data.get('assignee')
-                )
-                db.session.add(task)
-                db.session.flush()
-                
-                # Add subtasks if present
-                if 'subtasks' in task_data and task_data['subtasks']:
-                    for subtask_data in task_data['subtasks']:
-                        subtask = Subtask(
-                            task_id=task.id,
-                            text=subtask_data.get('text', ''),
-                            completed=subtask_data.get('completed', False),
-                            assignee_name=subtask_data.get('assignee')
-                        )
-                        db.session.add(subtask)
-        
-        db.session.commit()
+        # The SPA needs the project id back, so this runs inline unless asked otherwise
+        if wants_async(default=False):
+            return job_accepted(enqueue('sync_project', data), 'Project sync queued')
         
+        project, created = sync_project_data(db.session, data)
+        if not created:
+            return jsonify({'message': 'Project updated with existing database record', 'project': project.to_dict()}), 200
         return jsonify({'message': 'Project synced to database', 'project': project.to_dict(include_tasks=True)}), 201
         
+    except ValueError as e:
+        # Unknown team member
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -847,6 +721,9 @@ def update_project(project_id):
         
         data = request.get_json()
         
+        if 'starred' in data and not isinstance(data['starred'], bool):
+            return jsonify({'error': 'starred must be true or false'}), 400
+        
         if 'name' in data:
             project.name = data['name']
         if 'description' in data:
@@ -856,7 +733,7 @@ def update_project(project_id):
         if 'starred' in data:
             project.starred = data['starred']
         if 'meetingMinutes' in data:
-            project.meeting_minutes = data['meetingMinutes']
+            set_minutes(db.session, project, data['meetingMinutes'])  # keeps the previous minutes as history
         if 'channels' in data:
             project.channels = data['channels']  # Handle channels
         if 'applications' in data:
@@ -877,50 +754,18 @@ def update_project(project_id):
             # Remove all existing tasks for this project
             Task.query.filter_by(project_id=project_id).delete()
             
-            # Add new tasks from data
-            for task_data in data['tasks']:
-                # Parse dates if provided
-                from datetime import datetime as dt
-                start_date = None
-                end_date = None
-                
-                if task_data.get('startDate'):
-                    try:
-                        start_date = dt.fromisoformat(task_data['startDate'].replace('Z', '+00:00')).date()
-                    except:
-                        start_date = None
-                
-                if task_data.get('endDate'):
-                    try:
-                        end_date = dt.fromisoformat(task_data['endDate'].replace('Z', '+00:00')).date()
-                    except:
-                        end_date = None
-                
-                task = Task(
-                    project_id=project_id,
-                    text=task_data.get('text', ''),
-                    completed=task_data.get('completed', False),
-                    start_date=start_date,
-                    end_date=end_date,
-                    assignee_name=task_data.get('assignee')
-                )
+            # Add new tasks from data (inserted in one batch at commit, in the given order)
+            for task in tasks_from_payload(data['tasks']):
+                task.project_id = project_id
                 db.session.add(task)
-                db.session.flush()  # Get task ID
-                
-                # Handle subtasks if present
-                if 'subtasks' in task_data and task_data['subtasks']:
-                    for subtask_data in task_data['subtasks']:
-                        subtask = Subtask(
-                            task_id=task.id,
-                            text=subtask_data.get('text', ''),
-                            completed=subtask_data.get('completed', False),
-                            assignee_name=subtask_data.get('assignee')
-                        )
-                        db.session.add(subtask)
         
         db.session.commit()
         return jsonify(project.to_dict(include_tasks=True)), 200
         
+    except ValueError as e:
+        # Unknown assignee
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -943,34 +788,97 @@ def delete_project(project_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/projects/<int:project_id>/archive', methods=['POST'])
+def archive_project(project_id):
+    """Move a project with its whole tree to the archive now (see app/archive.py)"""
+    try:
+        archived = archive_projects(db.session, [project_id])
+        if not archived:
+            return jsonify({'error': 'Project not found'}), 404
+        return jsonify(archived[0]), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# Meeting Minutes Routes
+@bp.route('/api/projects/<int:project_id>/minutes', methods=['GET'])
+def get_meeting_minutes(project_id):
+    """Get a project's meeting minutes (with ?history=1, previous versions too)"""
+    try:
+        minutes = minutes_payload(db.session, project_id, history=request.args.get('history') in ('1', 'true'))
+        if minutes is None:
+            return jsonify({'error': 'Project not found'}), 404
+        return jsonify(minutes), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/projects/<int:project_id>/minutes', methods=['PUT'])
+def update_meeting_minutes(project_id):
+    """Replace a project's meeting minutes without touching the rest of the project"""
+    try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data.get('meetingMinutes'), str):
+            return jsonify({'error': 'meetingMinutes must be a string'}), 400
+        
+        minutes = save_minutes(db.session, project_id, data['meetingMinutes'])
+        if minutes is None:
+            return jsonify({'error': 'Project not found'}), 404
+        return jsonify(minutes), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Project Team Routes
+def parse_assignment(data):
+    """(project_ids, member_names) from a bulk assignment body; raises ValueError"""
+    project_ids = (data or {}).get('project_ids')
+    member_names = (data or {}).get('member_names')
+    if not isinstance(project_ids, list) or not project_ids or not all(isinstance(i, int) for i in project_ids):
+        raise ValueError('project_ids must be a non-empty list of project ids')
+    if not isinstance(member_names, list) or not member_names or not all(isinstance(n, str) for n in member_names):
+        raise ValueError('member_names must be a non-empty list of team member names')
+    return project_ids, member_names
+
+@bp.route('/api/projects/team', methods=['POST', 'DELETE'])
+def bulk_team_assignment():
+    """Assign (POST) or unassign (DELETE) many members to/from many projects in one transaction"""
+    try:
+        project_ids, member_names = parse_assignment(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        if request.method == 'POST':
+            result = assign_members(db.session, project_ids, member_names)
+        else:
+            result = unassign_members(db.session, project_ids, member_names)
+        db.session.commit()
+        return jsonify(result), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/api/projects/<int:project_id>/team', methods=['POST'])
 def add_team_member_to_project(project_id):
     """Add a team member to a project"""
     try:
-
-        project = Project.query.get_or_404(project_id)
         data = request.get_json()
         
         member_name = data.get('member_name')
         if not member_name:
             return jsonify({'error': 'member_name is required'}), 400
         
+        if db.session.get(Project, project_id) is None:
+            return jsonify({'error': 'Project not found'}), 404
+        
         # Check if member exists
-        member = TeamMember.query.filter_by(name=member_name).first()
-        if not member:
+        if not member_map.ids(db.session, [member_name]):
             return jsonify({'error': 'Team member not found'}), 404
         
-        # Add to project team (will be ignored if already exists due to unique constraint)
-        project_team = ProjectTeam(project_id=project_id, member_name=member_name)
-        db.session.add(project_team)
-        db.session.commit()
-        
-        # Update member workload
-        member.workload = min(len(member.project_teams) * 25, 100)
+        # Insert (ignored if already assigned) and workload update, one commit
+        result = assign_members(db.session, [project_id], [member_name])
         db.session.commit()
         
-        return jsonify({'message': 'Team member added to project'}), 201
+        return jsonify({'message': 'Team member added to project', **result}), 201
         
     except Exception as e:
         db.session.rollback()
@@ -980,22 +888,10 @@ def add_team_member_to_project(project_id):
 def remove_team_member_from_project(project_id, member_name):
     """Remove a team member from a project"""
     try:
-
-        
-        ProjectTeam.query.filter_by(
-            project_id=project_id,
-            member_name=member_name
-        ).delete()
-        
+        result = unassign_members(db.session, [project_id], [member_name])
         db.session.commit()
         
-        # Update member workload
-        member = TeamMember.query.filter_by(name=member_name).first()
-        if member:
-            member.workload = min(len(member.project_teams) * 25, 100)
-            db.session.commit()
-        
-        return jsonify({'message': 'Team member removed from project'}), 200
+        return jsonify({'message': 'Team member removed from project', **result}), 200
         
     except Exception as e:
         db.session.rollback()
@@ -1004,27 +900,48 @@ def remove_team_member_from_project(project_id, member_name):
 # Project Images Routes
 @bp.route('/api/projects/<int:project_id>/images', methods=['POST'])
 def add_project_image(project_id):
-    """Add an image to a project"""
+    """Add an image to a project: a file (multipart field ``file`` or raw image body, streamed to disk),
+    a completed upload ({"upload_id": ...}) or a base64 data URL ({"image_data": ...})"""
+    upload = None
     try:
-
-        project = Project.query.get_or_404(project_id)
-        data = request.get_json()
-        
-        if not data or not data.get('image_data'):
-            return jsonify({'error': 'image_data is required'}), 400
+        if db.session.get(Project, project_id) is None:
+            return jsonify({'error': 'Project not found'}), 404
         
-        image = ProjectImage(
-            project_id=project_id,
-            image_data=data['image_data']
-        )
+        if not request.is_json:
+            upload = receive(db.session, request, default_type='image/png', default_name='image')
+            if not upload.content_type.startswith('image/'):
+                db.session.rollback()
+                discard(upload)
+                return jsonify({'error': f'Not an image: {upload.content_type}'}), 415
+            image = ProjectImage(project_id=project_id, upload=upload)
+        else:
+            data = request.get_json()
+            if data and data.get('upload_id'):
+                path, stored = stored_file(db.session, data['upload_id'])
+                if path is None:
+                    return jsonify({'error': 'Upload not found or not complete'}), 400
+                image = ProjectImage(project_id=project_id, upload_id=stored.id)
+            elif not data or not data.get('image_data'):
+                return jsonify({'error': 'image_data is required'}), 400
+            else:
+                image = ProjectImage(
+                    project_id=project_id,
+                    image_data=data['image_data']
+                )
         
         db.session.add(image)
         db.session.commit()
         
         return jsonify(image.to_dict()), 201
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge as e:
+        return jsonify({'error': e.description}), 413
     except Exception as e:
         db.session.rollback()
+        if upload is not None:
+            discard(upload)
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/api/projects/<int:project_id>/images/<int:image_id>', methods=['DELETE'])
@@ -1045,6 +962,27 @@ def delete_project_image(project_id, image_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/projects/<int:project_id>/images/<int:image_id>/position', methods=['PUT'])
+def move_project_image(project_id, image_id):
+    """Move an image within its project ({"after": id} or {"before": id}; null for the front/end)"""
+    try:
+        from werkzeug.exceptions import NotFound
+        
+        try:
+            # Only the key changes; don't read the image data
+            image = (ProjectImage.query.options(defer(ProjectImage.image_data))
+                     .filter_by(id=image_id, project_id=project_id).first_or_404())
+        except NotFound:
+            return jsonify({'error': 'Image not found'}), 404
+        
+        return moved(image, 'project_images', project_id)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Tasks Routes
 @bp.route('/api/projects/<int:project_id>/tasks', methods=['POST'])
 def create_task(project_id):
@@ -1066,8 +1004,8 @@ def create_task(project_id):
             project_id=project_id,
             text=data['text'],
             completed=data.get('completed', False),
-            start_date=data.get('startDate'),
-            end_date=data.get('endDate'),
+            start_date=parse_date(data.get('startDate')),
+            end_date=parse_date(data.get('endDate')),
             assignee_name=data.get('assignee')
         )
         
@@ -1076,6 +1014,10 @@ def create_task(project_id):
         
         return jsonify(task.to_dict()), 201
         
+    except ValueError as e:
+        # Unknown assignee
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1093,15 +1035,19 @@ def update_task(task_id):
         if 'completed' in data:
             task.completed = data['completed']
         if 'startDate' in data:
-            task.start_date = data['startDate']
+            task.start_date = parse_date(data['startDate'])
         if 'endDate' in data:
-            task.end_date = data['endDate']
+            task.end_date = parse_date(data['endDate'])
         if 'assignee' in data:
             task.assignee_name = data['assignee']
         
         db.session.commit()
         return jsonify(task.to_dict()), 200
         
+    except ValueError as e:
+        # Unknown assignee
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1111,7 +1057,8 @@ def delete_task(task_id):
     """Delete a task"""
     try:
 
-        task = Task.query.get_or_404(task_id)
+        # Subtasks are removed by ON DELETE CASCADE; don't load them just to delete them
+        task = Task.query.options(lazyload(Task.subtasks)).get_or_404(task_id)
         db.session.delete(task)
         db.session.commit()
         return jsonify({'message': 'Task deleted successfully'}), 200
@@ -1119,6 +1066,25 @@ def delete_task(task_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/tasks/<int:task_id>/position', methods=['PUT'])
+def move_task(task_id):
+    """Move a task within its project ({"after": id} or {"before": id}; null for the front/end)"""
+    try:
+        from werkzeug.exceptions import NotFound
+        
+        try:
+            task = Task.query.options(lazyload(Task.subtasks)).get_or_404(task_id)
+        except NotFound:
+            return jsonify({'error': 'Task not found'}), 404
+        
+        return moved(task, 'tasks', task.project_id)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Subtasks Routes
 @bp.route('/api/tasks/<int:task_id>/subtasks', methods=['POST'])
 def create_subtask(task_id):
@@ -1143,6 +1109,10 @@ def create_subtask(task_id):
         
         return jsonify(subtask.to_dict()), 201
         
+    except ValueError as e:
+        # Unknown assignee
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1165,6 +1135,10 @@ def update_subtask(subtask_id):
         db.session.commit()
         return jsonify(subtask.to_dict()), 200
         
+    except ValueError as e:
+        # Unknown assignee
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1182,6 +1156,25 @@ def delete_subtask(subtask_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/subtasks/<int:subtask_id>/position', methods=['PUT'])
+def move_subtask(subtask_id):
+    """Move a subtask within its task ({"after": id} or {"before": id}; null for the front/end)"""
+    try:
+        from werkzeug.exceptions import NotFound
+        
+        try:
+            subtask = Subtask.query.get_or_404(subtask_id)
+        except NotFound:
+            return jsonify({'error': 'Subtask not found'}), 404
+        
+        return moved(subtask, 'subtasks', subtask.task_id)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Data Import Route
 @bp.route('/api/import', methods=['POST'])
 def import_data():
@@ -1194,95 +1187,186 @@ def import_data():
         if not data or 'teamMembers' not in data or 'projects' not in data:
             return jsonify({'error': 'Invalid data format'}), 400
         
-        # Clear existing data
-        Subtask.query.delete()
-        Task.query.delete()
-        ProjectLink.query.delete()
-        ProjectImage.query.delete()
-        ProjectTeam.query.delete()
-        Project.query.delete()
-        TeamMember.query.delete()
-        
-        # Import team members
-        for member_data in data['teamMembers']:
-            member = TeamMember(
-                name=member_data['name'],
-                role=member_data['role'],
-                skills=member_data.get('skills', []),
-                workload=member_data.get('workload', 0)
-            )
-            db.session.add(member)
-        
-        db.session.flush()
-        
-        # Import projects
-        for project_data in data['projects']:
-            project = Project(
-                name=project_data['name'],
-                description=project_data.get('description', ''),
-                status=project_data.get('status', 'planning'),
-                starred=project_data.get('starred', False),
-                meeting_minutes=project_data.get('meetingMinutes', '')
-            )
-            db.session.add(project)
-            db.session.flush()
-            
-            # Import project team
-            for member_name in project_data.get('team', []):
-                pt = ProjectTeam(project_id=project.id, member_name=member_name)
-                db.session.add(pt)
-            
-            # Import project images
-            for image_data in project_data.get('images', []):
-                img = ProjectImage(
-                    project_id=project.id,
-                    image_data=image_data.get('image_data', image_data) if isinstance(image_data, dict) else image_data
-                )
-                db.session.add(img)
-            
-            # Import project links
-            for link_data in project_data.get('links', []):
-                link = ProjectLink(
-                    project_id=project.id,
-                    url=link_data['url'],
-                    label=link_data.get('label')
-                )
-                db.session.add(link)
-            
-            # Import tasks
-            for task_data in project_data.get('tasks', []):
-                task = Task(
-                    project_id=project.id,
-                    text=task_data['text'],
-                    completed=task_data.get('completed', False),
-                    start_date=task_data.get('startDate'),
-                    end_date=task_data.get('endDate'),
-                    assignee_name=task_data.get('assignee')
-                )
-                db.session.add(task)
-                db.session.flush()
-                
-                # Import subtasks
-                for subtask_data in task_data.get('subtasks', []):
-                    subtask = Subtask(
-                        task_id=task.id,
-                        text=subtask_data['text'],
-                        completed=subtask_data.get('completed', False),
-                        assignee_name=subtask_data.get('assignee')
-                    )
-                    db.session.add(subtask)
-        
-        db.session.commit()
+        if wants_async():
+            return job_accepted(enqueue('import', data), 'Import queued')
         
-        return jsonify({
-            'message': 'Data imported successfully',
-            'timestamp': datetime.utcnow().isoformat()
-        }), 200
+        result = replace_snapshot(db.session, data, 'import')
+        return jsonify({'message': 'Data imported successfully', 'timestamp': result['timestamp']}), 200
         
+    except ValueError as e:
+        # Unknown team member
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# ============= Reports =============
+
+def report_response(name):
+    """Rendered report for the request's filters, or 304 when the client's copy is current"""
+    try:
+        key = report_key(db.session, name, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if request.if_none_match.contains(key.etag):
+        response = Response(status=304)
+    else:
+        try:
+            body, mimetype = render_report(db.session, key)
+        except ReportFormatUnavailable as e:
+            return jsonify({'error': str(e)}), 501
+        response = Response(body, mimetype=mimetype)
+        if key.format == 'pdf':
+            response.headers['Content-Disposition'] = f'attachment; filename="{key.filename}"'
+    response.set_etag(key.etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@bp.route('/api/reports/dashboard', methods=['GET'])
+def dashboard_report():
+    """Master project timeline (?channel=&application=&project=&assignee=&format=html|pdf)"""
+    return report_response('dashboard')
+
+@bp.route('/api/reports/task-overview', methods=['GET'])
+def task_overview_report():
+    """Team task overview (?member=&status=&project=&format=html|pdf)"""
+    return report_response('task-overview')
+
+# ============= Backup chains =============
+
+@bp.route('/api/backups', methods=['GET'])
+def list_backups():
+    """Stored backups, newest first (a full backup and the diffs that build on it form a chain)"""
+    try:
+        backups = Backup.query.order_by(Backup.id.desc()).all()
+        return jsonify({'backups': [backup.to_dict() for backup in backups]}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/backups', methods=['POST'])
+def create_backup():
+    """Write the next backup of the chain ({"full": true} to start a new chain)"""
+    try:
+        full = bool((request.get_json(silent=True) or {}).get('full'))
+        if wants_async():
+            return job_accepted(enqueue('backup', {'full': full}), 'Backup queued')
+        backup = take_backup(db.session, full=full)
+        return jsonify(backup.to_dict()), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/backups/<int:backup_id>/file', methods=['GET'])
+def download_backup(backup_id):
+    """The stored (compressed) backup file; its encoding is in the X-Backup-Encoding header"""
+    backup = db.session.get(Backup, backup_id)
+    if backup is None:
+        return jsonify({'error': 'Backup not found'}), 404
+    response = send_file(backup_file_path(backup.id), mimetype='application/octet-stream', conditional=True,
+                         download_name=f'backup-{backup.id}-{backup.kind}.{backup.encoding.replace("+", ".")}',
+                         etag=backup.sha256)
+    response.headers['X-Backup-Encoding'] = backup.encoding
+    return response
+
+@bp.route('/api/backups/<int:backup_id>/restore', methods=['POST'])
+def restore_from_backup(backup_id):
+    """Replace all data with the state as of a backup (its chain is replayed up to it)"""
+    try:
+        if db.session.get(Backup, backup_id) is None:
+            return jsonify({'error': 'Backup not found'}), 404
+        if wants_async():
+            return job_accepted(enqueue('restore_backup', {'backup_id': backup_id}), 'Restore queued')
+        result = restore_backup(db.session, backup_id)
+        return jsonify({'message': 'Backup restored successfully', **result}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# ============= Archive =============
+
+@bp.route('/api/archive', methods=['GET'])
+def list_archive():
+    """Archived projects, most recently archived first (?status=&q=&limit=&cursor=)"""
+    try:
+        return jsonify(archive_listing(db.session, request.args)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/api/archive/<int:archive_id>', methods=['GET'])
+def get_archived_project(archive_id):
+    """An archived project with its whole tree"""
+    try:
+        detail = archived_detail(db.session, archive_id)
+        if detail is None:
+            return jsonify({'error': 'Archived project not found'}), 404
+        return jsonify(detail), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/archive/<int:archive_id>/restore', methods=['POST'])
+def restore_archived_project(archive_id):
+    """Move an archived project back to the live projects (it gets a new id)"""
+    try:
+        project = restore_archived(db.session, archive_id)
+        if project is None:
+            return jsonify({'error': 'Archived project not found'}), 404
+        return jsonify(project.to_dict(include_tasks=True)), 201
+    except ArchiveConflict as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'existingId': e.existing_id}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/archive/run', methods=['POST'])
+def run_archive():
+    """Archive every finished project unchanged for ARCHIVE_AFTER_DAYS"""
+    try:
+        if wants_async():
+            return job_accepted(enqueue('archive_projects', {}), 'Archiving queued')
+        archived = archive_projects(db.session)
+        return jsonify({'archived': archived}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# ============= Background Jobs =============
+
+@bp.route('/api/backup/export', methods=['POST'])
+def export_backup():
+    """Build a full backup in the background; download it from the job's result URL"""
+    try:
+        return job_accepted(enqueue('export'), 'Export queued')
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/jobs/<string:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status and progress of a background job"""
+    try:
+        status = job_status(db.session, job_id)
+        if status is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(status), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/jobs/<string:job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """Stored result of a finished job"""
+    try:
+        job = db.session.get(Job, job_id, options=[undefer(Job.result)])
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if job.status != 'succeeded':
+            return jsonify({'error': 'Job has no result', 'job': job_status(db.session, job_id)}), 409
+        # Stored as JSON already; send it without decoding and re-encoding
+        return Response(job.result, status=200, mimetype='application/json')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # ============= Error Handlers =============
 
 @bp.errorhandler(404)
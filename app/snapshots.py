@@ -0,0 +1,277 @@
+"""
+Bulk snapshot operations: full restore, merge, project sync and export.
+
+These are the bodies of ``POST /api/import``, ``POST``/``PUT /api/backup``
+and ``POST /api/projects/sync``. They take a ``Session`` explicitly and
+commit their own transaction so they can run inline in a request or as a
+background job (app/jobs.py). ``progress(done, total)`` is called as work
+advances when given.
+"""
+
+from datetime import date, datetime
+
+from app.events import mark_bulk_change
+from app.metrics import record_snapshot_rows
+from app.models import (TeamMember, Project, ProjectTeam, ProjectImage, ProjectLink, Task, Subtask,
+                        MeetingMinutesRevision, ProjectChannel, ProjectApplication)
+from app.ordering import ranked
+from app.queries import snapshot_payload
+
+# Projects added between flushes (and progress reports) during restore/merge
+CHUNK_SIZE = 100
+
+
+def parse_date(value):
+    """Parse an ISO 8601 date/datetime string into a date (None if empty or invalid)"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+    except (ValueError, AttributeError):
+        return None
+
+
+def task_from_payload(task_data):
+    """Build a Task with its subtasks from the frontend task format.
+
+    Subtasks are attached through the relationship rather than by task_id, so
+    a whole list of tasks is inserted in one batch per table at flush time
+    instead of a flush per task. Lists keep the payload's order (ranked()).
+    """
+    return Task(
+        text=task_data.get('text', ''),
+        completed=task_data.get('completed', False),
+        start_date=parse_date(task_data.get('startDate')),
+        end_date=parse_date(task_data.get('endDate')),
+        assignee_name=task_data.get('assignee'),
+        subtasks=ranked([
+            Subtask(
+                text=subtask_data.get('text', ''),
+                completed=subtask_data.get('completed', False),
+                assignee_name=subtask_data.get('assignee')
+            )
+            for subtask_data in task_data.get('subtasks') or []
+        ])
+    )
+
+
+def tasks_from_payload(tasks_data):
+    """Tasks (with subtasks) from a list in the frontend task format, in list order"""
+    return ranked([task_from_payload(task_data) for task_data in tasks_data or []])
+
+
+def image_from_payload(image_data):
+    """ProjectImage from a snapshot image: a dict as in to_dict() or a bare data URL"""
+    if not isinstance(image_data, dict):
+        return ProjectImage(image_data=image_data)
+    # Uploaded images point at their upload again rather than at its URL
+    if image_data.get('upload_id'):
+        return ProjectImage(upload_id=image_data['upload_id'])
+    return ProjectImage(image_data=image_data.get('image_data'))
+
+
+def image_uploads(projects_data):
+    """Ids of the uploads the images of snapshot projects point at"""
+    return {image['upload_id'] for project_data in projects_data for image in project_data.get('images', [])
+            if isinstance(image, dict) and image.get('upload_id')}
+
+
+def project_children_from_payload(project, project_data):
+    """Attach team, images, links and tasks from a snapshot project to a new Project"""
+    project.project_teams = [ProjectTeam(member_name=name) for name in project_data.get('team', [])]
+    project.images = ranked([image_from_payload(image_data) for image_data in project_data.get('images', [])])
+    project.links = [
+        ProjectLink(url=link_data['url'], label=link_data.get('label'))
+        for link_data in project_data.get('links', [])
+    ]
+    project.tasks = tasks_from_payload(project_data.get('tasks'))
+    return project
+
+
+def project_from_payload(project_data):
+    """New Project with its whole tree from a snapshot project"""
+    project = Project(
+        name=project_data['name'],
+        description=project_data.get('description', ''),
+        status=project_data.get('status', 'planning'),
+        starred=bool(project_data.get('starred')),
+        meeting_minutes=project_data.get('meetingMinutes', ''),
+        channels=project_data.get('channels', []),
+        applications=project_data.get('applications', []),
+        delivery_date=parse_date(project_data.get('deliveryDate'))
+    )
+    return project_children_from_payload(project, project_data)
+
+
+def member_from_payload(member_data):
+    return TeamMember(
+        name=member_data['name'],
+        role=member_data['role'],
+        skills=member_data.get('skills', []),
+        workload=member_data.get('workload', 0)
+    )
+
+
+def _report(progress, done, total):
+    if progress is not None:
+        progress(done, total)
+
+
+def replace_snapshot(session, data, operation='restore', progress=None):
+    """Replace every team member and project with the snapshot's (one transaction)"""
+    total = len(data['teamMembers']) + len(data['projects'])
+    _report(progress, 0, total)
+
+    # Clients should refetch everything rather than receive per-row events
+    mark_bulk_change(session)
+
+    # Clear existing data
+    for model in (Subtask, Task, ProjectLink, ProjectImage, ProjectTeam, ProjectChannel, ProjectApplication,
+                  MeetingMinutesRevision, Project, TeamMember):
+        session.query(model).delete()
+
+    session.add_all(member_from_payload(member_data) for member_data in data['teamMembers'])
+    session.flush()
+    done = len(data['teamMembers'])
+    _report(progress, done, total)
+
+    # Projects with their team, images, links and tasks (one batch per table per chunk)
+    for i, project_data in enumerate(data['projects'], 1):
+        session.add(project_from_payload(project_data))
+        if i % CHUNK_SIZE == 0:
+            session.flush()
+            _report(progress, done + i, total)
+
+    session.commit()
+    record_snapshot_rows(operation, data)
+    _report(progress, total, total)
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'teamMembers': len(data['teamMembers']),
+        'projects': len(data['projects'])
+    }
+
+
+def merge_snapshot(session, data, progress=None):
+    """Update rows matched by name and create the rest; returns updated/created counts"""
+    members = data.get('teamMembers') or []
+    projects = data.get('projects') or []
+    total = len(members) + len(projects)
+    _report(progress, 0, total)
+    updated_count = 0
+    created_count = 0
+
+    # Update or create team members (existing rows fetched in one query)
+    if members:
+        names = [member_data['name'] for member_data in members]
+        existing_members = {m.name: m for m in session.query(TeamMember).filter(TeamMember.name.in_(names))}
+        for member_data in members:
+            existing_member = existing_members.get(member_data['name'])
+            if existing_member:
+                existing_member.role = member_data.get('role', existing_member.role)
+                existing_member.skills = member_data.get('skills', existing_member.skills)
+                existing_member.workload = member_data.get('workload', existing_member.workload)
+                updated_count += 1
+            else:
+                new_member = member_from_payload(member_data)
+                session.add(new_member)
+                existing_members[new_member.name] = new_member
+                created_count += 1
+
+    session.flush()
+    _report(progress, len(members), total)
+
+    # Update or create projects
+    if projects:
+        names = [project_data['name'] for project_data in projects]
+        existing_projects = {p.name: p for p in session.query(Project).filter(Project.name.in_(names))}
+
+        # Team and tasks of existing projects are replaced; clear them all up front
+        existing_ids = [p.id for p in existing_projects.values()]
+        if existing_ids:
+            session.query(ProjectTeam).filter(ProjectTeam.project_id.in_(existing_ids)).delete(synchronize_session=False)
+            session.query(Task).filter(Task.project_id.in_(existing_ids)).delete(synchronize_session=False)
+
+        for i, project_data in enumerate(projects, 1):
+            existing_project = existing_projects.get(project_data['name'])
+            if existing_project:
+                existing_project.status = project_data.get('status', existing_project.status)
+                existing_project.starred = bool(project_data.get('starred', existing_project.starred))
+                # Deferred text columns: only touched when present so they aren't loaded per project
+                if 'description' in project_data:
+                    existing_project.description = project_data['description']
+                if 'meetingMinutes' in project_data:
+                    existing_project.meeting_minutes = project_data['meetingMinutes']
+
+                for member_name in project_data.get('team', []):
+                    session.add(ProjectTeam(project_id=existing_project.id, member_name=member_name))
+                for task in tasks_from_payload(project_data.get('tasks')):
+                    task.project_id = existing_project.id
+                    session.add(task)
+                updated_count += 1
+            else:
+                new_project = project_from_payload(project_data)
+                session.add(new_project)
+                existing_projects[new_project.name] = new_project
+                created_count += 1
+            if i % CHUNK_SIZE == 0:
+                session.flush()
+                _report(progress, len(members) + i, total)
+
+    session.commit()
+    record_snapshot_rows('merge', data)
+    _report(progress, total, total)
+    return {
+        'timestamp': datetime.utcnow().isoformat(),
+        'updated': updated_count,
+        'created': created_count
+    }
+
+
+def sync_project(session, data):
+    """Create a project from the payload, or update the one with the same name.
+
+    Returns (project, created).
+    """
+    existing = session.query(Project).filter_by(name=data['name']).first()
+    if existing:
+        # Update existing project instead of creating duplicate
+        for key, attr in (('description', 'description'), ('status', 'status'),
+                          ('meetingMinutes', 'meeting_minutes'), ('channels', 'channels'),
+                          ('applications', 'applications')):
+            if key in data:
+                setattr(existing, attr, data[key])
+        if 'starred' in data:
+            existing.starred = bool(data['starred'])
+        if 'deliveryDate' in data:
+            existing.delivery_date = parse_date(data['deliveryDate'])
+        session.commit()
+        return existing, False
+
+    project = Project(
+        name=data['name'],
+        description=data.get('description', ''),
+        status=data.get('status', 'planning'),
+        starred=bool(data.get('starred')),
+        meeting_minutes=data.get('meetingMinutes', ''),
+        channels=data.get('channels', []),
+        applications=data.get('applications', []),
+        delivery_date=parse_date(data.get('deliveryDate'))
+    )
+    project.tasks = tasks_from_payload(data.get('tasks'))
+    session.add(project)
+    session.commit()
+    return project, True
+
+
+def export_snapshot(session, progress=None):
+    """Full snapshot in the backup format"""
+    _report(progress, 0, 1)
+    data = snapshot_payload(session)
+    record_snapshot_rows('export', data)
+    _report(progress, 1, 1)
+    return data
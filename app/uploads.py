@@ -0,0 +1,341 @@
+"""
+Streaming file uploads.
+
+Request bodies are copied to ``UPLOAD_DIR`` in ``CHUNK_SIZE`` pieces and
+hashed (SHA-256) as they pass through, so memory per upload stays bounded
+whatever the file size and nothing is base64-encoded or parsed as JSON:
+
+- ``POST /api/upload``: one request, either ``multipart/form-data`` (field
+  ``file``) or a raw body with the name in ``?filename=``.
+- ``POST /api/projects/<id>/images``: the same, stored as a project image
+  (JSON bodies with a base64 ``image_data`` data URL still work).
+- Resumable uploads for large attachments::
+
+      POST  /api/uploads        {"filename": "...", "size": n, "contentType": "..."}
+      PATCH /api/uploads/<id>   raw chunk, Upload-Offset: <bytes already received>
+      GET   /api/uploads/<id>   status and offset, to resume after a failure
+
+  Chunks are appended in order; a chunk sent at the wrong offset gets
+  ``409`` with the current offset. The upload completes when ``size`` bytes
+  have arrived.
+
+Stored files are served by ``GET /api/uploads/<id>/content``. Every request
+is capped at ``UPLOAD_MAX_BYTES`` (413 beyond it). The database connection
+is released while a body is being received, so slow clients don't hold
+pool connections.
+
+The bytes received so far are the size of the partial file on disk, so any
+worker sharing ``UPLOAD_DIR`` can accept the next chunk. The running hash is
+kept by the worker that received the previous chunk; another worker
+rebuilds it from the partial file first.
+"""
+
+import fcntl
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, exists, select
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import parse_form_data
+
+from app import archive, backups
+from app.models import ProjectImage, Upload
+
+# Bytes read from the request (or a stored file) at a time
+CHUNK_SIZE = 64 * 1024
+
+# Running hashes of resumable uploads kept per worker
+HASHER_CACHE_SIZE = 256
+
+_upload_dir = None
+_max_bytes = 50 * 1024 * 1024
+_hashers_lock = threading.Lock()
+_hashers = OrderedDict()  # upload id -> (bytes hashed, hasher)
+
+
+class UploadConflict(Exception):
+    """Chunk sent at the wrong offset, or while another chunk is being written"""
+
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+def init_uploads(app):
+    global _upload_dir, _max_bytes
+    _upload_dir = app.config.get('UPLOAD_DIR') or os.path.join(app.instance_path, 'uploads')
+    _max_bytes = int(app.config.get('UPLOAD_MAX_BYTES', _max_bytes))
+
+
+def content_url(upload_id):
+    return f'/api/uploads/{upload_id}/content'
+
+
+def file_path(upload_id, partial=False):
+    return os.path.join(_upload_dir, f'{upload_id}.part' if partial else upload_id)
+
+
+def _copy(read, target, hasher, limit):
+    """Copy chunks from ``read`` to ``target`` until EOF; 413 past ``limit`` bytes. Returns bytes copied."""
+    copied = 0
+    while True:
+        chunk = read(CHUNK_SIZE)
+        if not chunk:
+            return copied
+        copied += len(chunk)
+        if copied > limit:
+            raise RequestEntityTooLarge(f'Upload exceeds {limit} bytes')
+        hasher.update(chunk)
+        target.write(chunk)
+
+
+def _hash_file(path, hasher=None):
+    hasher = hasher or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher
+
+
+class _HashingWriter:
+    """File object handed to the multipart parser: writes straight to UPLOAD_DIR, hashing and counting"""
+
+    def __init__(self, limit):
+        self.id = str(uuid.uuid4())
+        self.path = file_path(self.id, partial=True)
+        self.file = open(self.path, 'wb')
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.limit = limit
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.limit:
+            raise RequestEntityTooLarge(f'Upload exceeds {self.limit} bytes')
+        self.hasher.update(data)
+        return self.file.write(data)
+
+    def seek(self, *args):
+        # The parser rewinds finished parts; the data is already on its way to disk
+        self.file.flush()
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _complete(upload, size, digest, partial_path):
+    os.replace(partial_path, file_path(upload.id))
+    upload.size = size
+    upload.sha256 = digest
+    upload.status = 'complete'
+    upload.completed_at = datetime.utcnow()
+    return upload
+
+
+def _new_upload(session, upload_id, filename, content_type):
+    upload = Upload(id=upload_id, filename=filename, content_type=content_type)
+    session.add(upload)
+    return upload
+
+
+def receive(session, request, default_type='application/octet-stream', default_name=None):
+    """Store a whole file from ``request`` (multipart field ``file`` or the raw body); returns the Upload.
+
+    The caller commits. ValueError (400) when there is no file, or no name
+    for a raw body and no ``default_name``.
+    """
+    os.makedirs(_upload_dir, exist_ok=True)
+    session.close()  # no pool connection held while the body streams in
+    if request.mimetype == 'multipart/form-data':
+        writers = []
+
+        def stream_factory(total_content_length, content_type, filename, content_length=None):
+            writer = _HashingWriter(_max_bytes)
+            writers.append(writer)
+            return writer
+
+        try:
+            # Non-file fields (and the parser's buffer) stay within Flask's default form memory limit
+            _, _, files = parse_form_data(request.environ, stream_factory=stream_factory,
+                                          max_form_memory_size=500_000, max_form_parts=16)
+        except Exception:
+            for writer in writers:
+                writer.discard()
+            raise
+        file = files.get('file')
+        writer = next((w for w in writers if file is not None and file.stream is w), None)
+        for other in writers:
+            if other is not writer:
+                other.discard()
+        if writer is None or not file.filename:
+            if writer is not None:
+                writer.discard()
+            raise ValueError('No file provided')
+        writer.file.close()
+        upload = _new_upload(session, writer.id, file.filename, file.mimetype or default_type)
+        return _complete(upload, writer.size, writer.hasher.hexdigest(), writer.path)
+
+    filename = request.args.get('filename') or request.headers.get('X-Filename') or default_name
+    if not filename:
+        raise ValueError('filename is required (multipart field "file" or ?filename=)')
+    upload_id = str(uuid.uuid4())
+    path = file_path(upload_id, partial=True)
+    hasher = hashlib.sha256()
+    try:
+        with open(path, 'wb') as f:
+            size = _copy(request.stream.read, f, hasher, _max_bytes)
+    except BaseException:
+        os.remove(path)
+        raise
+    # curl --data-binary sends application/x-www-form-urlencoded unless told otherwise
+    content_type = request.mimetype if request.mimetype not in ('', 'application/x-www-form-urlencoded') else default_type
+    upload = _new_upload(session, upload_id, filename, content_type)
+    return _complete(upload, size, hasher.hexdigest(), path)
+
+
+# ============= Resumable uploads =============
+
+def _received(upload):
+    if upload.status == 'complete':
+        return upload.size
+    path = file_path(upload.id, partial=True)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def upload_status(upload):
+    status = upload.to_dict()
+    status['offset'] = _received(upload)
+    if upload.status == 'complete':
+        status['url'] = content_url(upload.id)
+    return status
+
+
+def start_upload(session, data):
+    """Start a resumable upload of ``size`` bytes (the caller commits)"""
+    if not data.get('filename'):
+        raise ValueError('filename is required')
+    size = data.get('size')
+    if not isinstance(size, int) or size < 0:
+        raise ValueError('size must be a non-negative integer')
+    if size > _max_bytes:
+        raise RequestEntityTooLarge(f'Upload exceeds {_max_bytes} bytes')
+    os.makedirs(_upload_dir, exist_ok=True)
+    upload = Upload(id=str(uuid.uuid4()), filename=data['filename'],
+                    content_type=data.get('contentType') or 'application/octet-stream', size=size, status='pending')
+    open(file_path(upload.id, partial=True), 'wb').close()
+    session.add(upload)
+    return upload
+
+
+def _running_hash(upload_id, offset, path):
+    with _hashers_lock:
+        hashed, hasher = _hashers.pop(upload_id, (None, None))
+    if hashed != offset:
+        # First chunk seen by this worker (or it was evicted): rebuild from disk
+        hasher = _hash_file(path) if offset else hashlib.sha256()
+    return hasher
+
+
+def _keep_hash(upload_id, offset, hasher):
+    with _hashers_lock:
+        _hashers[upload_id] = (offset, hasher)
+        while len(_hashers) > HASHER_CACHE_SIZE:
+            _hashers.popitem(last=False)
+
+
+def append_chunk(session, upload_id, offset, stream):
+    """Append the request body to a pending upload at ``offset``; returns the Upload (committed).
+
+    None if the upload doesn't exist; UploadConflict (409) for a wrong offset
+    or a concurrent chunk; 413 past the declared size.
+    """
+    upload = session.get(Upload, upload_id)
+    if upload is None:
+        return None
+    if upload.status == 'complete':
+        raise UploadConflict('Upload is already complete', upload.size)
+    size, path = upload.size, file_path(upload_id, partial=True)
+    session.close()  # no pool connection held while the chunk streams in; upload stays loaded
+    with open(path, 'ab') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict('Another chunk of this upload is being written', offset) from None
+        received = os.fstat(f.fileno()).st_size
+        if offset != received:
+            raise UploadConflict(f'Expected Upload-Offset {received}', received)
+        hasher = _running_hash(upload_id, received, path)
+        try:
+            received += _copy(stream.read, f, hasher, size - received)
+        finally:
+            f.flush()
+            received = os.fstat(f.fileno()).st_size
+    session.add(upload)
+    if received < size:
+        _keep_hash(upload_id, received, hasher)
+        return upload
+    _complete(upload, size, hasher.hexdigest(), path)
+    session.commit()
+    return upload
+
+
+def discard(upload):
+    """Remove a stored file whose Upload row is being rolled back or deleted"""
+    for path in (file_path(upload.id), file_path(upload.id, partial=True)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def stored_file(session, upload_id):
+    """(path, Upload) of a completed upload, or (None, None)"""
+    upload = session.get(Upload, upload_id)
+    if upload is None or upload.status != 'complete':
+        return None, None
+    return file_path(upload_id), upload
+
+
+def prune_uploads(session, max_age_hours):
+    """Delete uploads nothing needs any more, with their files; returns {'pending': n, 'unreferenced': n}.
+
+    Pending uploads not completed within ``max_age_hours`` go, and so do
+    completed ones older than that which no project image points at (its
+    image or project was deleted, or it was never attached). Uploads that
+    images in the archive or in a stored backup point at are kept, so
+    restoring those finds their files.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    stale = session.scalars(select(Upload).where(Upload.status == 'pending', Upload.created_at < cutoff)).all()
+    for upload in stale:
+        path = file_path(upload.id, partial=True)
+        if os.path.exists(path):
+            os.remove(path)
+        with _hashers_lock:
+            _hashers.pop(upload.id, None)
+        session.delete(upload)
+    session.commit()
+
+    unattached = ~exists().where(ProjectImage.upload_id == Upload.id)
+    candidates = set(session.scalars(
+        select(Upload.id).where(Upload.status == 'complete', Upload.completed_at < cutoff, unattached)
+    ))
+    if candidates:
+        candidates -= archive.referenced_uploads(session)
+    if candidates:
+        candidates -= backups.referenced_uploads(session)
+    removed = []
+    if candidates:
+        # Checked again in the statement: an image may have been attached meanwhile
+        removed = session.scalars(
+            delete(Upload).where(Upload.id.in_(candidates), unattached).returning(Upload.id)
+        ).all()
+    session.commit()
+    for upload_id in removed:
+        if os.path.exists(file_path(upload_id)):
+            os.remove(file_path(upload_id))
+    return {'pending': len(stale), 'unreferenced': len(removed)}
@@ -0,0 +1,98 @@
+"""
+Concurrency benchmark: sync (gthread) vs async (uvicorn) read path
+
+Runs one gunicorn worker per mode and opens many concurrent connections
+against a heavy GET endpoint, then compares throughput and tail latency.
+The sync mode serves wsgi:app with a fixed thread pool; the async mode
+serves asgi:application on one event loop.
+
+Usage:
+    python benchmarks/bench_async.py [--path /api/data] [--connections 64] [--threads 8] [--duration 10]
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import statistics
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load import ROOT, client_process, free_port, wait_until_ready
+
+MODES = {
+    'sync (gthread)': ('gthread', 'wsgi:app'),
+    'async (uvicorn)': ('uvicorn', 'asgi:application'),
+}
+
+
+def run_mode(worker_class, target, args):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY='1', GUNICORN_THREADS=str(args.threads),
+               GUNICORN_WORKER_CLASS=worker_class, GUNICORN_ACCESS_LOG='/dev/null')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', target],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port, args.path)
+        per_client = max(1, args.connections // args.clients)
+        queue = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_process, args=(port, args.path, args.duration, per_client, queue))
+            for _ in range(args.clients)
+        ]
+        for c in clients:
+            c.start()
+        latencies, errors = [], 0
+        for _ in clients:
+            lat, err = queue.get()
+            latencies.extend(lat)
+            errors += err
+        for c in clients:
+            c.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    latencies.sort()
+    n = len(latencies)
+    if not n:
+        return None
+    return {
+        'rps': n / args.duration,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(n * 0.95) - 1] * 1000,
+        'p99': latencies[int(n * 0.99) - 1] * 1000,
+        'max': latencies[-1] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/api/data')
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--clients', type=int, default=4, help='client processes')
+    parser.add_argument('--threads', type=int, default=8, help='OS threads / DB connections per worker')
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(f"Concurrency benchmark: GET {args.path}, {args.connections} connections, "
+          f"1 worker, {args.threads} threads/connections")
+    print("=" * 78)
+    print(f"  {'mode':<16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    for label, (worker_class, target) in MODES.items():
+        r = run_mode(worker_class, target, args)
+        if r is None:
+            print(f"  {label:<16} no successful requests")
+            continue
+        print(f"  {label:<16} {r['rps']:>9.1f} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['p99']:>9.2f} "
+              f"{r['max']:>9.2f} {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
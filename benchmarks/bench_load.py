@@ -0,0 +1,149 @@
+"""
+Load test: requests/second as gunicorn workers scale across cores
+
+Starts gunicorn with gunicorn.conf.py for each worker count, hammers one
+endpoint from several client processes and reports throughput and latency.
+
+Usage:
+    python benchmarks/bench_load.py [--workers 1,2,4] [--worker-class gthread]
+                                    [--path /api/data] [--duration 10] [--clients 4] [--concurrency 8]
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(port, path, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', path)
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not become ready on port {port}')
+
+
+def client_process(port, path, duration, concurrency, queue):
+    """Run `concurrency` keep-alive client threads and report latencies"""
+    import threading
+
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def loop():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    raise http.client.HTTPException(response.status)
+                local.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=loop) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    queue.put((latencies, errors[0]))
+
+
+def run_level(workers, args):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_WORKER_CLASS=args.worker_class, GUNICORN_ACCESS_LOG='/dev/null')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port, args.path)
+        queue = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client_process,
+                                    args=(port, args.path, args.duration, args.concurrency, queue))
+            for _ in range(args.clients)
+        ]
+        for c in clients:
+            c.start()
+        latencies, errors = [], 0
+        for _ in clients:
+            lat, err = queue.get()
+            latencies.extend(lat)
+            errors += err
+        for c in clients:
+            c.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    latencies.sort()
+    if not latencies:
+        return {'rps': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'errors': errors}
+    return {
+        'rps': len(latencies) / args.duration,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cpus = os.cpu_count() or 1
+    default_levels = sorted({1, max(1, cpus // 2), cpus, cpus * 2 + 1})
+    parser.add_argument('--workers', default=','.join(str(n) for n in default_levels))
+    parser.add_argument('--worker-class', default='gthread', choices=['gthread', 'gevent'])
+    parser.add_argument('--path', default='/api/data')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=4, help='client processes')
+    parser.add_argument('--concurrency', type=int, default=8, help='connections per client process')
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"Load test: GET {args.path} ({args.worker_class}, {cpus} CPU(s), "
+          f"{args.clients * args.concurrency} connections, {args.duration:.0f}s per level)")
+    print("=" * 72)
+    print(f"  {'workers':>7} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'scaling':>8}")
+    base = None
+    for workers in (int(n) for n in args.workers.split(',')):
+        result = run_level(workers, args)
+        base = base or result['rps'] or 1
+        print(f"  {workers:>7} {result['rps']:>10.1f} {result['p50']:>9.2f} {result['p95']:>9.2f} "
+              f"{result['p99']:>9.2f} {result['errors']:>7} {result['rps'] / base:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: serialization cost of the full /api/data snapshot
+
+Builds an in-memory project graph (no database needed), then times how long
+each JSON provider takes to turn the snapshot into a response body.
+
+Usage:
+    python benchmarks/bench_serialization.py [--members 50] [--projects 200] [--tasks 15] [--subtasks 4]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import OrjsonProvider, StdlibJSONProvider, orjson
+from app.models import TeamMember, Project, ProjectTeam, ProjectLink, Task, Subtask
+
+
+def build_snapshot(members, projects, tasks, subtasks):
+    """Build transient model objects and return the /api/data payload"""
+    now = datetime.utcnow()
+    team = [
+        TeamMember(id=i, name=f'Member {i}', role='Engineer', skills=['python', 'sql'],
+                   workload=50, created_at=now)
+        for i in range(members)
+    ]
+    all_projects = []
+    for p in range(projects):
+        project = Project(
+            id=p, name=f'Project {p}', description='Lorem ipsum dolor sit amet ' * 8,
+            status='active', starred=p % 7 == 0, meeting_minutes='Discussed scope. ' * 20,
+            channels=['web', 'mobile'], applications=['crm'],
+            delivery_date=date.today() + timedelta(days=p), created_at=now
+        )
+        project.links = [ProjectLink(url=f'https://example.com/{p}', label='Spec')]
+        project.project_teams = [ProjectTeam(member=team[(p + k) % members]) for k in range(3)]
+        for t in range(tasks):
+            task = Task(
+                id=p * tasks + t, text=f'Task {t} of project {p}', completed=t % 3 == 0,
+                start_date=date.today(), end_date=date.today() + timedelta(days=t),
+                assignee_name=team[t % members].name
+            )
+            task.subtasks = [
+                Subtask(id=(p * tasks + t) * subtasks + s, text=f'Subtask {s}', completed=False,
+                        assignee_name=team[s % members].name)
+                for s in range(subtasks)
+            ]
+            project.tasks.append(task)
+        all_projects.append(project)
+
+    return {
+        'teamMembers': [m.to_dict() for m in team],
+        'projects': [p.to_dict(include_tasks=True) for p in all_projects],
+        'exportDate': now.isoformat(),
+        'version': '2.5.0'
+    }
+
+
+def time_provider(app, provider_class, payload, repeat):
+    """Return (median seconds, body size) for provider.response(payload)"""
+    provider = provider_class(app)
+    samples = []
+    size = 0
+    with app.app_context():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = provider.response(payload).get_data()
+            samples.append(time.perf_counter() - start)
+            size = len(body)
+    return statistics.median(samples), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--members', type=int, default=50)
+    parser.add_argument('--projects', type=int, default=200)
+    parser.add_argument('--tasks', type=int, default=15)
+    parser.add_argument('--subtasks', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+
+    start = time.perf_counter()
+    payload = build_snapshot(args.members, args.projects, args.tasks, args.subtasks)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print("=" * 60)
+    print("Serialization benchmark: full /api/data snapshot")
+    print("=" * 60)
+    print(f"members={args.members} projects={args.projects} tasks/project={args.tasks} "
+          f"subtasks/task={args.subtasks}")
+    print(f"to_dict() graph build: {build_ms:.1f} ms\n")
+
+    providers = [('flask default (before)', DefaultJSONProvider), ('stdlib iso', StdlibJSONProvider)]
+    if orjson is not None:
+        providers.append(('orjson', OrjsonProvider))
+    else:
+        print("⚠ orjson not installed, skipping orjson provider\n")
+
+    baseline = None
+    for label, provider_class in providers:
+        seconds, size = time_provider(app, provider_class, payload, args.repeat)
+        baseline = baseline or seconds
+        print(f"  {label:<24} {seconds * 1000:8.2f} ms  {size / 1024:9.1f} KiB  "
+              f"x{baseline / seconds:5.2f}")
+
+
+if __name__ == '__main__':
+    main()
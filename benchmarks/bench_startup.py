@@ -0,0 +1,71 @@
+"""
+Benchmark: cold start latency (import -> first response)
+
+Each run starts a fresh interpreter, imports the WSGI entry point and serves
+one request through the Flask test client, which is what a Cloud Run cold
+start pays before the first user request is answered.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--module wsgi] [--path /about]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import importlib, json, time
+t0 = time.perf_counter()
+module = importlib.import_module({module!r})
+t1 = time.perf_counter()
+client = module.app.test_client()
+response = client.get({path!r})
+t2 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "first_response": t2 - t1, "status": response.status_code}}))
+'''
+
+
+def run_once(module, path):
+    """Start a fresh interpreter and return (wall seconds, child timings)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD.format(module=module, path=path)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - start
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return wall, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--module', default='wsgi', help='module exposing `app` (default: wsgi)')
+    parser.add_argument('--path', default='/about', help='path of the first request')
+    args = parser.parse_args()
+
+    walls, imports, firsts = [], [], []
+    status = None
+    for _ in range(args.runs):
+        wall, timings = run_once(args.module, args.path)
+        walls.append(wall)
+        imports.append(timings['import'])
+        firsts.append(timings['first_response'])
+        status = timings['status']
+
+    print("=" * 60)
+    print(f"Cold start benchmark: import {args.module} -> GET {args.path} ({status})")
+    print("=" * 60)
+    for label, samples in (('import', imports), ('first response', firsts), ('process wall', walls)):
+        print(f"  {label:<16} median {statistics.median(samples) * 1000:8.1f} ms  "
+              f"max {max(samples) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
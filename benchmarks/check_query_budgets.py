@@ -0,0 +1,365 @@
+"""
+Per-route SQL statement budgets
+
+Runs every route registered on the ``main`` blueprint once against a
+synthetic dataset (app/datagen.py) and fails when a route executes more SQL
+statements than its budget in ROUTES. Each route gets a fresh copy of the
+generated database, so writes and deletes don't affect the next check.
+
+The dataset is generated at two scales; a route whose budget is a plain
+number must not issue more statements at the larger one, which is what
+catches N+1 patterns (a lazy relationship walked in ``to_dict``, a flush per
+row in a loop). Routes that insert one row per item of the request body take
+a callable budget of the dataset row counts instead: SQLite can't batch ORM
+inserts that need generated keys back, so there every inserted row is a
+statement (PostgreSQL batches them via insertmanyvalues).
+
+A route added to the blueprint without an entry here is reported as an
+error, so new endpoints have to declare a budget.
+
+Usage:
+    python benchmarks/check_query_budgets.py [--scales tiny,small] [--verbose]
+
+Exits with status 1 on any violation.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@dataclass
+class Route:
+    """One request to check: path/body may use the fixture values from `fixtures()`"""
+    path: str
+    budget: Union[int, Callable[[dict], int]]
+    body: Optional[Callable[[dict], object]] = None
+    status: int = None  # expected status; any 2xx when None
+    data: Optional[bytes] = None  # raw request body instead of JSON
+    headers: Optional[Callable[[dict], dict]] = None
+
+
+def snapshot_rows(n):
+    """Rows inserted by a restore/import of the whole dataset"""
+    return sum(n[table] for table in ('team_members', 'projects', 'project_team', 'project_channels',
+                                      'project_applications', 'images', 'links', 'tasks', 'subtasks'))
+
+
+def chunks(n):
+    """Flushes of a restore (one channel/application upsert each)"""
+    from app.snapshots import CHUNK_SIZE
+    return 2 * (n['projects'] // CHUNK_SIZE + 1)
+
+
+# Body of the upload routes (a resumable upload is one chunk)
+UPLOAD_BYTES = b'budget check' * 1000
+
+
+def project_tree_rows(n):
+    """Tasks plus subtasks of one project"""
+    return (n['tasks'] + n['subtasks']) // n['projects']
+
+
+def _project_payload(ctx):
+    return {'description': 'Budget check', 'status': 'active', 'tasks': ctx['tasks']}
+
+
+ROUTES = {
+    ('main.index', 'GET'): Route('/', 0),
+    ('main.about', 'GET'): Route('/about', 0),
+    ('main.get_json_data', 'GET'): Route('/api/data', 11),
+    ('main.backup_endpoint', 'GET'): Route('/api/backup', 11),
+    ('main.backup_endpoint', 'POST'): Route(
+        '/api/backup', lambda n: 26 + snapshot_rows(n) + chunks(n), body=lambda ctx: ctx['snapshot']),
+    ('main.backup_endpoint', 'PUT'): Route(
+        '/api/backup', lambda n: 20 + n['project_team'] + n['tasks'] + n['subtasks'], body=lambda ctx: ctx['snapshot']),
+    ('main.import_data', 'POST'): Route(
+        '/api/import', lambda n: 26 + snapshot_rows(n) + chunks(n), body=lambda ctx: ctx['snapshot']),
+    ('main.export_backup', 'POST'): Route('/api/backup/export', 17),
+    ('main.list_backups', 'GET'): Route('/api/backups', 1),
+    ('main.create_backup', 'POST'): Route('/api/backups?sync=1', 15, body=lambda ctx: {}),
+    ('main.download_backup', 'GET'): Route('/api/backups/{backup_id}/file', 1),
+    ('main.restore_from_backup', 'POST'): Route(
+        '/api/backups/{backup_id}/restore?sync=1', lambda n: 22 + snapshot_rows(n) + chunks(n)),
+    ('main.list_archive', 'GET'): Route('/api/archive?limit=20&status=completed', 1),
+    ('main.get_archived_project', 'GET'): Route('/api/archive/{archive_id}', 1),
+    ('main.restore_archived_project', 'POST'): Route(
+        '/api/archive/{archive_id}/restore', lambda n: 29 + project_tree_rows(n)),
+    ('main.run_archive', 'POST'): Route('/api/archive/run?sync=1', 1),
+    ('main.get_job', 'GET'): Route('/api/jobs/{job_id}', 1),
+    ('main.get_job_result', 'GET'): Route('/api/jobs/{job_id}/result', 1),
+
+    ('main.get_users', 'GET'): Route('/api/users', 1),
+    ('main.get_user', 'GET'): Route('/api/users/{user_id}', 1),
+    ('main.create_user', 'POST'): Route('/api/users', 4, body=lambda ctx: {
+        'username': 'budget-check', 'email': 'budget-check@example.com'}),
+    ('main.update_user', 'PUT'): Route('/api/users/{user_id}', 4, body=lambda ctx: {'username': 'renamed'}),
+    ('main.delete_user', 'DELETE'): Route('/api/users/{user_id}', 5),
+    ('main.get_user_posts', 'GET'): Route('/api/users/{user_id}/posts', 2),
+    ('main.get_posts', 'GET'): Route('/api/posts?limit=5&cursor={posts_cursor}&total=estimate', 2),
+    ('main.get_post', 'GET'): Route('/api/posts/{post_id}', 1),
+    ('main.create_post', 'POST'): Route('/api/posts', 3, body=lambda ctx: {
+        'title': 'Budget check', 'content': 'Body', 'user_id': ctx['user_id']}),
+    ('main.update_post', 'PUT'): Route('/api/posts/{post_id}', 4, body=lambda ctx: {'title': 'Edited'}),
+    ('main.delete_post', 'DELETE'): Route('/api/posts/{post_id}', 3),
+    ('main.search', 'GET'): Route('/api/search?q=lorem', 1),
+    ('main.get_stats', 'GET'): Route('/api/stats', 1),
+    ('main.dashboard_report', 'GET'): Route('/api/reports/dashboard', 4),
+    ('main.task_overview_report', 'GET'): Route('/api/reports/task-overview', 4),
+    ('main.upload_file', 'POST'): Route('/api/upload?filename=budget.bin', 2, data=UPLOAD_BYTES),
+    ('main.create_upload', 'POST'): Route('/api/uploads', 2, body=lambda ctx: {
+        'filename': 'budget.bin', 'size': len(UPLOAD_BYTES)}),
+    ('main.get_upload', 'GET'): Route('/api/uploads/{pending_upload_id}', 1),
+    ('main.upload_chunk', 'PATCH'): Route('/api/uploads/{pending_upload_id}', 3, data=UPLOAD_BYTES,
+                                          headers=lambda ctx: {'Upload-Offset': '0'}),
+    ('main.get_upload_content', 'GET'): Route('/api/uploads/{upload_id}/content', 1),
+    ('main.get_pool_stats', 'GET'): Route('/api/pool', 0),
+
+    ('main.get_team_members', 'GET'): Route('/api/team-members', 2),
+    ('main.create_team_member', 'POST'): Route('/api/team-members', 5, body=lambda ctx: {
+        'name': 'Budget Check', 'role': 'Developer', 'skills': ['python']}),
+    ('main.update_team_member', 'PUT'): Route('/api/team-members/{member_id}', 5, body=lambda ctx: {
+        'name': 'Budget Check Renamed', 'role': 'Architect'}),  # a rename is one row whatever the data size
+    ('main.delete_team_member', 'DELETE'): Route('/api/team-members/{member_id}', 4),
+
+    ('main.get_projects', 'GET'): Route('/api/projects', 9),
+    ('main.get_project_summaries', 'GET'): Route('/api/projects/summary', 1),
+    ('main.get_channels', 'GET'): Route('/api/channels', 1),
+    ('main.get_applications', 'GET'): Route('/api/applications', 1),
+    ('main.get_meeting_minutes', 'GET'): Route('/api/projects/{project_id}/minutes?history=1', 2),
+    ('main.update_meeting_minutes', 'PUT'): Route('/api/projects/{project_id}/minutes', 5, body=lambda ctx: {
+        'meetingMinutes': 'Budget check minutes'}),
+    ('main.get_project', 'GET'): Route('/api/projects/{project_id}', 9),
+    ('main.create_project', 'POST'): Route('/api/projects', 11, body=lambda ctx: {
+        'name': 'Budget check project', 'description': 'New', 'team': [ctx['member_name']]}),
+    ('main.sync_project', 'POST'): Route(
+        '/api/projects/sync', lambda n: 14 + project_tree_rows(n),
+        body=lambda ctx: {**_project_payload(ctx), 'name': 'Budget check synced project'}),
+    ('main.update_project', 'PUT'): Route(
+        '/api/projects/{project_id}', lambda n: 21 + project_tree_rows(n), body=_project_payload),
+    ('main.delete_project', 'DELETE'): Route('/api/projects/{project_id}', 7),
+    ('main.archive_project', 'POST'): Route('/api/projects/{project_id}/archive', 19),
+    ('main.bulk_team_assignment', 'POST'): Route('/api/projects/team', 5, body=lambda ctx: {
+        'project_ids': ctx['project_ids'], 'member_names': ctx['member_names']}),
+    ('main.bulk_team_assignment', 'DELETE'): Route('/api/projects/team', 5, body=lambda ctx: {
+        'project_ids': ctx['project_ids'], 'member_names': ctx['member_names']}),
+    ('main.add_team_member_to_project', 'POST'): Route('/api/projects/{project_id}/team', 6, body=lambda ctx: {
+        'member_name': ctx['free_member_name']}),
+    ('main.remove_team_member_from_project', 'DELETE'): Route('/api/projects/{project_id}/team/{member_name}', 5),
+    ('main.add_project_image', 'POST'): Route('/api/projects/{project_id}/images', 6, body=lambda ctx: {
+        'image_data': 'data:image/png;base64,iVBORw0KGgo='}),
+    ('main.delete_project_image', 'DELETE'): Route('/api/projects/{project_id}/images/{image_id}', 4),
+    ('main.move_project_image', 'PUT'): Route('/api/projects/{project_id}/images/{image_id}/position', 4,
+                                              body=lambda ctx: {'before': None}),
+
+    ('main.create_task', 'POST'): Route('/api/projects/{project_id}/tasks', 9, body=lambda ctx: {
+        'text': 'Budget check', 'startDate': '2025-01-01', 'assignee': ctx['member_name']}),
+    ('main.update_task', 'PUT'): Route('/api/tasks/{task_id}', 8, body=lambda ctx: {'text': 'Budget check edit'}),
+    ('main.delete_task', 'DELETE'): Route('/api/tasks/{task_id}', 6),
+    ('main.move_task', 'PUT'): Route('/api/tasks/{task_id}/position', 5, body=lambda ctx: {
+        'after': ctx['last_task_id']}),
+    ('main.create_subtask', 'POST'): Route('/api/tasks/{task_id}/subtasks', 8, body=lambda ctx: {
+        'text': 'Budget check'}),
+    ('main.update_subtask', 'PUT'): Route('/api/subtasks/{subtask_id}', 6, body=lambda ctx: {
+        'text': 'Budget check edit'}),
+    ('main.delete_subtask', 'DELETE'): Route('/api/subtasks/{subtask_id}', 4),
+    ('main.move_subtask', 'PUT'): Route('/api/subtasks/{subtask_id}/position', 4, body=lambda ctx: {
+        'after': None}),
+}
+
+# Routes that are not checked, with the reason
+SKIPPED = {
+    ('main.stream_events', 'GET'): 'long-lived SSE stream; no queries per event',
+}
+
+
+def fixtures(app, client):
+    """Ids and payloads the ROUTES paths and bodies refer to"""
+    from app import db
+    from app.models import Project, TeamMember, Subtask, User, Post, Job
+    from app.pagination import encode_cursor
+    from app.queries import POST_KEYS
+
+    with app.app_context():
+        # Most tasks, and channels and applications so deletes/updates touch every child table
+        project = max(Project.query.all(),
+                      key=lambda p: (len(p.tasks), bool(p.channel_links), bool(p.application_links)))
+        team = {pt.member_name for pt in project.project_teams}
+        free_member = TeamMember.query.filter(TeamMember.name.notin_(team)).first()
+        task = project.tasks[0]
+        user = User.query.join(Post).first()
+        ctx = {
+            'project_id': project.id,
+            'member_id': TeamMember.query.filter_by(name=sorted(team)[0]).one().id,
+            'member_name': sorted(team)[0],
+            'free_member_name': free_member.name,
+            'image_id': project.images[0].id,
+            'task_id': task.id,
+            'last_task_id': project.tasks[-1].id,
+            'subtask_id': Subtask.query.filter_by(task_id=task.id).first().id,
+            'user_id': user.id,
+            'post_id': Post.query.filter_by(user_id=user.id).first().id,
+            'job_id': Job.query.first().id,
+            'project_ids': [p.id for p in Project.query.order_by(Project.id).limit(3)],
+            'member_names': [m.name for m in TeamMember.query.order_by(TeamMember.id).limit(3)],
+        }
+        # A cursor halfway through the posts: deep pages must cost the same as the first
+        middle = Post.query.order_by(*POST_KEYS.order_by()).offset(Post.query.count() // 2).first()
+        ctx['posts_cursor'] = encode_cursor(POST_KEYS.values(middle))
+        db.session.remove()
+    ctx['snapshot'] = client.get('/api/backup').get_json()
+    ctx['tasks'] = next(p for p in ctx['snapshot']['projects'] if p['id'] == ctx['project_id'])['tasks']
+    return ctx
+
+
+def measure(app, client, route, method, ctx):
+    from app.profiling import count_queries
+
+    path = route.path.format(**ctx)
+    body = route.body(ctx) if route.body else None
+    headers = route.headers(ctx) if route.headers else None
+    with count_queries(keep_statements=True) as counter:
+        if route.data is not None:
+            response = getattr(client, method.lower())(path, data=route.data, headers=headers,
+                                                       content_type='application/octet-stream')
+        else:
+            response = getattr(client, method.lower())(path, json=body, headers=headers)
+    ok = response.status_code == route.status if route.status else 200 <= response.status_code < 300
+    return counter, response, ok
+
+
+def check_coverage(app):
+    """(endpoint, method) pairs on the blueprint without a budget, and stale entries"""
+    registered = {
+        (rule.endpoint, method)
+        for rule in app.url_map.iter_rules() if rule.endpoint.startswith('main.')
+        for method in rule.methods - {'HEAD', 'OPTIONS'}
+    }
+    declared = set(ROUTES) | set(SKIPPED)
+    return sorted(registered - declared), sorted(declared - registered)
+
+
+def run(args, workdir):
+    database = os.path.join(workdir, 'budget.db')
+    template = os.path.join(workdir, 'template.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database}'
+    # Run background jobs inside the request so their statements are counted
+    os.environ['JOB_BACKEND'] = 'inline'
+    os.environ['UPLOAD_DIR'] = os.path.join(workdir, 'uploads')
+    os.environ['BACKUP_DIR'] = os.path.join(workdir, 'backups')
+
+    from app import create_app, db
+    from app.datagen import Scale, generate_dataset
+    from app.profiling import install_query_hooks
+    from app.counters import reconcile_counters
+    from app.reports import clear_cache as clear_report_cache
+    from app.members import member_map
+
+    app = create_app()
+    install_query_hooks()
+    client = app.test_client()
+
+    failures = []
+    missing, stale = check_coverage(app)
+    for endpoint, method in missing:
+        failures.append(f'{method} {endpoint}: no query budget declared in ROUTES')
+    for endpoint, method in stale:
+        failures.append(f'{method} {endpoint}: budget declared for a route that no longer exists')
+
+    scales = args.scales.split(',')
+    results = {key: {} for key in ROUTES}
+
+    for scale_name in scales:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            counts = generate_dataset(db.session, Scale.preset(scale_name))
+            reconcile_counters(db.session)  # as `flask init-db` does
+            db.session.remove()
+        client.post('/api/backup/export')  # a finished job for the /api/jobs routes
+        # A full backup, so the next one is a diff and there is a chain to restore
+        backup_id = client.post('/api/backups?sync=1', json={}).get_json()['id']
+        # An archived project (the newest, so it isn't among the fixtures' projects)
+        newest = max(project['id'] for project in client.get('/api/projects/summary').get_json())
+        archive_id = client.post(f'/api/projects/{newest}/archive').get_json()['id']
+        # A stored file, and a resumable upload waiting for its only chunk (each route sends it once)
+        uploads = {
+            'upload_id': client.post('/api/upload?filename=budget.bin', data=UPLOAD_BYTES,
+                                     content_type='application/octet-stream').get_json()['id'],
+            'pending_upload_id': client.post('/api/uploads', json={
+                'filename': 'budget.bin', 'size': len(UPLOAD_BYTES)}).get_json()['id'],
+        }
+        with app.app_context():
+            db.engine.dispose()
+        shutil.copyfile(database, template)
+        ctx = {**fixtures(app, client), **uploads, 'backup_id': backup_id, 'archive_id': archive_id}
+
+        for key, route in ROUTES.items():
+            endpoint, method = key
+            with app.app_context():
+                db.engine.dispose()
+                shutil.copyfile(template, database)
+                clear_report_cache()  # data versions restart with every copy
+                member_map.clear()  # and so do member versions
+                db.engine.connect().close()  # open the connection outside the measurement
+                member_map.ids(db.session, [])  # measure with the map loaded, as in a running process
+                db.session.remove()
+
+            counter, response, ok = measure(app, client, route, method, ctx)
+            budget = route.budget(counts) if callable(route.budget) else route.budget
+            results[key][scale_name] = counter.count
+
+            if not ok:
+                failures.append(f'{method} {endpoint} [{scale_name}]: unexpected status {response.status_code} '
+                                f'{response.get_data(as_text=True)[:200]}')
+            if counter.count > budget:
+                failures.append(f'{method} {endpoint} [{scale_name}]: {counter.count} statements, budget {budget}')
+                if args.verbose:
+                    failures.extend(f'      {statement.splitlines()[0][:120]}' for statement in counter.statements)
+
+    # Constant budgets must not grow with the dataset
+    for key, route in ROUTES.items():
+        endpoint, method = key
+        observed = [results[key][s] for s in scales]
+        if not callable(route.budget) and max(observed) > observed[0]:
+            failures.append(f'{method} {endpoint}: statement count grows with data '
+                            f'({", ".join(f"{s}={results[key][s]}" for s in scales)})')
+
+    print("=" * 86)
+    print(f"Query budgets: {len(ROUTES)} routes, scales {', '.join(scales)}")
+    print("=" * 86)
+    print(f"  {'method':<7} {'endpoint':<42} {'budget':>7} " + ' '.join(f'{s:>7}' for s in scales))
+    for key, route in sorted(ROUTES.items(), key=lambda item: item[0]):
+        endpoint, method = key
+        budget = 'f(N)' if callable(route.budget) else route.budget
+        print(f"  {method:<7} {endpoint:<42} {budget:>7} " + ' '.join(f'{results[key].get(s, "-"):>7}' for s in scales))
+    for key, reason in SKIPPED.items():
+        print(f"  {key[1]:<7} {key[0]:<42} skipped: {reason}")
+
+    if failures:
+        print(f"\n✗ {len(failures)} problem(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\n✓ all routes within budget")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='tiny,small', help='comma-separated datagen presets')
+    parser.add_argument('--verbose', action='store_true', help='print the statements of routes over budget')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sys.exit(run(args, workdir))
+
+
+if __name__ == '__main__':
+    main()
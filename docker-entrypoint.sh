@@ -0,0 +1,13 @@
+#!/bin/sh
+set -e
+
+# Migrations are a release step (`flask init-db`, e.g. as a Cloud Run job or
+# the compose `migrate` service), not part of every cold start: it runs a
+# COUNT(*) per table to reconcile counters, and instances starting together
+# would race on an empty database. MIGRATE_ON_START=1 runs it here first,
+# for a single instance.
+if [ "${MIGRATE_ON_START:-0}" = "1" ]; then
+    flask --app wsgi init-db
+fi
+
+exec "$@"
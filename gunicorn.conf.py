@@ -0,0 +1,163 @@
+"""
+Gunicorn runtime profile for IT Resource Manager
+
+Usage:
+    gunicorn --config gunicorn.conf.py wsgi:app
+
+Workers are sized from the CPUs available to the container and every value
+can be overridden through the environment:
+
+    GUNICORN_WORKER_CLASS   gthread (default), gevent, or uvicorn (serve asgi:application)
+    WEB_CONCURRENCY         number of worker processes
+    GUNICORN_THREADS        threads per worker (gthread) / DB concurrency per worker (gevent)
+    GUNICORN_CONNECTIONS    greenlets per worker (gevent)
+    GUNICORN_PRELOAD        load the app once in the master before forking (default: true, false for gevent)
+    GUNICORN_MAX_REQUESTS   recycle a worker after this many requests (0 disables)
+    GUNICORN_TIMEOUT        seconds before a silent worker is killed and restarted
+    PROMETHEUS_MULTIPROC_DIR  shared directory for /metrics across workers
+"""
+
+import os
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def available_cpus():
+    """CPUs usable by this process, honouring affinity and cgroup quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _select_worker_class():
+    worker = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    if worker == 'gevent':
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            print("⚠ gevent is not installed, falling back to gthread workers")
+            worker = 'gthread'
+    if worker == 'uvicorn':
+        return 'uvicorn.workers.UvicornWorker'
+    if worker not in ('gthread', 'gevent'):
+        raise ValueError(f"Unsupported GUNICORN_WORKER_CLASS '{worker}'. Expected gthread, gevent or uvicorn")
+    return worker
+
+
+cpus = available_cpus()
+
+# ============= Server Socket =============
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+backlog = 2048
+
+# ============= Workers =============
+
+worker_class = _select_worker_class()
+
+if worker_class == 'uvicorn.workers.UvicornWorker':
+    # One event loop per core; GUNICORN_THREADS caps DB connections per worker
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus))
+    threads = int(os.environ.get('GUNICORN_THREADS', 10))
+elif worker_class == 'gevent':
+    # One process per core; concurrency comes from greenlets, not threads
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus))
+    worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', 1000))
+    threads = int(os.environ.get('GUNICORN_THREADS', 10))
+else:
+    # (2 x cores) + 1 processes, each with a small thread pool for I/O waits. Thread budget per
+    # worker: an /api/events stream holds a thread for up to SSE_MAX_SECONDS, so at most half of
+    # them (SSE_MAX_STREAMS) serve streams and the rest stay free for requests. Run the uvicorn
+    # worker class (streams on the event loop) or gevent when many tabs keep a stream open.
+    workers = int(os.environ.get('WEB_CONCURRENCY', cpus * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# app/pool.py sizes the database pool from these values; app/events.py caps thread-held SSE streams
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['GUNICORN_THREADS'] = str(threads)
+os.environ['GUNICORN_WORKER_CLASS'] = 'uvicorn' if worker_class == 'uvicorn.workers.UvicornWorker' else worker_class
+
+# Recycle workers gracefully to contain slow memory growth; jitter stops all
+# workers from restarting at the same moment
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max(max_requests // 10, 0)))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Import the app once in the master so workers share its memory copy-on-write. Off by default for
+# gevent: the app's locks, Redis client and pool would be built before the worker monkey-patches
+preload_app = _env_bool('GUNICORN_PRELOAD', worker_class != 'gevent')
+
+if preload_app and worker_class == 'gevent':
+    # Preloading asked for explicitly: patch the master before it imports the app
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+# ============= Logging =============
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# ============= Server Hooks =============
+
+
+def on_starting(server):
+    # Start every run with an empty Prometheus multiprocess directory
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for name in os.listdir(multiproc_dir):
+            if name.endswith('.db'):
+                os.remove(os.path.join(multiproc_dir, name))
+
+    server.log.info(
+        f"Starting {workers} {worker_class} worker(s) x {threads} thread(s) on {cpus} CPU(s), "
+        f"preload={preload_app}, max_requests={max_requests}"
+    )
+
+
+def post_fork(server, worker):
+    """Drop connections inherited from the master so no socket is shared across processes"""
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            pass
+
+    if not server.cfg.preload_app:
+        return
+
+    from app import db
+    loaded = server.app.wsgi()
+    # asgi:application wraps the Flask app and owns a second (async) engine
+    flask_app = getattr(loaded, 'flask_app', loaded)
+    with flask_app.app_context():
+        # close=False leaves the parent's connections alone and just forgets them here
+        db.engine.dispose(close=False)
+    if hasattr(loaded, 'engine'):
+        loaded.engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from app.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
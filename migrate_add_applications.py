@@ -1,6 +1,10 @@
 """
 Database Migration: Add Applications Column to Projects Table
 Run this to add the applications field to existing projects table
+
+Legacy: project applications now live in the project_applications junction table. The
+add_channel_application_tables Alembic migration (``flask db upgrade``)
+moves an existing applications column into it and drops the column.
 """
 
 from app import app, db
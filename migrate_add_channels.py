@@ -1,6 +1,10 @@
 """
 Database Migration: Add Channels Column to Projects Table
 Run this to add the channels field to existing projects table
+
+Legacy: project channels now live in the project_channels junction table. The
+add_channel_application_tables Alembic migration (``flask db upgrade``)
+moves an existing channels column into it and drops the column.
 """
 
 from app import app, db
@@ -0,0 +1,55 @@
+"""add backup chains and tombstones
+
+Revision ID: add_backups
+Revises: add_uploads
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_backups'
+down_revision = 'add_uploads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('backups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=8), nullable=False),
+    sa.Column('base_id', sa.Integer(), nullable=True),
+    sa.Column('since', sa.DateTime(), nullable=True),
+    sa.Column('taken_at', sa.DateTime(), nullable=False),
+    sa.Column('encoding', sa.String(length=32), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.Column('team_members', sa.Integer(), nullable=True),
+    sa.Column('projects', sa.Integer(), nullable=True),
+    sa.Column('deleted', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['base_id'], ['backups.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_backups_base_id', 'backups', ['base_id'])
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_deleted_at', 'tombstones', ['deleted_at'])
+    # Changed rows since the previous backup
+    op.create_index('ix_projects_updated_at', 'projects', ['updated_at'])
+    op.create_index('ix_team_members_updated_at', 'team_members', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_team_members_updated_at', table_name='team_members')
+    op.drop_index('ix_projects_updated_at', table_name='projects')
+    op.drop_index('ix_tombstones_deleted_at', table_name='tombstones')
+    op.drop_table('tombstones')
+    op.drop_index('ix_backups_base_id', table_name='backups')
+    op.drop_table('backups')
@@ -0,0 +1,81 @@
+"""move project channels/applications into junction tables
+
+Revision ID: add_channel_application_tables
+Revises: add_minutes_revisions
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_channel_application_tables'
+down_revision = 'add_minutes_revisions'
+branch_labels = None
+depends_on = None
+
+# (array column, dimension table, junction table, junction name column)
+DIMENSIONS = (
+    ('channels', 'channels', 'project_channels', 'channel_name'),
+    ('applications', 'applications', 'project_applications', 'application_name'),
+)
+
+
+def upgrade():
+    for _, table, junction, column in DIMENSIONS:
+        op.create_table(table,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+        )
+        op.create_table(junction,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column(column, sa.String(length=255), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint([column], [f'{table}.name'], ondelete='CASCADE', onupdate='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('project_id', column, name=f'unique_project_{column[:-5]}')
+        )
+        op.create_index(f'ix_{junction}_{column[:-5]}', junction, [column, 'project_id'])
+
+    # Backfill from the array columns (JSON arrays on SQLite), keeping each project's order
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    for array, table, junction, column in DIMENSIONS:
+        if postgres:
+            elements = f'projects p, unnest(p.{array}) WITH ORDINALITY AS e(value, ord)'
+            position = 'min(e.ord) - 1'
+        else:
+            elements = f'projects p, json_each(p.{array}) AS e'
+            position = 'min(e.key)'
+        op.execute(f'INSERT INTO {table} (name, created_at) SELECT DISTINCT e.value, CURRENT_TIMESTAMP '
+                   f'FROM {elements} WHERE e.value IS NOT NULL')
+        op.execute(f'INSERT INTO {junction} (project_id, {column}, position) SELECT p.id, e.value, {position} '
+                   f'FROM {elements} WHERE e.value IS NOT NULL GROUP BY p.id, e.value')
+
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_column('applications')
+        batch_op.drop_column('channels')
+
+
+def downgrade():
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    array_type = sa.ARRAY(sa.String()) if postgres else sa.JSON()
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.add_column(sa.Column('channels', array_type, nullable=True))
+        batch_op.add_column(sa.Column('applications', array_type, nullable=True))
+
+    for array, table, junction, column in DIMENSIONS:
+        if postgres:
+            aggregate = f'ARRAY(SELECT {column} FROM {junction} WHERE project_id = projects.id ORDER BY position)'
+        else:
+            aggregate = (f"(SELECT coalesce(json_group_array({column}), '[]') FROM "
+                         f"(SELECT {column} FROM {junction} WHERE project_id = projects.id ORDER BY position))")
+        op.execute(f'UPDATE projects SET {array} = {aggregate}')
+        op.drop_index(f'ix_{junction}_{column[:-5]}', table_name=junction)
+        op.drop_table(junction)
+        op.drop_table(table)
@@ -0,0 +1,46 @@
+"""add entity counters
+
+Revision ID: add_entity_counters
+Revises: add_keyset_indexes
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_entity_counters'
+down_revision = 'add_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+# Counter name -> query producing its initial value (see app/counters.py)
+INITIAL_COUNTS = {
+    'users': 'SELECT COUNT(*) FROM users',
+    'posts': 'SELECT COUNT(*) FROM posts',
+    'team_members': 'SELECT COUNT(*) FROM team_members',
+    'projects': 'SELECT COUNT(*) FROM projects',
+    'tasks_open': 'SELECT COUNT(*) FROM tasks WHERE completed IS NOT TRUE',
+    'tasks_completed': 'SELECT COUNT(*) FROM tasks WHERE completed IS TRUE',
+    'subtasks': 'SELECT COUNT(*) FROM subtasks',
+}
+
+
+def upgrade():
+    op.create_table('entity_counters',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Seed from the current data
+    for name, query in INITIAL_COUNTS.items():
+        op.execute(
+            f"INSERT INTO entity_counters (name, value, updated_at) "
+            f"SELECT '{name}', ({query}), CURRENT_TIMESTAMP"
+        )
+
+
+def downgrade():
+    op.drop_table('entity_counters')
@@ -0,0 +1,25 @@
+"""add jobs.heartbeat_at for recovering jobs lost with their worker
+
+Revision ID: add_job_heartbeats
+Revises: projects_listing_not_null
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_job_heartbeats'
+down_revision = 'projects_listing_not_null'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('heartbeat_at')
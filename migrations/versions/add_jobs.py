@@ -0,0 +1,40 @@
+"""add jobs
+
+Revision ID: add_jobs
+Revises: add_entity_counters
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_jobs'
+down_revision = 'add_entity_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('kind', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status', 'jobs', ['status'])
+    op.create_index('ix_jobs_created_at', 'jobs', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_created_at', table_name='jobs')
+    op.drop_index('ix_jobs_status', table_name='jobs')
+    op.drop_table('jobs')
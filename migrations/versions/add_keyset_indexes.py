@@ -0,0 +1,27 @@
+"""add keyset pagination indexes
+
+Revision ID: add_keyset_indexes
+Revises: add_delivery_date
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_keyset_indexes'
+down_revision = 'add_delivery_date'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Composite indexes matching the ORDER BY of the paginated listings
+    op.create_index('ix_projects_listing', 'projects', ['starred', 'created_at', 'id'])
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
+    op.drop_index('ix_projects_listing', table_name='projects')
@@ -0,0 +1,112 @@
+"""reference team members by id instead of name (expand)
+
+Revision ID: add_member_id_fks
+Revises: add_channel_application_tables
+Create Date: 2026-10-19 00:00:00.000000
+
+First half of an expand/contract change: the id columns are added next to
+the name columns and filled in, and the name columns stay (the app keeps
+writing them, app/members.py ``write_legacy_names``) so instances still on
+the previous release can run against this schema. Constraints on the ids and
+dropping the names happen in drop_member_name_columns, once every instance
+runs a release that reads ids.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_member_id_fks'
+down_revision = 'add_channel_application_tables'
+branch_labels = None
+depends_on = None
+
+# (table, name column, id column)
+REFERENCES = (
+    ('project_team', 'member_name', 'member_id'),
+    ('tasks', 'assignee_name', 'assignee_id'),
+    ('subtasks', 'assignee_name', 'assignee_id'),
+)
+
+INDEXES = (
+    ('ix_project_team_member_id', 'project_team', ['member_id'], False),
+    ('ix_tasks_assignee_id', 'tasks', ['assignee_id'], False),
+    ('ix_subtasks_assignee_id', 'subtasks', ['assignee_id'], False),
+    # ON CONFLICT target of bulk assignments (app/assignments.py); a constraint once the names go
+    ('uq_project_team_project_member', 'project_team', ['project_id', 'member_id'], True),
+)
+
+# Rows per backfill statement; each batch commits on its own, so row locks
+# are held for one batch at a time rather than until the migration ends
+BATCH_SIZE = 10000
+
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def backfill(table, target, source, lookup, where=None):
+    """UPDATE table SET target = (lookup) in primary key ranges of BATCH_SIZE, one commit per batch.
+
+    Only rows whose ``target`` is still NULL are touched, so an interrupted
+    run can simply be repeated.
+    """
+    condition = f'{source} IS NOT NULL AND {target} IS NULL' + (f' AND {where}' if where else '')
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last = bind.execute(sa.text(f'SELECT max(id) FROM {table}')).scalar() or 0
+        for start in range(0, last + 1, BATCH_SIZE):
+            bind.execute(sa.text(
+                f'UPDATE {table} SET {target} = ({lookup}) '
+                f'WHERE {condition} AND id >= :start AND id < :end'
+            ), {'start': start, 'end': start + BATCH_SIZE})
+
+
+def create_indexes(indexes):
+    if op.get_bind().dialect.name == 'postgresql':
+        # Built without blocking writes
+        with op.get_context().autocommit_block():
+            for name, table, columns, unique in indexes:
+                op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True)
+    else:
+        for name, table, columns, unique in indexes:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def upgrade():
+    # Nullable columns without a default: no table rewrite
+    for table, _, id_column in REFERENCES:
+        if id_column not in _columns(table):  # already there when a previous run was interrupted
+            op.add_column(table, sa.Column(id_column, sa.Integer(), nullable=True))
+
+    # This release inserts team rows by id and fills the name in right after (same transaction)
+    with op.batch_alter_table('project_team') as batch_op:
+        batch_op.alter_column('member_name', existing_type=sa.String(length=255), nullable=True)
+
+    # Version of the member id <-> name map (app/members.py)
+    op.execute(
+        "INSERT INTO entity_counters (name, value, updated_at) SELECT 'member_version', 1, CURRENT_TIMESTAMP "
+        "WHERE NOT EXISTS (SELECT 1 FROM entity_counters WHERE name = 'member_version')"
+    )
+
+    for table, name_column, id_column in REFERENCES:
+        backfill(table, id_column, name_column,
+                 f'SELECT team_members.id FROM team_members WHERE team_members.name = {table}.{name_column}')
+
+    create_indexes(INDEXES)
+
+
+def downgrade():
+    for name, table, _, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+
+    # Rows this release added without a name can't be kept by the previous one
+    op.execute('DELETE FROM project_team WHERE member_name IS NULL')
+    with op.batch_alter_table('project_team') as batch_op:
+        batch_op.drop_column('member_id')
+        batch_op.alter_column('member_name', existing_type=sa.String(length=255), nullable=False)
+    for table in ('tasks', 'subtasks'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('assignee_id')
+
+    op.execute("DELETE FROM entity_counters WHERE name = 'member_version'")
@@ -0,0 +1,34 @@
+"""add meeting minutes revisions
+
+Revision ID: add_minutes_revisions
+Revises: add_project_child_indexes
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_minutes_revisions'
+down_revision = 'add_project_child_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('meeting_minutes_revisions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.LargeBinary(), nullable=False),
+    sa.Column('encoding', sa.String(length=16), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_meeting_minutes_revisions_project_id', 'meeting_minutes_revisions', ['project_id'])
+
+
+def downgrade():
+    op.drop_index('ix_meeting_minutes_revisions_project_id', table_name='meeting_minutes_revisions')
+    op.drop_table('meeting_minutes_revisions')
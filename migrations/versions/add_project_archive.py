@@ -0,0 +1,47 @@
+"""add archived_projects table for finished projects
+
+Revision ID: add_project_archive
+Revises: add_backups
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_project_archive'
+down_revision = 'add_backups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_projects',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('delivery_date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.Column('task_count', sa.Integer(), nullable=True),
+    sa.Column('encoding', sa.String(length=32), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_projects_project_id', 'archived_projects', ['project_id'])
+    op.create_index('ix_archived_projects_name', 'archived_projects', ['name'])
+    op.create_index('ix_archived_projects_listing', 'archived_projects', ['archived_at', 'id'])
+    op.create_index('ix_projects_status_updated_at', 'projects', ['status', 'updated_at'])
+
+
+def downgrade():
+    # Archived projects are dropped with the table; restore them first to keep them
+    op.drop_index('ix_projects_status_updated_at', table_name='projects')
+    op.drop_index('ix_archived_projects_listing', table_name='archived_projects')
+    op.drop_index('ix_archived_projects_name', table_name='archived_projects')
+    op.drop_index('ix_archived_projects_project_id', table_name='archived_projects')
+    op.drop_table('archived_projects')
@@ -0,0 +1,27 @@
+"""add project child indexes
+
+Revision ID: add_project_child_indexes
+Revises: add_jobs
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_project_child_indexes'
+down_revision = 'add_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-project lookups: summary counts and eager loading of a project's tasks/images
+    op.create_index('ix_tasks_project_completed', 'tasks', ['project_id', 'completed'])
+    op.create_index('ix_project_images_project_id', 'project_images', ['project_id'])
+
+
+def downgrade():
+    op.drop_index('ix_project_images_project_id', table_name='project_images')
+    op.drop_index('ix_tasks_project_completed', table_name='tasks')
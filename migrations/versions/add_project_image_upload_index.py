@@ -0,0 +1,31 @@
+"""index project_images.upload_id
+
+Revision ID: add_project_image_upload_index
+Revises: add_job_heartbeats
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_project_image_upload_index'
+down_revision = 'add_job_heartbeats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # flask prune-uploads looks for uploads no image points at; deleting an upload cascades to its images
+    if op.get_bind().dialect.name == 'postgresql':
+        # Built without blocking writes
+        with op.get_context().autocommit_block():
+            op.create_index('ix_project_images_upload_id', 'project_images', ['upload_id'],
+                            postgresql_concurrently=True)
+    else:
+        op.create_index('ix_project_images_upload_id', 'project_images', ['upload_id'])
+
+
+def downgrade():
+    op.drop_index('ix_project_images_upload_id', table_name='project_images')
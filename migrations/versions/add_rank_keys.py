@@ -0,0 +1,87 @@
+"""order tasks, subtasks and images by rank keys instead of display_order
+
+Revision ID: add_rank_keys
+Revises: add_member_id_fks
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_rank_keys'
+down_revision = 'add_member_id_fks'
+branch_labels = None
+depends_on = None
+
+# (table, parent column, index on (parent, rank))
+RANKED = (
+    ('tasks', 'project_id', 'ix_tasks_project_rank'),
+    ('subtasks', 'task_id', 'ix_subtasks_task_rank'),
+    ('project_images', 'project_id', 'ix_project_images_project_rank'),
+)
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# Rows written per backfill UPDATE batch
+BATCH_SIZE = 10000
+
+
+def _rank_key(position):
+    """The position-th key of a freshly numbered list (a0 ... az, b00 ..., as app/ordering.py numbers them)"""
+    length = 1
+    while position >= len(DIGITS) ** length:
+        position -= len(DIGITS) ** length
+        length += 1
+    digits = ''
+    for _ in range(length):
+        position, digit = divmod(position, len(DIGITS))
+        digits = DIGITS[digit] + digits
+    return chr(ord('a') + length - 1) + digits
+
+
+def _rank_type():
+    return sa.String(length=64).with_variant(sa.String(length=64, collation='C'), 'postgresql')
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table, parent, _ in RANKED:
+        op.add_column(table, sa.Column('rank', _rank_type(), nullable=True))
+        # Number each list in its current order
+        rows = bind.execute(sa.text(
+            f'SELECT id, {parent} AS parent FROM {table} ORDER BY {parent}, display_order, id'
+        ))
+        update = sa.text(f'UPDATE {table} SET rank = :rank WHERE id = :id')
+        batch, current, position = [], object(), 0
+        for row in rows.fetchall():
+            position = position + 1 if row.parent == current else 0
+            current = row.parent
+            batch.append({'id': row.id, 'rank': _rank_key(position)})
+            if len(batch) >= BATCH_SIZE:
+                bind.execute(update, batch)
+                batch = []
+        if batch:
+            bind.execute(update, batch)
+
+    op.drop_index('ix_project_images_project_id', table_name='project_images')
+    for table, parent, index in RANKED:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('rank', existing_type=_rank_type(), nullable=False)
+            batch_op.drop_column('display_order')
+        op.create_index(index, table, [parent, 'rank'])
+
+
+def downgrade():
+    for table, parent, index in RANKED:
+        op.drop_index(index, table_name=table)
+        op.add_column(table, sa.Column('display_order', sa.Integer(), nullable=True))
+        op.execute(
+            f'UPDATE {table} SET display_order = (SELECT count(*) FROM {table} AS other '
+            f'WHERE other.{parent} = {table}.{parent} '
+            f'AND (other.rank < {table}.rank OR (other.rank = {table}.rank AND other.id < {table}.id)))'
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('rank')
+    op.create_index('ix_project_images_project_id', 'project_images', ['project_id'])
@@ -0,0 +1,49 @@
+"""add uploads table and upload-backed project images
+
+Revision ID: add_uploads
+Revises: add_rank_keys
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_uploads'
+down_revision = 'add_rank_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uploads',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('content_type', sa.String(length=255), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_uploads_status_created_at', 'uploads', ['status', 'created_at'])
+
+    with op.batch_alter_table('project_images') as batch_op:
+        batch_op.add_column(sa.Column('upload_id', sa.String(length=36), nullable=True))
+        batch_op.alter_column('image_data', existing_type=sa.Text(), nullable=True)
+        batch_op.create_foreign_key('fk_project_images_upload_id', 'uploads', ['upload_id'], ['id'],
+                                    ondelete='CASCADE')
+
+
+def downgrade():
+    # Upload-backed images have no inline data to fall back to
+    op.execute('DELETE FROM project_images WHERE image_data IS NULL')
+    with op.batch_alter_table('project_images') as batch_op:
+        batch_op.drop_constraint('fk_project_images_upload_id', type_='foreignkey')
+        batch_op.alter_column('image_data', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('upload_id')
+
+    op.drop_index('ix_uploads_status_created_at', table_name='uploads')
+    op.drop_table('uploads')
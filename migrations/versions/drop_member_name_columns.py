@@ -0,0 +1,125 @@
+"""drop the team member name columns (contract)
+
+Revision ID: drop_member_name_columns
+Revises:
+Create Date: 2026-10-19 00:00:00.000000
+
+Second half of add_member_id_fks: run once no instance of a release that
+reads the name columns is left. Rows such instances wrote in between get
+their ids here, then the ids get their constraints and the names go.
+
+On the ``contract`` branch rather than the main line, so `flask init-db`
+and `flask db upgrade main@head` never run it; it takes an explicit
+`flask db upgrade contract@head`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'drop_member_name_columns'
+down_revision = None
+branch_labels = ('contract',)
+depends_on = 'add_job_heartbeats'
+
+# (table, name column, id column, ON DELETE)
+REFERENCES = (
+    ('project_team', 'member_name', 'member_id', 'CASCADE'),
+    ('tasks', 'assignee_name', 'assignee_id', 'SET NULL'),
+    ('subtasks', 'assignee_name', 'assignee_id', 'SET NULL'),
+)
+
+# Rows per UPDATE; each batch commits on its own
+BATCH_SIZE = 10000
+
+
+def batched_update(table, assignment, condition):
+    """UPDATE table SET assignment WHERE condition, in primary key ranges of BATCH_SIZE, one commit per batch"""
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last = bind.execute(sa.text(f'SELECT max(id) FROM {table}')).scalar() or 0
+        for start in range(0, last + 1, BATCH_SIZE):
+            bind.execute(sa.text(
+                f'UPDATE {table} SET {assignment} WHERE {condition} AND id >= :start AND id < :end'
+            ), {'start': start, 'end': start + BATCH_SIZE})
+
+
+def upgrade():
+    if 'member_name' not in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('project_team')}:
+        return  # created with the id columns only (flask init-db): nothing to contract
+
+    for table, name_column, id_column, _ in REFERENCES:
+        # Written by the previous release since the expand step: name only
+        batched_update(
+            table,
+            f'{id_column} = (SELECT team_members.id FROM team_members WHERE team_members.name = {table}.{name_column})',
+            f'{name_column} IS NOT NULL AND {id_column} IS NULL'
+        )
+        # Members deleted since the expand step: the name constraint cleared or removed the row, the id dangles
+        batched_update(
+            table, f'{id_column} = NULL',
+            f'{id_column} IS NOT NULL AND NOT EXISTS '
+            f'(SELECT 1 FROM team_members WHERE team_members.id = {table}.{id_column})'
+        )
+    # Assignments of names that don't belong to any member can't be kept
+    op.execute('DELETE FROM project_team WHERE member_id IS NULL')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Constraints are added NOT VALID (no scan under lock) and validated without blocking writes
+        op.execute('ALTER TABLE project_team ADD CONSTRAINT ck_project_team_member_id '
+                   'CHECK (member_id IS NOT NULL) NOT VALID')
+        for table, _, id_column, ondelete in REFERENCES:
+            op.execute(f'ALTER TABLE {table} ADD CONSTRAINT fk_{table}_{id_column} FOREIGN KEY ({id_column}) '
+                       f'REFERENCES team_members (id) ON DELETE {ondelete} NOT VALID')
+        with op.get_context().autocommit_block():
+            op.execute('ALTER TABLE project_team VALIDATE CONSTRAINT ck_project_team_member_id')
+            for table, _, id_column, _ in REFERENCES:
+                op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT fk_{table}_{id_column}')
+        # The validated check lets SET NOT NULL skip its table scan
+        op.alter_column('project_team', 'member_id', existing_type=sa.Integer(), nullable=False)
+        op.drop_constraint('ck_project_team_member_id', 'project_team', type_='check')
+        op.drop_constraint('unique_project_member', 'project_team', type_='unique')
+        op.execute('ALTER TABLE project_team ADD CONSTRAINT unique_project_member '
+                   'UNIQUE USING INDEX uq_project_team_project_member')
+        # Their foreign keys go with them
+        for table, name_column, _, _ in REFERENCES:
+            op.drop_column(table, name_column)
+    else:
+        op.drop_index('uq_project_team_project_member', table_name='project_team')
+        with op.batch_alter_table('project_team') as batch_op:
+            batch_op.drop_constraint('unique_project_member', type_='unique')
+            batch_op.drop_column('member_name')
+            batch_op.alter_column('member_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key('fk_project_team_member_id', 'team_members', ['member_id'], ['id'],
+                                        ondelete='CASCADE')
+            batch_op.create_unique_constraint('unique_project_member', ['project_id', 'member_id'])
+        for table in ('tasks', 'subtasks'):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column('assignee_name')
+                batch_op.create_foreign_key(f'fk_{table}_assignee_id', 'team_members', ['assignee_id'], ['id'],
+                                            ondelete='SET NULL')
+
+
+def downgrade():
+    for table, name_column, _, _ in REFERENCES:
+        op.add_column(table, sa.Column(name_column, sa.String(length=255), nullable=True))
+    for table, name_column, id_column, _ in REFERENCES:
+        batched_update(
+            table,
+            f'{name_column} = (SELECT team_members.name FROM team_members WHERE team_members.id = {table}.{id_column})',
+            f'{id_column} IS NOT NULL'
+        )
+
+    with op.batch_alter_table('project_team') as batch_op:
+        batch_op.drop_constraint('unique_project_member', type_='unique')
+        batch_op.drop_constraint('fk_project_team_member_id', type_='foreignkey')
+        batch_op.alter_column('member_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.create_foreign_key('fk_project_team_member_name', 'team_members', ['member_name'], ['name'],
+                                    ondelete='CASCADE', onupdate='CASCADE')
+        batch_op.create_unique_constraint('unique_project_member', ['project_id', 'member_name'])
+    op.create_index('uq_project_team_project_member', 'project_team', ['project_id', 'member_id'], unique=True)
+    for table in ('tasks', 'subtasks'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_assignee_id', type_='foreignkey')
+            batch_op.create_foreign_key(f'fk_{table}_assignee_name', 'team_members', ['assignee_name'], ['name'],
+                                        ondelete='SET NULL', onupdate='CASCADE')
@@ -12,7 +12,8 @@ import sqlalchemy as sa
 # revision identifiers, used by Alembic.
 revision = 'ec57b5193cbd'
 down_revision = None
-branch_labels = None
+# The main line; contract steps that drop what a previous release still reads are on their own branch
+branch_labels = ('main',)
 depends_on = None
 
 
@@ -0,0 +1,36 @@
+"""make the projects listing key columns NOT NULL
+
+Revision ID: projects_listing_not_null
+Revises: add_project_archive
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'projects_listing_not_null'
+down_revision = 'add_project_archive'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # starred and created_at are keyset pagination keys (PROJECT_KEYS); a NULL
+    # sorts apart from every cursor and can't be encoded in one
+    op.execute("UPDATE projects SET starred = false WHERE starred IS NULL")
+    op.execute("UPDATE projects SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.alter_column('starred', existing_type=sa.Boolean(), nullable=False,
+                              server_default=sa.false())
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False,
+                              server_default=sa.func.current_timestamp())
+
+
+def downgrade():
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True,
+                              server_default=None)
+        batch_op.alter_column('starred', existing_type=sa.Boolean(), nullable=True,
+                              server_default=None)
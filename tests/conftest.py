@@ -0,0 +1,25 @@
+import pytest
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The app on a fresh SQLite database, jobs run inline"""
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path}/app.db')
+    monkeypatch.delenv('SQLALCHEMY_DATABASE_URI', raising=False)
+    monkeypatch.delenv('REDIS_URL', raising=False)
+    monkeypatch.setenv('JOB_BACKEND', 'inline')
+    monkeypatch.setenv('UPLOAD_DIR', str(tmp_path / 'uploads'))
+    monkeypatch.setenv('BACKUP_DIR', str(tmp_path / 'backups'))
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,158 @@
+from datetime import timedelta
+
+import pytest
+
+from app import backups, db
+from app.backups import (_member_entries, _project_entries, apply_backup, decode, encode, materialize,
+                         restore_backup, take_backup)
+from app.models import Project
+
+
+@pytest.fixture(autouse=True)
+def no_clock_skew(monkeypatch):
+    # Otherwise every diff taken within a minute holds every row again and replays never rely on tombstones
+    monkeypatch.setattr(backups, 'CLOCK_SKEW', timedelta(0))
+
+
+def _live(session):
+    """What a full backup taken now would hold, decoded like a stored backup"""
+    document = {'teamMembers': _member_entries(session, None), 'projects': _project_entries(session, None)}
+    return decode(*encode(document))
+
+
+def _replayed(session, backup_id):
+    data = materialize(session, backup_id)
+    return {'teamMembers': data['teamMembers'], 'projects': data['projects']}
+
+
+def _backup(session, full=False):
+    backup_id = take_backup(session, full=full).id
+    db.session.expire_all()
+    return backup_id
+
+
+def _member(client, name):
+    return client.post('/api/team-members', json={'name': name, 'role': 'Developer'}).get_json()['id']
+
+
+def _project(client, name, team=(), tasks=()):
+    project_id = client.post('/api/projects', json={'name': name}).get_json()['id']
+    for member in team:
+        client.post(f'/api/projects/{project_id}/team', json={'member_name': member})
+    task_ids = [
+        client.post(f'/api/projects/{project_id}/tasks', json={'text': text, 'assignee': assignee}).get_json()['id']
+        for text, assignee in tasks
+    ]
+    return project_id, task_ids
+
+
+def test_diffs_replay_to_the_live_state(client):
+    ann = _member(client, 'Ann')
+    _member(client, 'Bob')
+    first, (task, _) = _project(client, 'First', team=['Ann'], tasks=[('T1', 'Ann'), ('T2', None)])
+    second, _ = _project(client, 'Second', tasks=[('T3', 'Bob')])
+    full = _backup(db.session, full=True)
+    assert _replayed(db.session, full) == _live(db.session)
+
+    client.put(f'/api/tasks/{task}', json={'completed': True})
+    client.post(f'/api/tasks/{task}/subtasks', json={'text': 'S1', 'assignee': 'Bob'})
+    client.put(f'/api/team-members/{ann}', json={'workload': 80})
+    client.delete(f'/api/projects/{second}')
+    _project(client, 'Third', tasks=[('T4', None)])
+    diff = _backup(db.session)
+    state = _live(db.session)
+    assert _replayed(db.session, diff) == state
+
+    client.post(f'/api/projects/{first}/images', json={'image_data': 'data:image/png;base64,AAA'})
+    client.put(f'/api/projects/{first}', json={'status': 'active'})
+    latest = _backup(db.session)
+    assert _replayed(db.session, latest) == _live(db.session)
+    # Earlier points of the chain are unchanged
+    assert _replayed(db.session, diff) == state
+
+
+def test_id_reused_after_delete(client, monkeypatch):
+    _project(client, 'Kept')
+    gone, _ = _project(client, 'Gone', tasks=[('Old', None)])
+    _backup(db.session, full=True)
+
+    client.delete(f'/api/projects/{gone}')
+    reused, _ = _project(client, 'New', tasks=[('New task', None)])
+    assert reused == gone  # SQLite hands out the deleted max id again
+    diff = _backup(db.session)
+    assert _replayed(db.session, diff) == _live(db.session)
+    # With the clock skew margin the next diff holds the tombstone again; the newer row stays
+    monkeypatch.setattr(backups, 'CLOCK_SKEW', timedelta(minutes=1))
+    client.put(f'/api/projects/{reused}', json={'status': 'active'})
+    again = _backup(db.session)
+    assert _replayed(db.session, again) == _live(db.session)
+    assert [project['name'] for project in _replayed(db.session, again)['projects']] == ['Kept', 'New']
+
+
+def test_restore_records_a_wipe(client):
+    _member(client, 'Ann')
+    _project(client, 'Before', team=['Ann'], tasks=[('T1', 'Ann')])
+    full = _backup(db.session, full=True)
+    before = _live(db.session)
+
+    _member(client, 'Bob')
+    _project(client, 'Later', team=['Bob'])
+    _backup(db.session)
+
+    restore_backup(db.session, full)
+    db.session.expire_all()
+    assert db.session.scalars(db.select(Project.name)).all() == ['Before']
+    after_restore = _backup(db.session)
+    live = _live(db.session)
+    assert _replayed(db.session, after_restore) == live
+    # Same content as the restored backup, as new rows
+    strip = lambda entries: [{k: v for k, v in entry.items() if k != 'updated_at'} for entry in entries]
+    assert [m['name'] for m in live['teamMembers']] == [m['name'] for m in before['teamMembers']]
+    assert [p['name'] for p in strip(live['projects'])] == [p['name'] for p in strip(before['projects'])]
+
+    _project(client, 'After')
+    latest = _backup(db.session)
+    assert _replayed(db.session, latest) == _live(db.session)
+
+
+def test_member_rename_and_delete_rewrite_projects(client):
+    ann = _member(client, 'Ann')
+    bob = _member(client, 'Bob')
+    project_id, (task, _) = _project(client, 'P', team=['Ann', 'Bob'], tasks=[('T1', 'Ann'), ('T2', 'Bob')])
+    client.post(f'/api/tasks/{task}/subtasks', json={'text': 'S1', 'assignee': 'Ann'})
+    _backup(db.session, full=True)
+    updated_at = db.session.get(Project, project_id).updated_at
+
+    client.put(f'/api/team-members/{ann}', json={'name': 'Anne'})
+    client.delete(f'/api/team-members/{bob}')
+    diff = _backup(db.session)
+    # Projects reference members by id: neither change touches the project row...
+    assert db.session.get(Project, project_id).updated_at == updated_at
+    # ...so the replay rewrites the names in the project trees itself
+    replayed = _replayed(db.session, diff)
+    assert replayed == _live(db.session)
+    project = replayed['projects'][0]
+    assert project['team'] == ['Anne']
+    assert [task['assignee'] for task in project['tasks']] == ['Anne', None]
+    assert project['tasks'][0]['subtasks'][0]['assignee'] == 'Anne'
+
+
+def test_replayed_tombstones_keep_newer_rows():
+    # A tombstone seen again in a later diff (clock skew margin) after the id or the tables were reused
+    members = {1: {'id': 1, 'name': 'Ann', 'updated_at': '2026-01-01T10:00:05'}}
+    projects = {
+        1: {'id': 1, 'name': 'New', 'team': ['Ann'], 'tasks': [], 'updated_at': '2026-01-01T10:00:05'},
+        2: {'id': 2, 'name': 'Old', 'team': [], 'tasks': [], 'updated_at': '2026-01-01T09:00:00'},
+    }
+    apply_backup(members, projects, {'deleted': [
+        {'entity': 'project', 'id': 1, 'deletedAt': '2026-01-01T10:00:00'},
+        {'entity': 'team_member', 'id': None, 'deletedAt': '2026-01-01T10:00:00'},
+    ]})
+    assert list(members) == [1]
+    assert projects[1]['team'] == ['Ann']
+
+    apply_backup(members, projects, {'deleted': [
+        {'entity': 'project', 'id': 2, 'deletedAt': '2026-01-01T10:00:00'},
+        {'entity': 'project', 'id': None, 'deletedAt': '2026-01-01T10:00:10'},
+    ]})
+    assert projects == {}
@@ -0,0 +1,106 @@
+import itertools
+
+import pytest
+
+from app import db, ordering
+from app.models import Task
+from app.ordering import DIGITS, INTEGER_ZERO, key_between, rank_keys
+
+
+def test_key_between_open_ends():
+    assert key_between(None, None) == INTEGER_ZERO
+    assert key_between(INTEGER_ZERO, None) == 'a1'
+    assert key_between(None, INTEGER_ZERO) == 'Zz'
+    assert key_between('az', None) == 'b00'
+    assert key_between('a0V', None) == 'a1'
+
+
+@pytest.mark.parametrize('a, b', [
+    ('a0', 'a1'), ('a0', 'a2'), ('a0', 'a0V'), ('a0V', 'a1'), ('Zz', 'a0'),
+    ('a1', 'b00'), ('a0001', 'a001'), ('a0z', 'a1'), (None, 'a0V'), ('a0zzz', None),
+])
+def test_key_between_sorts_strictly_between(a, b):
+    key = key_between(a, b)
+    assert a is None or a < key
+    assert b is None or key < b
+
+
+@pytest.mark.parametrize('a, b', [('a1', 'a1'), ('a2', 'a1')])
+def test_key_between_out_of_order(a, b):
+    with pytest.raises(ValueError):
+        key_between(a, b)
+
+
+@pytest.mark.parametrize('key', ['', 'a', 'b0', 'a00', 'a0!', '#0'])
+def test_key_between_invalid_keys(key):
+    with pytest.raises(ValueError):
+        key_between(key, None)
+
+
+def test_repeated_inserts_into_one_gap():
+    # Always right after a0: keys grow, but stay ordered
+    low, high = 'a0', 'a1'
+    for _ in range(200):
+        high = key_between(low, high)
+        assert low < high
+    # Always right before a1
+    low, high = 'a0', 'a1'
+    for _ in range(200):
+        low = key_between(low, high)
+        assert low < high
+
+
+def test_rank_keys_increase():
+    keys = list(itertools.islice(rank_keys(), 5000))
+    assert keys[:3] == ['a0', 'a1', 'a2']
+    assert keys[len(DIGITS)] == 'b00'
+    assert all(a < b for a, b in zip(keys, keys[1:]))
+    assert all(len(key) <= 4 for key in keys)
+
+
+def test_rank_keys_after_start():
+    assert list(itertools.islice(rank_keys('a0V'), 2)) == ['a1', 'a2']
+
+
+def _tasks(client, count):
+    project_id = client.post('/api/projects', json={'name': 'P'}).get_json()['id']
+    return project_id, [
+        client.post(f'/api/projects/{project_id}/tasks', json={'text': f'T{n}'}).get_json()['id']
+        for n in range(count)
+    ]
+
+
+def _order(project_id):
+    db.session.expire_all()
+    return list(db.session.scalars(
+        db.select(Task.id).where(Task.project_id == project_id).order_by(Task.rank, Task.id)
+    ))
+
+
+def test_move_next_to_a_tied_key_renumbers(client):
+    project_id, (first, second, third) = _tasks(client, 3)
+    # As left behind by two concurrent moves into the same gap
+    db.session.execute(db.update(Task).where(Task.id.in_([first, second])).values(rank='a0V'))
+    db.session.commit()
+
+    response = client.put(f'/api/tasks/{third}/position', json={'after': first})
+    assert response.status_code == 200
+    assert _order(project_id) == [first, third, second]
+    ranks = db.session.scalars(db.select(Task.rank).where(Task.project_id == project_id)).all()
+    assert len(set(ranks)) == 3
+
+
+def test_moves_never_outgrow_the_column(app, client, monkeypatch):
+    # The background rebalance never catches up
+    monkeypatch.setattr(ordering, '_rebalance_length', 1000)
+    project_id, (first, second, third) = _tasks(client, 3)
+    # Always into the same gap
+    moving = third
+    for _ in range(400):
+        response = client.put(f'/api/tasks/{moving}/position', json={'after': first})
+        assert response.status_code == 200
+        assert len(response.get_json()['rank']) <= app.config['RANK_MAX_LENGTH']
+        moving = second if moving == third else third
+    ranks = db.session.scalars(db.select(Task.rank).where(Task.project_id == project_id)).all()
+    assert max(len(rank) for rank in ranks) <= app.config['RANK_MAX_LENGTH']
+    assert _order(project_id)[0] == first
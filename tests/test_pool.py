@@ -0,0 +1,11 @@
+import pytest
+
+from app.pool import _cloudrun
+
+
+@pytest.mark.parametrize('workers, threads', [(1, 8), (2, 8), (4, 8), (4, 2), (8, 4)])
+def test_cloudrun_pool_stays_within_the_budget(monkeypatch, workers, threads):
+    monkeypatch.setenv('DB_MAX_CONNECTIONS', '20')
+    options = _cloudrun(workers, threads)
+    assert options['pool_size'] + options['max_overflow'] <= threads
+    assert workers * (options['pool_size'] + options['max_overflow']) <= 20
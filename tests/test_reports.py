@@ -0,0 +1,21 @@
+def _project(client, name, status, delivery):
+    project_id = client.post('/api/projects', json={'name': name, 'status': status,
+                                                    'deliveryDate': delivery}).get_json()['id']
+    client.post(f'/api/projects/{project_id}/tasks', json={'text': 'T', 'endDate': delivery})
+
+
+def test_dashboard_month_filter(client):
+    _project(client, 'March done', 'completed', '2026-03-10')
+    _project(client, 'March active', 'active', '2026-03-12')
+    _project(client, 'April done', 'completed', '2025-04-02')
+    _project(client, 'Last March done', 'completed', '2025-03-30')
+
+    html = client.get('/api/reports/dashboard?month=3').get_data(as_text=True)
+    assert 'March done' in html and 'Last March done' in html
+    assert 'March active' not in html and 'April done' not in html
+    assert 'April done' in client.get('/api/reports/dashboard').get_data(as_text=True)
+
+
+def test_dashboard_month_must_be_a_month(client):
+    assert client.get('/api/reports/dashboard?month=0').status_code == 400
+    assert client.get('/api/reports/dashboard?month=13').status_code == 400
@@ -0,0 +1,41 @@
+from app import db
+from app.models import ProjectImage
+from app.snapshots import export_snapshot, replace_snapshot
+
+
+def test_restore_keeps_uploaded_images(client):
+    upload = client.post('/api/upload?filename=a.png', data=b'\x89PNG', content_type='image/png').get_json()
+    project_id = client.post('/api/projects', json={'name': 'P'}).get_json()['id']
+    client.post(f'/api/projects/{project_id}/images', json={'upload_id': upload['id']})
+    client.post(f'/api/projects/{project_id}/images', json={'image_data': 'data:image/png;base64,AAA'})
+
+    snapshot = export_snapshot(db.session)
+    replace_snapshot(db.session, snapshot)
+
+    images = db.session.scalars(db.select(ProjectImage).order_by(ProjectImage.rank)).all()
+    assert [(image.upload_id, image.image_data) for image in images] == [
+        (upload['id'], None), (None, 'data:image/png;base64,AAA')
+    ]
+    assert export_snapshot(db.session)['projects'][0]['images'] == [
+        {**image, 'id': new.id} for image, new in zip(snapshot['projects'][0]['images'], images)
+    ]
+
+
+def test_images_keep_display_order(client):
+    project_id = client.post('/api/projects', json={'name': 'P'}).get_json()['id']
+    for n in range(3):
+        client.post(f'/api/projects/{project_id}/images', json={'image_data': f'data:{n}'})
+    images = client.get(f'/api/projects/{project_id}').get_json()['images']
+    assert [(image['image_data'], image['display_order']) for image in images] == [
+        ('data:0', 0), ('data:1', 1), ('data:2', 2)
+    ]
+
+
+def test_sparse_fieldsets_match_the_full_images(client):
+    project_id = client.post('/api/projects', json={'name': 'P'}).get_json()['id']
+    for n in range(3):
+        client.post(f'/api/projects/{project_id}/images', json={'image_data': f'data:{n}'})
+    full = client.get('/api/projects').get_json()
+    sparse = client.get('/api/projects?fields=id&include=images').get_json()
+    assert [project['images'] for project in sparse] == [project['images'] for project in full]
+    assert [image['display_order'] for image in sparse[0]['images']] == [0, 1, 2]
@@ -0,0 +1,65 @@
+import os
+
+from app import db
+from app.backups import take_backup
+from app.models import Upload
+from app.uploads import file_path, prune_uploads
+
+
+def _upload(client):
+    return client.post('/api/upload?filename=i.png', data=b'\x89PNG', content_type='image/png').get_json()['id']
+
+
+def _image(client, project_id, upload_id):
+    return client.post(f'/api/projects/{project_id}/images', json={'upload_id': upload_id}).get_json()['id']
+
+
+def _project(client, name):
+    return client.post('/api/projects', json={'name': name}).get_json()['id']
+
+
+def _remaining():
+    db.session.expire_all()
+    return set(db.session.scalars(db.select(Upload.id)))
+
+
+def test_prune_removes_uploads_no_image_uses(client):
+    project_id = _project(client, 'P')
+    used = _upload(client)
+    _image(client, project_id, used)
+    deleted_image = _upload(client)
+    image_id = _image(client, project_id, deleted_image)
+    client.delete(f'/api/projects/{project_id}/images/{image_id}')
+    deleted_project = _upload(client)
+    gone = _project(client, 'Gone')
+    _image(client, gone, deleted_project)
+    client.delete(f'/api/projects/{gone}')
+    never_attached = _upload(client)
+
+    # Too recent: a client may still attach them
+    assert prune_uploads(db.session, 24) == {'pending': 0, 'unreferenced': 0}
+    assert prune_uploads(db.session, 0) == {'pending': 0, 'unreferenced': 3}
+    assert _remaining() == {used}
+    assert os.path.exists(file_path(used))
+    assert not any(os.path.exists(file_path(upload_id))
+                   for upload_id in (deleted_image, deleted_project, never_attached))
+
+
+def test_prune_keeps_uploads_of_archived_and_backed_up_images(client):
+    archived = _upload(client)
+    archived_project = _project(client, 'Archived')
+    _image(client, archived_project, archived)
+    client.post(f'/api/projects/{archived_project}/archive')
+
+    backed_up = _upload(client)
+    project_id = _project(client, 'P')
+    image_id = _image(client, project_id, backed_up)
+    take_backup(db.session, full=True)
+    client.delete(f'/api/projects/{project_id}/images/{image_id}')
+
+    assert prune_uploads(db.session, 0)['unreferenced'] == 0
+    assert _remaining() == {archived, backed_up}
+
+    archive_id = client.get('/api/archive').get_json()['projects'][0]['id']
+    restored = client.post(f'/api/archive/{archive_id}/restore').get_json()
+    assert restored['images'][0]['upload_id'] == archived